@@ -0,0 +1,59 @@
+"""Summarize hint difficulty and conversion from the game event log.
+
+Reads the Parquet files under <dir>/columnar (needs pyarrow) and any segments still
+in JSON lines, so it works on a live log too:
+
+    python analyze_events.py data/events
+    python analyze_events.py data/events --compact   # compact closed segments first
+"""
+import argparse
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from src.events import CLOSED_SUFFIX, OPEN_SUFFIX, compact_segments, read_segment
+
+def load_events(directory: Path, kinds: List[str]) -> Dict[str, List[dict]]:
+    events: Dict[str, List[dict]] = defaultdict(list)
+    columnar = directory / "columnar"
+    if columnar.exists():
+        import pyarrow.parquet as pq
+        for kind in kinds:
+            for path in sorted((columnar / f"kind={kind}").glob("*.parquet")):
+                events[kind].extend(pq.read_table(path).to_pylist())
+    for suffix in (CLOSED_SUFFIX, OPEN_SUFFIX):
+        for path in sorted(directory.glob("*" + suffix)):
+            for event in read_segment(path):
+                if event.get("kind") in kinds:
+                    events[event["kind"]].append(event)
+    return events
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hint difficulty and conversion from game events")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--compact", action="store_true", help="compact closed segments to Parquet first")
+    args = parser.parse_args()
+
+    if args.compact:
+        print(f"Compacted {compact_segments(args.directory)} segments")
+    events = load_events(args.directory, ["guess", "game_ended", "payout_status"])
+
+    # Of the guesses made after seeing n riddles, how many were right
+    guesses = Counter((e["coin"], e["hints_seen"]) for e in events["guess"] if e["verdict"])
+    correct = Counter((e["coin"], e["hints_seen"]) for e in events["guess"] if e["verdict"] == "VICTORY")
+    games = Counter(e["coin"] for e in events["game_ended"])
+    wins = Counter(e["coin"] for e in events["game_ended"] if e["outcome"] == "victory")
+    paid = sum(1 for e in events["payout_status"] if e["status"] == "confirmed")
+
+    print(f"{len(events['guess'])} guesses, {sum(games.values())} finished games, "
+          f"{sum(wins.values())} wins, {paid} confirmed payouts\n")
+    print(f"{'coin':<12}{'games':>7}{'win rate':>10}   correct guesses after riddle 1 / 2 / 3")
+    for coin in sorted(games, key=games.get, reverse=True):
+        rates = []
+        for hints_seen in (1, 2, 3):
+            made = guesses[(coin, hints_seen)]
+            rates.append(f"{correct[(coin, hints_seen)] / made:>6.0%}" if made else f"{'-':>6}")
+        print(f"{coin:<12}{games[coin]:>7}{wins[coin] / games[coin]:>10.0%}   {' / '.join(rates)}")
+
+if __name__ == "__main__":
+    main()
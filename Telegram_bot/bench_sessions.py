@@ -0,0 +1,75 @@
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from src.constants import GameState
+from src.game_manager import GameManager
+
+COINS = ["DOGE", "PEPE", "SHIB", "BONK", "WIF", "FLOKI"]
+
+@dataclass
+class DictSession:
+    # The old per-user dataclass, for comparison
+    user_id: int
+    state: GameState
+    cooldown_until: float = 0
+    hint_count: int = 0
+    attempts_left: int = 3
+    current_coin: str = ""
+    last_hint: str = ""
+    game_id: int = 0
+
+def fill_dataclasses(users: int) -> dict:
+    sessions = {}
+    for i in range(users):
+        user_id = 100_000_000 + i * 7
+        sessions[user_id] = DictSession(
+            user_id=user_id,
+            state=GameState.IN_PROGRESS,
+            attempts_left=2,
+            current_coin=COINS[i % len(COINS)],
+            game_id=time.time_ns() // 1000
+        )
+    return sessions
+
+def fill_game_manager(users: int) -> GameManager:
+    manager = GameManager()
+    for i in range(users):
+        user_id = 100_000_000 + i * 7
+        manager.start_game(user_id)
+        manager.set_current_coin(user_id, COINS[i % len(COINS)])
+        manager.use_attempt(user_id)
+    return manager
+
+def measure(name: str, users: int, fill) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = fill(users)
+    elapsed = time.perf_counter() - started
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<18} {used / 2**20:>8.1f} MiB   {used / users:>6.1f} bytes/user   "
+        f"fill {elapsed:>6.2f} s"
+    )
+    del store
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark GameManager session memory")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Holding {args.users} in-progress sessions\n")
+    measure("dataclass + dict", args.users, fill_dataclasses)
+    measure("SessionStore", args.users, fill_game_manager)
+
+    manager = fill_game_manager(args.users)
+    started = time.perf_counter()
+    for i in range(args.users):
+        manager.get_attempts_left(100_000_000 + i * 7)
+    elapsed = time.perf_counter() - started
+    print(f"\nlookup             {elapsed / args.users * 1e6:>8.2f} us/op")
+
+if __name__ == "__main__":
+    main()
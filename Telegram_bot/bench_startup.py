@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from fake_bot_api import FakeBotApi, make_handler
+
+# Runs in a fresh interpreter; prints seconds since the parent launched it at each milestone
+CHILD = """
+import asyncio, json, os, sys, time
+launched = float(sys.argv[1])
+marks = {}
+from src.bot import MemeCoinSphinxBot
+marks["imported"] = time.time() - launched
+
+async def main():
+    bot = MemeCoinSphinxBot()
+    application = bot.initialize()
+    marks["constructed"] = time.time() - launched
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_polling()
+    marks["polling"] = time.time() - launched
+    await bot.engine.get_agent()
+    marks["agent_ready"] = time.time() - launched
+    print(json.dumps(marks))
+    sys.stdout.flush()
+    os._exit(0)
+
+asyncio.run(main())
+"""
+
+def run_child(mode: str, base_url: str, data_dir: str) -> dict:
+    env = dict(
+        os.environ,
+        AGENT_STARTUP=mode,
+        TELEGRAM_TOKEN="123:bench",
+        TELEGRAM_BASE_URL=base_url,
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "bench"),
+        DATA_DIR=data_dir,
+        COOLDOWN_NOTIFY="false",
+        TOKEN_MANAGER_ADDRESS="",
+        TRAFFIC_RECORD_PATH="",
+        EVENT_LOG_DIR="",
+    )
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(launched)],
+        cwd=Path(__file__).parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bot import and startup time")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # Polling starts against a local fake Bot API, so the numbers exclude Telegram itself
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FakeBotApi(1000, 1000, 1000)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/bot"
+
+    print(f"{'mode':<12}{'imported':>10}{'constructed':>13}{'polling':>10}{'agent ready':>13}   (seconds since launch, best of {args.runs})")
+    for mode in ("eager", "background", "lazy"):
+        runs = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as data_dir:
+                runs.append(run_child(mode, base_url, data_dir))
+        best = {mark: min(run[mark] for run in runs) for mark in runs[0]}
+        print(
+            f"{mode:<12}{best['imported']:>10.3f}{best['constructed']:>13.3f}"
+            f"{best['polling']:>10.3f}{best['agent_ready']:>13.3f}"
+        )
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.player_stats import PlayerStats
+
+NAMES = ["Alice", "Bob", "Carol", "Dmitri", "Eun-ji", "Farah", "Giorgio", "Hiro", "Ines", "Jae"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PlayerStats updates, queries and snapshots")
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--games", type=int, default=3_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="trace allocations (updates run several times slower)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    user_ids = [100_000_000 + i * 7 for i in range(args.players)]
+
+    if args.memory:
+        tracemalloc.start()
+    stats = PlayerStats(Path(tempfile.mkdtemp(prefix="sphinx-stats-")) / "stats.snap")
+    started = time.perf_counter()
+    for _ in range(args.games):
+        user_id = rng.choice(user_ids)
+        if rng.random() < 0.3:
+            stats.record_win(user_id, rng.choice(NAMES))
+        else:
+            stats.record_loss(user_id)
+    elapsed = time.perf_counter() - started
+    print(f"{args.games} game results for {len(stats)} players, {len(stats.leaderboard)} on the leaderboard")
+    print(f"update             {elapsed / args.games * 1e6:>8.2f} us/op")
+    if args.memory:
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"memory             {used / 2**20:>8.1f} MiB   {used / len(stats):>6.1f} bytes/player")
+
+    sample = rng.sample(user_ids, 100_000)
+    started = time.perf_counter()
+    for user_id in sample:
+        stats.get(user_id)
+    print(f"/stats (with rank) {(time.perf_counter() - started) / len(sample) * 1e6:>8.2f} us/op")
+
+    started = time.perf_counter()
+    for _ in range(10_000):
+        stats.top(10)
+    print(f"/leaderboard top10 {(time.perf_counter() - started) / 10_000 * 1e6:>8.2f} us/op")
+
+    started = time.perf_counter()
+    asyncio.run(stats.save())
+    print(f"\nsnapshot save      {time.perf_counter() - started:>8.2f} s   {stats.path.stat().st_size / 2**20:.1f} MiB")
+
+    started = time.perf_counter()
+    restored = PlayerStats(stats.path)
+    restored.restore()
+    print(f"snapshot restore   {time.perf_counter() - started:>8.2f} s")
+    assert restored.top(100) == stats.top(100)
+    assert all(restored.get(user_id) == stats.get(user_id) for user_id in sample[:1000])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""A local stand-in for the Telegram Bot API, with Telegram-like flood limits.
+
+Run it and start the bot with TELEGRAM_BASE_URL=http://127.0.0.1:8081/bot to see how the
+outbox paces messages and recovers from 429s without touching Telegram:
+
+    python fake_bot_api.py --port 8081 --chat-rate 1 --global-rate 30
+
+POST an update (JSON) to /updates to have it returned by getUpdates; GET /stats for counts.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+class Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token, or return how many seconds the caller must wait"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class FakeBotApi:
+    def __init__(self, chat_rate: float, chat_burst: float, global_rate: float):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = Bucket(global_rate, global_rate)
+        self.chat_buckets = {}
+        self.updates = deque()
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.delivered = Counter()
+        self.rejected = Counter()
+        self.log = []  # (monotonic time, chat id, delivered) of every send, for tests
+        self.lock = threading.Lock()
+
+    def call(self, method: str, params: dict) -> dict:
+        handler = getattr(self, f"api_{method}", None)
+        if handler is None:
+            return {"ok": True, "result": True}
+        return handler(params)
+
+    def api_getMe(self, params: dict) -> dict:
+        return {"ok": True, "result": {
+            "id": 1, "is_bot": True, "first_name": "Sphinx", "username": "fake_sphinx_bot"
+        }}
+
+    def api_getUpdates(self, params: dict) -> dict:
+        offset = int(params.get("offset") or 0)
+        deadline = time.monotonic() + min(float(params.get("timeout") or 0), 5)
+        while True:
+            with self.lock:
+                while self.updates and self.updates[0]["update_id"] < offset:
+                    self.updates.popleft()
+                if self.updates or time.monotonic() >= deadline:
+                    return {"ok": True, "result": list(self.updates)[:100]}
+            time.sleep(0.05)
+
+    def api_sendMessage(self, params: dict) -> dict:
+        return self._send(params, {"text": params.get("text", "")})
+
+    def api_sendPhoto(self, params: dict) -> dict:
+        return self._send(params, {"caption": params.get("caption", ""), "photo": []})
+
+    def _send(self, params: dict, content: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        with self.lock:
+            bucket = self.chat_buckets.setdefault(chat_id, Bucket(self.chat_rate, self.chat_burst))
+            wait = max(bucket.take(), self.global_bucket.take())
+            self.log.append((time.monotonic(), chat_id, wait <= 0))
+            if wait > 0:
+                self.rejected[chat_id] += 1
+                retry_after = math.ceil(wait)
+                return {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after}
+                }
+            self.delivered[chat_id] += 1
+            message_id = self.next_message_id
+            self.next_message_id += 1
+        return {"ok": True, "result": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            **content
+        }}
+
+    def push_update(self, update: dict) -> None:
+        with self.lock:
+            update["update_id"] = self.next_update_id
+            self.next_update_id += 1
+            self.updates.append(update)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "delivered": sum(self.delivered.values()),
+                "rejected": sum(self.rejected.values()),
+                "chats": len(self.delivered),
+            }
+
+def parse_params(content_type: str, body: bytes) -> dict:
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename() is None:
+                params[name] = part.get_content().strip()
+        return params
+    if content_type.startswith("application/json"):
+        return json.loads(body or b"{}")
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+def make_handler(api: FakeBotApi):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up on a long poll
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, api.stats())
+            else:
+                self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path == "/updates":
+                api.push_update(json.loads(body))
+                self._reply(200, {"ok": True})
+                return
+            method = self.path.rstrip("/").rsplit("/", 1)[-1]
+            params = parse_params(self.headers.get("Content-Type", ""), body)
+            payload = api.call(method, params)
+            self._reply(payload.get("error_code", 200), payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API with flood limits")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--chat-rate", type=float, default=1)
+    parser.add_argument("--chat-burst", type=float, default=3)
+    parser.add_argument("--global-rate", type=float, default=30)
+    args = parser.parse_args()
+
+    api = FakeBotApi(args.chat_rate, args.chat_burst, args.global_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(api))
+    print(f"Fake Bot API on http://127.0.0.1:{args.port}/bot<token>/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(api.stats()))
+
+if __name__ == "__main__":
+    main()
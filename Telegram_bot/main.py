@@ -1,6 +1,8 @@
 import logging
 from src.bot import MemeCoinSphinxBot
 from src.config import config
+from src.metrics import metrics
+from src.supervisor import run_supervisor
 
 # Enable logging
 logging.basicConfig(
@@ -16,6 +18,16 @@ def main() -> None:
         # Validate configuration
         config.validate()
         
+        # Expose LLM token accounting and other metrics
+        if config.METRICS_PORT:
+            metrics.serve(config.METRICS_PORT)
+        
+        # Spread users over several worker processes
+        if config.WORKER_PROCESSES > 1:
+            logger.info(f"Starting supervisor with {config.WORKER_PROCESSES} workers...")
+            run_supervisor(config.WORKER_PROCESSES)
+            return
+        
         # Initialize bot
         bot = MemeCoinSphinxBot()
         application = bot.initialize()
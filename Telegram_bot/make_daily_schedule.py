@@ -0,0 +1,90 @@
+"""Precompute the daily challenges ahead of time.
+
+Each day gets its coin, hint sequence and the Sphinx's opening lines for victory,
+wrong guesses and defeat. The bot renders a day's replies once at rollover and
+serves every player from them, so a campaign day needs no model calls:
+
+    python make_daily_schedule.py --days 30
+    python make_daily_schedule.py --days 7 --variants 5   # have the model write the lines
+
+Days already in the schedule are kept unless --overwrite is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, List
+
+from src.config import config
+from src.daily import plan_day, utc_today
+from src.fallback import OPENERS
+
+OUTCOMES = {
+    "VICTORY": "Outcome: VICTORY",
+    "WRONG": "Outcome: WRONG",
+    "DEFEAT": "Outcome: DEFEAT",
+}
+
+async def write_openers(agent, variants: int, coin: str) -> Dict[str, List[str]]:
+    """Ask the model for in-character opening lines; the built-in ones fill any gaps"""
+    openers: Dict[str, List[str]] = {}
+    for tag, outcome in OUTCOMES.items():
+        lines = []
+        for _ in range(variants):
+            result = await agent.flavour_chain.ainvoke({"input": f"Daily challenge, the coin is {coin}\n{outcome}"})
+            line = agent._clean_flavour(result.content)
+            if line and line not in lines:
+                lines.append(line)
+        openers[tag] = lines or list(OPENERS[tag])
+    return openers
+
+async def plan(schedule: dict, coins: Dict[str, dict], args: argparse.Namespace) -> int:
+    """Add the requested days to the schedule; returns how many were planned"""
+    agent = None
+    if args.variants:
+        from src.agent import SphinxAgent
+        agent = SphinxAgent()
+
+    start = args.start or utc_today()
+    planned = 0
+    for offset in range(args.days):
+        day = start + timedelta(days=offset)
+        if day.isoformat() in schedule["days"] and not args.overwrite:
+            continue
+        entry = plan_day(day, coins, args.seed)
+        if agent is not None:
+            entry["openers"] = await write_openers(agent, args.variants, entry["coin"])
+        schedule["days"][day.isoformat()] = entry
+        planned += 1
+        print(f"{day.isoformat()}: {entry['coin']}")
+    return planned
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute daily challenges")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day (default: today, UTC)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--variants", type=int, default=0, help="opening lines per outcome written by the model")
+    parser.add_argument("--seed", default=config.DAILY_SEED)
+    parser.add_argument("--output", default=str(config.DAILY_SCHEDULE_PATH))
+    parser.add_argument("--overwrite", action="store_true", help="replace days already scheduled")
+    args = parser.parse_args()
+
+    from src.tools import MemeDatabase
+    coins = MemeDatabase().meme_coins
+
+    schedule = {"days": {}}
+    if os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as f:
+            schedule = json.load(f)
+
+    planned = asyncio.run(plan(schedule, coins, args))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(schedule, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, args.output)
+    print(f"Planned {planned} days; {len(schedule['days'])} in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Replay a recorded traffic file through the bot's handlers, offline.
+
+Updates are fed to MemeCoinSphinxBot at their recorded pace (--speed 1), faster
+(--speed 10) or as fast as possible (--speed max), with a stub model that answers
+from the local fallback engine after --llm-latency seconds and an outbox that
+records replies instead of calling Telegram. Like the Application's default, updates
+are handled one at a time; --concurrent overlaps different users' updates instead,
+keeping each user's updates in order.
+
+    python replay_traffic.py traffic.bin --speed max --save run-a.json
+    python replay_traffic.py traffic.bin --speed max --compare run-a.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# The replay never talks to OpenAI or Telegram, and never pays out
+os.environ.setdefault("OPENAI_API_KEY", "replay")
+os.environ["TOKEN_MANAGER_ADDRESS"] = ""
+os.environ["TRAFFIC_RECORD_PATH"] = ""
+os.environ["EVENT_LOG_DIR"] = ""
+os.environ["COOLDOWN_NOTIFY"] = "false"
+
+from telegram import Update
+from langchain_openai import ChatOpenAI
+
+from src.agent import SphinxAgent
+from src.bot import MemeCoinSphinxBot
+from src.config import config
+from src.traffic import KIND_COMMAND, TrafficEvent, read_traffic
+
+current_update: ContextVar[int] = ContextVar("current_update", default=-1)
+
+class StubAgent(SphinxAgent):
+    """SphinxAgent whose model calls take a fixed time and never reach the model"""
+    def __init__(self, latency: float):
+        super().__init__(llm=ChatOpenAI(api_key="replay"))
+        self.latency = latency
+
+    async def _call_model(self, runnable, payload, profile):
+        await asyncio.sleep(self.latency)
+        return None  # answered by the local fallback engine, deterministically
+
+class RecordingOutbox:
+    """Stands in for the Outbox: notes each reply and when it was queued"""
+    def __init__(self):
+        self.replies: Dict[int, List[str]] = defaultdict(list)
+        self.first_reply_at: Dict[int, float] = {}
+
+    def send(self, chat_id: int, text: str, *, photo: Optional[Path] = None, **kwargs) -> None:
+        index = current_update.get()
+        if index not in self.first_reply_at:
+            self.first_reply_at[index] = time.perf_counter()
+        first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+        self.replies[index].append((f"[{photo.name}] " if photo else "") + first_line[:80])
+
+    def start(self, bot) -> None:
+        pass
+
+    async def stop(self, timeout: float = 10) -> None:
+        pass
+
+def make_update(index: int, event: TrafficEvent) -> Update:
+    message = {
+        "message_id": index + 1,
+        "date": int(time.time()),
+        "chat": {"id": event.chat_id, "type": "private" if event.chat_id > 0 else "group"},
+        "from": {"id": event.user_id, "is_bot": False, "first_name": "player"},
+        "text": event.text,
+    }
+    if event.kind == KIND_COMMAND:
+        command = event.text.split()[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return Update.de_json({"update_id": index + 1, "message": message}, None)
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def replay(
+    events: List[TrafficEvent],
+    speed: Optional[float],
+    llm_latency: float,
+    concurrent: bool = False
+) -> dict:
+    outbox = RecordingOutbox()
+    bot = MemeCoinSphinxBot(agent=StubAgent(llm_latency))
+    bot.outbox = outbox
+
+    user_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+    handler_latency: List[float] = []
+    dispatched_at: Dict[int, float] = {}
+
+    async def dispatch(index: int, event: TrafficEvent) -> None:
+        current_update.set(index)
+        update = make_update(index, event)
+        async with user_locks[event.user_id]:
+            started = dispatched_at[index] = time.perf_counter()
+            if event.kind == KIND_COMMAND and event.text.split()[0] == "/start":
+                await bot.start_command(update, None)
+            elif event.kind != KIND_COMMAND:
+                await bot.handle_message(update, None)
+            handler_latency.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for index, event in enumerate(events):
+        if speed is not None:
+            delay = started + event.offset / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if concurrent:
+            tasks.append(asyncio.create_task(dispatch(index, event)))
+        else:
+            await dispatch(index, event)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    reply_latency = [outbox.first_reply_at[i] - dispatched_at[i] for i in outbox.first_reply_at if i in dispatched_at]
+    return {
+        "updates": len(events),
+        "elapsed": elapsed,
+        "handler_latency": handler_latency,
+        "reply_latency": reply_latency,
+        "outcomes": [outbox.replies.get(i, []) for i in range(len(events))],
+    }
+
+def print_report(result: dict) -> None:
+    print(f"Replayed {result['updates']} updates in {result['elapsed']:.2f}s "
+          f"({result['updates'] / max(result['elapsed'], 1e-9):.0f} updates/s)\n")
+    for name in ("handler_latency", "reply_latency"):
+        values = result[name]
+        print(
+            f"{name:<16} p50 {percentile(values, 0.5) * 1000:>8.2f} ms   "
+            f"p90 {percentile(values, 0.9) * 1000:>8.2f} ms   "
+            f"p99 {percentile(values, 0.99) * 1000:>8.2f} ms   "
+            f"max {max(values, default=0) * 1000:>8.2f} ms"
+        )
+
+def compare(outcomes: List[List[str]], baseline: List[List[str]], events: List[TrafficEvent]) -> None:
+    diffs = [i for i in range(min(len(outcomes), len(baseline))) if outcomes[i] != baseline[i]]
+    print(f"\n{len(diffs)} of {len(outcomes)} updates got different replies than the baseline")
+    for i in diffs[:10]:
+        print(f"\n  #{i} user {events[i].user_id}: {events[i].text[:60]!r}")
+        print(f"    baseline: {baseline[i]}")
+        print(f"    this run: {outcomes[i]}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded bot traffic offline")
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--speed", default="1", help="1, 10, ... or max")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per stub model call")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrent", action="store_true",
+                        help="overlap different users' updates (outcomes then depend on timing)")
+    parser.add_argument("--save", type=Path, help="write latencies and outcomes to this JSON file")
+    parser.add_argument("--compare", type=Path, help="diff outcomes against a saved run")
+    args = parser.parse_args()
+
+    events = list(read_traffic(args.recording))[:args.limit]
+    speed = None if args.speed == "max" else float(args.speed)
+
+    # Same coins and reply wording on every run, so outcome diffs mean behaviour changed
+    random.seed(args.seed)
+    # Cooldowns run on the wall clock: shrink them with the replay speed
+    config.COOLDOWN_SECONDS = int(config.COOLDOWN_SECONDS / speed) if speed else 0
+    state_dir = Path(tempfile.mkdtemp(prefix="sphinx-replay-"))
+    config.PAYOUT_JOURNAL_PATH = state_dir / "payouts.db"
+    config.SESSION_SNAPSHOT_PATH = state_dir / "sessions.snap"
+
+    result = asyncio.run(replay(events, speed, args.llm_latency, args.concurrent))
+    print_report(result)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        compare(result["outcomes"], baseline["outcomes"], events)
+    if args.save:
+        args.save.write_text(json.dumps({"speed": args.speed, **result}))
+        print(f"\nSaved run to {args.save}")
+
+if __name__ == "__main__":
+    main()
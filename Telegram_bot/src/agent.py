@@ -1,130 +1,145 @@
+import asyncio
 import logging
+import re
+from time import monotonic
+from typing import Any, Optional, Tuple
 from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.tools import Tool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
 from .config import config
-from .tools import (  # 임포트 부분 수정
-    get_next_riddle,  # Tool 자체를 임포트
-    verify_answer,
-    start_new_game,
-    send_meme_coin,
-    meme_db
-)
+from .circuit_breaker import CircuitBreaker
+from .fallback import TemplateReplyEngine, Verdict
+from .metrics import metrics
+from .profiling import instrument
+from .prompts import CHATTER_PROFILE, FLAVOUR_PROFILE, PromptProfile
+from .tools import meme_db
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+class TokenUsageCallback(BaseCallbackHandler):
+    """Exports the token usage of every model call made under one prompt profile"""
+    def __init__(self, profile: str):
+        self.profile = profile
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+
+        # Newer chat models report usage on the message instead of llm_output
+        if not usage:
+            for generation in (response.generations[0] if response.generations else []):
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage_metadata.get("input_tokens", 0)
+                output_tokens += usage_metadata.get("output_tokens", 0)
+                cached_tokens += (usage_metadata.get("input_token_details") or {}).get("cache_read", 0)
+
+        metrics.inc("llm_calls_total", profile=self.profile)
+        metrics.inc("llm_input_tokens_total", input_tokens, profile=self.profile)
+        metrics.inc("llm_output_tokens_total", output_tokens, profile=self.profile)
+        metrics.inc("llm_cached_input_tokens_total", cached_tokens, profile=self.profile)
+        metrics.observe("llm_input_tokens", input_tokens, profile=self.profile)
+
 class SphinxAgent:
-    def __init__(self):
-        # Initialize the LLM
-        self.llm = ChatOpenAI(
+    def __init__(self, llm=None, breaker: Optional[CircuitBreaker] = None):
+        # Initialize the LLM (a local fake chat model can be injected for testing)
+        self.llm = llm or ChatOpenAI(
             temperature=config.TEMPERATURE,
             model=config.MODEL_NAME,
         )
         
-        # Define the tools
-        self.tools = [
-            get_next_riddle,  # 직접 Tool 객체 사용
-            verify_answer,    # 직접 Tool 객체 사용
-            start_new_game,   # 직접 Tool 객체 사용
-            send_meme_coin    # 직접 Tool 객체 사용
-        ]
+        # Latency budget and breaker around the model, with a local reply engine behind it
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=config.BREAKER_RESET_SECONDS,
+            slow_call_seconds=config.LLM_SLOW_CALL_SECONDS
+        )
+        self.fallback = TemplateReplyEngine(meme_db)
         
-        # Create the prompt
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are the MemeCoinsphinx, a mysterious and playful creature that speaks in riddles.
-            Your purpose is to challenge humans with riddles about meme coins.
-            
-            IMPORTANT RESPONSE RULES:
-            1. For EVERY wrong answer, you MUST:
-               - Start your response with "[WRONG]"
-               - Use verify_answer tool to check the answer
-               - Use get_next_riddle tool to get a new hint
-               - Format: "[WRONG] Not quite... Here's another hint: [new hint]"
-            
-            2. For EVERY correct answer, you MUST:
-               - Start your response with "[VICTORY]"
-               - Format: "[VICTORY] Oh, how unexpected! [congratulatory message]"
-            
-            3. For the final wrong attempt, you MUST:
-               - Start your response with "[DEFEAT]"
-               - Format: "[DEFEAT] Oh mortal, you have failed! The answer was [coin]. [mockery]"
-            
-            Game Rules:
-            - Players get 3 attempts to guess each coin
-            - You MUST provide a new hint after each wrong guess
-            - After 3 wrong attempts, declare defeat
-            
-            Character Guidelines:
-            - Speak in a mysterious and teasing manner
-            - Use emoji for expression (🔮 🎭 🎲 etc.)
-            - Be playfully mocking when players lose
-            - Act surprised and disappointed when players win
-            
-            REMEMBER: EVERY response MUST start with either [WRONG], [VICTORY], or [DEFEAT]
-            Never reveal the answer until all attempts are exhausted."""),
+        # Flavour-only prompt: guesses are judged locally, so no tool schemas are bound
+        self.flavour_prompt = ChatPromptTemplate.from_messages([
+            ("system", FLAVOUR_PROFILE.system),
             ("user", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
         ])
-        
-        # Create the agent
-        self.agent = create_openai_tools_agent(self.llm, self.tools, self.prompt)
-        
-        # Create the agent executor
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=self.tools,
-            verbose=True,
-            handle_parsing_errors=True,
-            max_iterations=3
-        )
+        self.flavour_chain = self.flavour_prompt | self.llm.bind(max_tokens=config.FLAVOUR_MAX_TOKENS)
     
-    async def process_message(self, message: str, attempts_left: int, is_new_hint_needed: bool = False) -> str:
-        """Process a message and return the agent's response"""
-        try:
-            if message.lower() == "start_new_game":
-                # 게임 시작은 attempts_left를 사용하지 않으므로 특별 처리
-                for tool in self.tools:
-                    if tool.name == "start_new_game":
-                        result = tool.invoke({"command": "start"})
-                        print(f"Game started with result: {result}")
-                        return "Let the game begin! 🎮"
+    @instrument("agent.process_message")
+    async def process_message(self, message: str, attempts_left: int, coin: str, hints_seen: int) -> str:
+        """Judge a guess at the player's coin and return the tagged Sphinx response"""
+        # The intent classifier only lets coin names through as guesses, so every guess
+        # is judged locally and the model only adds one in-character line
+        verdict = self.fallback.judge(message, attempts_left, coin, hints_seen)
+        if verdict is None:
+            return self.fallback.render(None)
+        result = await self._call_model(
+            self.flavour_chain,
+            {"input": self._describe_verdict(message, verdict)},
+            FLAVOUR_PROFILE
+        )
+        flavour = self._clean_flavour(result.content) if result is not None else None
+        return self.fallback.render(verdict, flavour)
+
+    @instrument("agent.chat")
+    async def chat(self, message: str) -> str:
+        """Answer a message that is not a guess with one in-character line; never judges or hints"""
+        result = await self._call_model(
+            self.flavour_chain,
+            {"input": f"Player said: {message.strip()}\nOutcome: not a guess, no attempt used"},
+            CHATTER_PROFILE
+        )
+        flavour = self._clean_flavour(result.content) if result is not None else None
+        return self.fallback.render(None, flavour)
 
-            # 나머지 메시지 처리 로직
-            if is_new_hint_needed and attempts_left > 0:
-                hint = self.get_next_hint()
-                return f"[WRONG] Not quite... You have {attempts_left} attempts left. Here's another hint: {hint}"
+    @instrument("agent.call_model")
+    async def _call_model(self, runnable, payload: dict, profile: PromptProfile) -> Optional[Any]:
+        """Run one model call under the latency budget and breaker; None if the model can't be used"""
+        # While the breaker is open, answer from local game state at full speed
+        if not self.breaker.allow_request():
+            metrics.inc("llm_fallback_replies_total", profile=profile.name, reason="breaker_open")
+            return None
 
-            response = await self.agent_executor.ainvoke(
-                {
-                    "input": message,
-                    "attempts_left": attempts_left
-                }
+        started = monotonic()
+        try:
+            result = await asyncio.wait_for(
+                runnable.ainvoke(payload, config={"callbacks": [TokenUsageCallback(profile.name)]}),
+                timeout=config.LLM_TIMEOUT_SECONDS
             )
-            
-            print(f"Agent final response: {response['output']}")
-            return response["output"]
-            
+        except asyncio.TimeoutError:
+            logger.warning(f"Agent exceeded latency budget of {config.LLM_TIMEOUT_SECONDS}s")
+            self.breaker.record_failure()
+            metrics.inc("llm_fallback_replies_total", profile=profile.name, reason="timeout")
+            return None
         except Exception as e:
-            print(f"Error in process_message: {e}")
-            return "🤔 My mystical powers seem to be temporarily distracted..."
+            logger.warning(f"Error in process_message: {e}")
+            self.breaker.record_failure()
+            metrics.inc("llm_fallback_replies_total", profile=profile.name, reason="error")
+            return None
+
+        elapsed = monotonic() - started
+        self.breaker.record_success(elapsed)
+        metrics.observe("llm_call_seconds", elapsed, profile=profile.name)
+        return result
+
+    @staticmethod
+    def _describe_verdict(message: str, verdict: Verdict) -> str:
+        """Build the variable user turn for the flavour prompt"""
+        lines = [f"Player guessed: {message.strip()}", f"Outcome: {verdict.tag}"]
+        if verdict.tag == "WRONG":
+            lines.append(f"Attempts left: {verdict.attempts_left}")
+        if verdict.tag == "DEFEAT":
+            lines.append(f"The answer was: {verdict.coin}")
+        return "\n".join(lines)
 
-    def get_next_hint(self) -> str:
-        """Get next hint from the riddle tool"""
-        riddle_tool = next((tool for tool in self.tools if tool.name == "get_next_riddle"), None)
-        if riddle_tool:
-            try:
-                return riddle_tool.run("")
-            except Exception as e:
-                print(f"Error getting hint: {e}")
-                return "Error getting hint"
-        return "No more hints available"
+    @staticmethod
+    def _clean_flavour(text: str) -> Optional[str]:
+        """Strip any outcome tags the model added on its own"""
+        text = re.sub(r"\[(WRONG|VICTORY|DEFEAT)\]", "", text or "").strip()
+        return text or None
 
-    def get_current_game_state(self) -> dict:
-        """Get the current state of the game"""
-        return {
-            "current_coin": meme_db.current_coin,
-            "hint_index": meme_db.hint_index,
-            "total_hints": len(meme_db.meme_coins[meme_db.current_coin]["hints"]) if meme_db.current_coin else 0
-        }
\ No newline at end of file
+    def new_game(self) -> Tuple[str, str]:
+        """Pick the coin of a new game; returns it with its first riddle"""
+        coin = meme_db.random_coin()
+        return coin, meme_db.hint(coin, 0) or "No more hints available"
\ No newline at end of file
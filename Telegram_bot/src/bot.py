@@ -1,25 +1,53 @@
 import asyncio
-import os
+import signal
 from pathlib import Path
-from typing import cast
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from typing import TYPE_CHECKING, List, Optional
+from telegram import Chat, Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import (
     Application,
     CommandHandler,
     MessageHandler,
+    TypeHandler,
     ContextTypes,
     CallbackContext,
     filters,
 )
 from .config import config
 from .constants import *
-from .game_manager import GameManager
-from .agent import SphinxAgent
+from .engine import GameEngine, Reply
+from .outbox import Outbox, Priority
+from .profiling import instrument, profiler
+from .traffic import TrafficRecorder
+
+if TYPE_CHECKING:
+    from .agent import SphinxAgent
 
 class MemeCoinSphinxBot:
-    def __init__(self):
-        self.game_manager = GameManager()
-        self.agent = SphinxAgent()
+    """Telegram front-end: turns updates into engine calls and engine replies into messages"""
+    def __init__(self, agent: Optional["SphinxAgent"] = None):
+        # The game runs in process unless ENGINE_URL points at engine_server processes
+        if config.ENGINE_URL:
+            from .engine_client import RemoteEngine
+            self.engine = RemoteEngine(
+                [url.strip() for url in config.ENGINE_URL.split(",") if url.strip()],
+                pool_size=config.ENGINE_POOL_SIZE,
+                timeout=config.ENGINE_TIMEOUT,
+                name=f"{config.ENGINE_FRONTEND}-{config.SHARD_INDEX}",
+                secret=config.ENGINE_SECRET
+            )
+        else:
+            self.engine = GameEngine(agent)
+        self.outbox = Outbox(
+            global_rate=config.OUTBOX_GLOBAL_RATE,
+            chat_rate=config.OUTBOX_CHAT_RATE,
+            chat_burst=config.OUTBOX_CHAT_BURST
+        )
+        self.recorder = None
+        if config.TRAFFIC_RECORD_PATH:
+            salt = config.TRAFFIC_RECORD_SALT.encode() or None
+            self.recorder = TrafficRecorder(config.TRAFFIC_RECORD_PATH, salt)
+        self.application = None
+        self._notification_task = None
         
         # 이미지 경로 확인 및 설정
         self.image_dir = Path(config.IMAGE_DIR)
@@ -37,17 +65,39 @@ class MemeCoinSphinxBot:
             if not path.exists():
                 raise FileNotFoundError(f"Required image not found: {path}")
     
-    def initialize(self) -> Application:
-        """Initialize and return the bot application"""
+    def initialize(self, polling: bool = True) -> Application:
+        """Initialize and return the bot application
+
+        With polling=False the application has no updater; a supervisor feeds it updates.
+        """
         # 올바른 형식의 봇 토큰인지 확인
         if not config.TELEGRAM_TOKEN or not config.TELEGRAM_TOKEN.strip():
             raise ValueError("Invalid Telegram token")
             
         # Create application
-        application = Application.builder().token(config.TELEGRAM_TOKEN).build()
+        builder = (
+            Application.builder()
+            .token(config.TELEGRAM_TOKEN)
+            .base_url(config.TELEGRAM_BASE_URL)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+        )
+        if not polling:
+            builder = builder.updater(None)
+        application = builder.build()
+        self.application = application
+        
+        # Record incoming traffic (anonymized) before the game handlers see it
+        if self.recorder:
+            application.add_handler(TypeHandler(Update, self.recorder.record), group=-1)
         
         # Add handlers
         application.add_handler(CommandHandler("start", self.start_command))
+        application.add_handler(CommandHandler("hint", self.hint_command))
+        application.add_handler(CommandHandler("daily", self.daily_command))
+        application.add_handler(CommandHandler("stats", self.stats_command))
+        application.add_handler(CommandHandler("leaderboard", self.leaderboard_command))
+        application.add_handler(CommandHandler("profile", self.profile_command))
         application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND, 
             self.handle_message
@@ -58,212 +108,145 @@ class MemeCoinSphinxBot:
         
         return application
     
+    async def _post_init(self, application: Application) -> None:
+        """Start background workers once the event loop is running"""
+        self.outbox.start(application.bot)
+        await self.engine.start()
+        self._notification_task = asyncio.create_task(self._notification_loop())
+        
+        # `kill -USR1 <pid>` profiles the running bot for PROFILE_SECONDS
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGUSR1, lambda: asyncio.ensure_future(profiler.run(config.PROFILE_SECONDS))
+            )
+        except (NotImplementedError, RuntimeError, AttributeError):
+            pass  # no SIGUSR1 on this platform, or not in the main thread
+    
+    async def _post_shutdown(self, application: Application) -> None:
+        """Stop background workers"""
+        if self._notification_task:
+            self._notification_task.cancel()
+        await self.engine.stop()
+        await self.outbox.stop()
+        if self.recorder:
+            self.recorder.close()
+    
+    async def _notification_loop(self) -> None:
+        """Deliver what the engine says on its own: cooldowns ending and payout progress"""
+        while True:
+            try:
+                for reply in await self.engine.next_notifications():
+                    self._send(reply.chat_id, [reply])
+            except Exception as e:
+                print(f"Error delivering notifications: {e}")
+                await asyncio.sleep(1)
+    
+    def _send(self, chat_id: int, replies: List[Reply]) -> None:
+        """Queue engine replies on the outbox, with their image as the caption's photo"""
+        for reply in replies:
+            self.outbox.send(
+                chat_id,
+                reply.text,
+                photo=self.image_dir / reply.image if reply.image else None,
+                priority=Priority[reply.priority.upper()],
+                parse_mode=reply.parse_mode
+            )
+    
     async def _error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE):
         """Handle errors occurring in the dispatcher"""
         print(f"Error occurred: {context.error}")
     
+    @instrument("bot.start_command")
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle the /start command"""
         if not update.effective_chat or not update.effective_message:
             return
             
-        user_id = update.effective_user.id if update.effective_user else 0
-        success, cooldown = self.game_manager.start_game(user_id)
-        
-        if not success:
-            await update.effective_message.reply_text(
-                COOLDOWN_MESSAGE.format(cooldown=cooldown),
-                parse_mode='Markdown'
-            )
+        chat_id = update.effective_chat.id
+        if update.effective_chat.type in (Chat.GROUP, Chat.SUPERGROUP):
+            self._send(chat_id, await self.engine.group_start(chat_id))
             return
         
+        user_id = update.effective_user.id if update.effective_user else 0
+        self._send(chat_id, await self.engine.start_game(user_id))
+    
+    @instrument("bot.hint_command")
+    async def hint_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle the /hint command: repeat the current riddle (in a group, as /start does)"""
+        if not update.effective_chat:
+            return
+        chat_id = update.effective_chat.id
+        if update.effective_chat.type in (Chat.GROUP, Chat.SUPERGROUP):
+            self._send(chat_id, await self.engine.group_start(chat_id))
+            return
+        user_id = update.effective_user.id if update.effective_user else 0
+        self._send(chat_id, await self.engine.hint(user_id))
+    
+    @instrument("bot.daily_command")
+    async def daily_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle the /daily command: today's challenge, the same riddle for every player"""
+        if not update.effective_chat:
+            return
+        chat_id = update.effective_chat.id
+        if update.effective_chat.type in (Chat.GROUP, Chat.SUPERGROUP):
+            self.outbox.send(chat_id, DAILY_PRIVATE_MESSAGE, priority=Priority.CHATTER)
+            return
+        user_id = update.effective_user.id if update.effective_user else 0
+        self._send(chat_id, await self.engine.daily(user_id))
+    
+    @instrument("bot.stats_command")
+    async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle the /stats command from the in-memory counters"""
+        user_id = update.effective_user.id if update.effective_user else 0
+        self._send(update.effective_chat.id, await self.engine.player_stats(user_id))
+    
+    @instrument("bot.leaderboard_command")
+    async def leaderboard_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle the /leaderboard command; reads only the top of the ranking"""
+        self._send(update.effective_chat.id, await self.engine.leaderboard(config.LEADERBOARD_SIZE))
+    
+    async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /profile [seconds] from an admin: sample stacks and report handler timings"""
+        if not update.effective_user or update.effective_user.id not in config.ADMIN_USER_IDS:
+            return
+        chat_id = update.effective_chat.id
         try:
-            with open(self.image_dir / "happySphinx.png", "rb") as photo:
-                await context.bot.send_photo(
-                    chat_id=update.effective_chat.id,
-                    photo=photo,
-                    caption=GAME_RULES,
-                    parse_mode='Markdown'
-                )
-        except Exception as e:
-            print(f"Error sending welcome image: {e}")
-            await update.effective_message.reply_text(GAME_RULES, parse_mode='Markdown')
+            seconds = float(context.args[0]) if context and context.args else config.PROFILE_SECONDS
+        except ValueError:
+            seconds = config.PROFILE_SECONDS
+        seconds = min(max(seconds, 1), 600)
         
-        try:
-            # Get initial attempts count
-            attempts_left = self.game_manager.get_attempts_left(user_id)
-            
-            # Start new game
-            response = await self.agent.process_message("start_new_game", attempts_left)
-            if response:
-                await update.effective_message.reply_text(
-                    f"🎮 {response}",
-                    parse_mode='Markdown'
-                )
-                
-                # Get first riddle
-                first_riddle = self.agent.get_next_hint()
-                await update.effective_message.reply_text(
-                    f"Here's your first riddle:\n\n{first_riddle}",
-                    parse_mode='Markdown'
-                )
-                
-        except Exception as e:
-            print(f"Error starting game: {e}")
-            await update.effective_message.reply_text(
-                "🤔 I encountered an issue while setting up the game. Let me try again...",
-                parse_mode='Markdown'
-            )
+        # Reply when done, without holding up this update
+        async def profile_and_report() -> None:
+            result = await profiler.run(seconds)
+            if result is None:
+                self.outbox.send(chat_id, "A profile is already running.", parse_mode=None)
+                return
+            lines = [f"{result.samples} stack samples in {result.folded_path}", "", "handler: calls, wall s, cpu s"]
+            lines += [
+                f"{timing.name}: {timing.calls}, {timing.wall:.3f}, {timing.cpu:.3f}"
+                for timing in result.timings[:15]
+            ]
+            self.outbox.send(chat_id, "\n".join(lines), parse_mode=None)
+        
+        self.outbox.send(chat_id, f"Profiling for {seconds:g} s...", parse_mode=None)
+        asyncio.create_task(profile_and_report())
     
+    @instrument("bot.handle_message")
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle text messages"""
         if not update.effective_chat or not update.effective_message:
             return
             
+        chat_id = update.effective_chat.id
         user_id = update.effective_user.id if update.effective_user else 0
+        name = update.effective_user.first_name if update.effective_user else ""
         message_text = update.effective_message.text
         
         print(f"Received message: {message_text}")
         
-        # Check user session
-        session = self.game_manager.get_session(user_id)
-        
-        if session.state == GameState.NOT_STARTED:
-            await update.effective_message.reply_text(
-                WELCOME_MESSAGE,
-                parse_mode='Markdown'
-            )
-            return
-            
-        # Check cooldown
-        if session.state == GameState.COOLDOWN:
-            _, remaining_time = self.game_manager.check_cooldown(user_id)
-            await update.effective_message.reply_text(
-                COOLDOWN_MESSAGE.format(cooldown=remaining_time),
-                parse_mode='Markdown'
-            )
+        if update.effective_chat.type in (Chat.GROUP, Chat.SUPERGROUP):
+            self._send(chat_id, await self.engine.group_guess(chat_id, user_id, message_text, name))
             return
-            
-        # Handle wallet address input
-        if session.state == GameState.WAITING_FOR_WALLET:
-            if not message_text.startswith('0x'):
-                await update.effective_message.reply_text(
-                    INVALID_WALLET_MESSAGE,
-                    parse_mode='Markdown'
-                )
-                return
-                
-            try:
-                response = await self.agent.process_message(
-                    f"send_reward_to_wallet {message_text}",
-                    attempts_left=0
-                )
-                await update.effective_message.reply_text(
-                    REWARD_SENT_MESSAGE.format(wallet_address=message_text),
-                    parse_mode='Markdown'
-                )
-                self.game_manager.start_game(user_id)
-                return
-            except Exception as e:
-                print(f"Error processing wallet: {e}")
-                await update.effective_message.reply_text(
-                    "Error processing wallet address. Please try again.",
-                    parse_mode='Markdown'
-                )
-                return
-
-        # Process regular game message
-        attempts_left = self.game_manager.get_attempts_left(user_id)
         
-        # Process the guess
-        response = await self.agent.process_message(message_text, attempts_left)
-        print(f"Agent response: {response}")
-        
-        # Handle victory
-        if "[VICTORY]" in response:
-            try:
-                with open(self.image_dir / "SadSphinx.png", "rb") as photo:
-                    await context.bot.send_photo(
-                        chat_id=update.effective_chat.id,
-                        photo=photo,
-                        caption=VICTORY_MESSAGE,
-                        parse_mode='Markdown'
-                    )
-                self.game_manager.set_waiting_for_wallet(user_id)
-            except Exception as e:
-                print(f"Error sending victory image: {e}")
-                await update.effective_message.reply_text(
-                    VICTORY_MESSAGE,
-                    parse_mode='Markdown'
-                )
-                
-        # Handle wrong answer
-        elif "[WRONG]" in response:
-            has_attempts, attempts_left = self.game_manager.use_attempt(user_id)
-            if has_attempts:
-                try:
-                    # 틀린 횟수에 따라 다른 이미지 사용
-                    image_file = "SuperHappySphinx2.png" if attempts_left == 1 else "SuperHappySphinx.png"
-                    
-                    with open(self.image_dir / image_file, "rb") as photo:
-                        await context.bot.send_photo(
-                            chat_id=update.effective_chat.id,
-                            photo=photo,
-                            caption=response,
-                            parse_mode='Markdown'
-                        )
-                except Exception as e:
-                    print(f"Error sending wrong answer image: {e}")
-                    await update.effective_message.reply_text(
-                        response,
-                        parse_mode='Markdown'
-                    )
-            else:
-                # No attempts left - handle defeat
-                try:
-                    # 모든 시도를 소진했을 때는 SuperSuperHappySphinx.png 사용
-                    with open(self.image_dir / "SuperSuperHappySphinx.png", "rb") as photo:
-                        await context.bot.send_photo(
-                            chat_id=update.effective_chat.id,
-                            photo=photo,
-                            caption=DEFEAT_MESSAGE.format(
-                                coin_name=self.game_manager.get_current_coin(user_id),
-                                cooldown=config.COOLDOWN_SECONDS
-                            ),
-                            parse_mode='Markdown'
-                        )
-                    self.game_manager.set_cooldown(user_id, config.COOLDOWN_SECONDS)
-                except Exception as e:
-                    print(f"Error sending defeat image: {e}")
-                    await update.effective_message.reply_text(
-                        DEFEAT_MESSAGE.format(
-                            coin_name=self.game_manager.get_current_coin(user_id),
-                            cooldown=config.COOLDOWN_SECONDS
-                        ),
-                        parse_mode='Markdown'
-                    )
-        
-        # Handle defeat
-        elif "[DEFEAT]" in response:
-            try:
-                with open(self.image_dir / "SuperHappySphinx.png", "rb") as photo:
-                    await context.bot.send_photo(
-                        chat_id=update.effective_chat.id,
-                        photo=photo,
-                        caption=response,
-                        parse_mode='Markdown'
-                    )
-                self.game_manager.set_cooldown(user_id, config.COOLDOWN_SECONDS)
-            except Exception as e:
-                print(f"Error sending defeat image: {e}")
-                await update.effective_message.reply_text(
-                    response,
-                    parse_mode='Markdown'
-                )
-                
-        # Regular response
-        else:
-            await update.effective_message.reply_text(
-                response,
-                parse_mode='Markdown'
-            )
\ No newline at end of file
+        self._send(chat_id, await self.engine.guess(user_id, chat_id, message_text, name))
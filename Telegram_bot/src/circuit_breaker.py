@@ -0,0 +1,84 @@
+import logging
+from enum import Enum
+from time import monotonic
+from typing import Callable
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Stops calling a dependency after consecutive failed or slow calls"""
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        slow_call_seconds: float,
+        clock: Callable[[], float] = monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._clock = clock
+
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may use the dependency right now"""
+        if self.state == BreakerState.CLOSED:
+            return True
+
+        if self.state == BreakerState.OPEN:
+            if self._clock() - self.opened_at < self.reset_timeout:
+                return False
+            # Cool-off elapsed: let a single probe through
+            self.state = BreakerState.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, elapsed: float) -> None:
+        """Record a finished call; calls slower than the threshold count as failures"""
+        if elapsed >= self.slow_call_seconds:
+            logger.warning(f"Slow call took {elapsed:.2f}s (threshold {self.slow_call_seconds}s)")
+            self.record_failure()
+            return
+
+        if self.state != BreakerState.CLOSED:
+            logger.info("Circuit breaker closed")
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call and open the breaker once the threshold is reached"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if self.state == BreakerState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != BreakerState.OPEN:
+                self.trips += 1
+                logger.warning(
+                    f"Circuit breaker opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = BreakerState.OPEN
+            self.opened_at = self._clock()
+
+    def get_stats(self) -> dict:
+        """Get the current breaker state"""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+        }
@@ -0,0 +1,48 @@
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence
+
+LENGTH = struct.Struct("<Q")
+
+def copy_columns(owner, names: Sequence[str]) -> List[array]:
+    """Copy the named columns and the owner's UserIndex tables, in snapshot order
+
+    Copying an array is a memcpy, so this runs on the event loop and only the
+    write goes to a thread.
+    """
+    columns = [getattr(owner, name) for name in names] + [owner.index.keys, owner.index.rows]
+    return [array(column.typecode, column) for column in columns]
+
+def read_columns(f: BinaryIO, owner, names: Sequence[str], rows: int) -> None:
+    """Load columns written from copy_columns into the owner, index included"""
+    for name in (*names, "index.keys", "index.rows"):
+        target, attr = (owner.index, name[6:]) if name.startswith("index.") else (owner, name)
+        column = array(getattr(target, attr).typecode)
+        (length,) = LENGTH.unpack(f.read(LENGTH.size))
+        column.frombytes(f.read(length))
+        setattr(target, attr, column)
+    owner.index.capacity = len(owner.index.keys)
+    owner.index.mask = owner.index.capacity - 1
+    owner.index.size = rows
+
+def read_blob(f: BinaryIO) -> bytes:
+    (length,) = LENGTH.unpack(f.read(LENGTH.size))
+    return f.read(length)
+
+def write_columns(path: Path, header: bytes, columns: List[array], blob: Optional[bytes] = None) -> None:
+    """Write header, columns and an optional trailing blob to a temporary file, then swap it in"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for column in columns:
+            f.write(LENGTH.pack(column.itemsize * len(column)))
+            column.tofile(f)
+        if blob is not None:
+            f.write(LENGTH.pack(len(blob)))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -10,6 +10,7 @@ load_dotenv()
 class Config:
     # Bot and API tokens
     TELEGRAM_TOKEN: str = os.getenv("TELEGRAM_TOKEN", "")
+    TELEGRAM_BASE_URL: str = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     
     # Path configurations
@@ -19,11 +20,124 @@ class Config:
     # Game configurations
     MAX_HINTS: int = 3
     COOLDOWN_SECONDS: int = 30
+    GROUP_GUESSES_PER_PLAYER: int = int(os.getenv("GROUP_GUESSES_PER_PLAYER", "3"))
+    GROUP_WRONG_GUESSES_PER_HINT: int = int(os.getenv("GROUP_WRONG_GUESSES_PER_HINT", "5"))
+    GROUP_ROUND_SECONDS: float = float(os.getenv("GROUP_ROUND_SECONDS", "600"))  # /start replaces older rounds
+    GROUP_CLAIM_SECONDS: float = float(os.getenv("GROUP_CLAIM_SECONDS", "86400"))  # winners post a wallet within this
+    COOLDOWN_NOTIFY: bool = os.getenv("COOLDOWN_NOTIFY", "true").lower() == "true"
+    COOLDOWN_NOTIFY_RATE: int = int(os.getenv("COOLDOWN_NOTIFY_RATE", "20"))  # messages per second
     
     # Agent configurations
     MODEL_NAME: str = "gpt-4"
     TEMPERATURE: float = 0.7
     
+    # When to build the agent: "background" (right after startup, off the event loop),
+    # "lazy" (on the first update that needs it) or "eager" (before polling starts)
+    AGENT_STARTUP: str = os.getenv("AGENT_STARTUP", "background")
+    
+    # LLM resilience configurations
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+    LLM_SLOW_CALL_SECONDS: float = float(os.getenv("LLM_SLOW_CALL_SECONDS", "5"))
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+    BREAKER_RESET_SECONDS: float = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    FLAVOUR_MAX_TOKENS: int = int(os.getenv("FLAVOUR_MAX_TOKENS", "60"))
+    
+    # Reward payout configurations (payouts are disabled unless all three are set)
+    TOKEN_MANAGER_ADDRESS: str = os.getenv("TOKEN_MANAGER_ADDRESS", "")
+    RPC_URL: str = os.getenv("RPC_URL", "")
+    PAYOUT_PRIVATE_KEY: str = os.getenv("PAYOUT_PRIVATE_KEY", "")
+    PAYOUT_SENDER_KEYS: str = os.getenv("PAYOUT_SENDER_KEYS", "")  # comma-separated extra hot wallets
+    SENDER_MIN_GAS_BALANCE: int = int(os.getenv("SENDER_MIN_GAS_BALANCE", str(10**16)))
+    SENDER_MAX_IN_FLIGHT: int = int(os.getenv("SENDER_MAX_IN_FLIGHT", "16"))
+    SENDER_HEALTH_INTERVAL: float = float(os.getenv("SENDER_HEALTH_INTERVAL", "60"))
+    PAYOUT_HOLD_RETRY_SECONDS: float = float(os.getenv("PAYOUT_HOLD_RETRY_SECONDS", "300"))
+    PAYOUT_RECONCILE_SECONDS: float = float(os.getenv("PAYOUT_RECONCILE_SECONDS", "60"))
+    REWARD_SYMBOL_PREFIX: str = os.getenv("REWARD_SYMBOL_PREFIX", "t")
+    TOKEN_OPS_DIR: Path = BASE_DIR.parent / "memeshpinx-hardhat" / "util" / "python"
+    DATA_DIR: Path = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))
+    PAYOUT_JOURNAL_PATH: Path = DATA_DIR / "payouts.db"
+    SESSION_SNAPSHOT_PATH: Path = DATA_DIR / "sessions.snap"
+    SESSION_SNAPSHOT_INTERVAL: float = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "10"))
+    STATS_SNAPSHOT_PATH: Path = DATA_DIR / "stats.snap"
+    GROUP_CLAIMS_PATH: Path = DATA_DIR / "group_claims.json"
+    # Game event log for offline analysis; empty disables it
+    EVENT_LOG_DIR: str = os.getenv("EVENT_LOG_DIR", str(DATA_DIR / "events"))
+    EVENT_FLUSH_INTERVAL: float = float(os.getenv("EVENT_FLUSH_INTERVAL", "1"))
+    EVENT_SEGMENT_MB: int = int(os.getenv("EVENT_SEGMENT_MB", "64"))
+    EVENT_SEGMENT_SECONDS: float = float(os.getenv("EVENT_SEGMENT_SECONDS", "3600"))
+    LEADERBOARD_SIZE: int = int(os.getenv("LEADERBOARD_SIZE", "10"))
+    BOARD_PATH: Path = DATA_DIR / "board.json"  # a shard's top players, read by its peers
+    # Daily challenge: days precomputed by make_daily_schedule.py, progress kept per player
+    DAILY_SCHEDULE_PATH: Path = Path(os.getenv("DAILY_SCHEDULE_PATH", str(DATA_DIR / "daily_schedule.json")))
+    DAILY_PROGRESS_PATH: Path = DATA_DIR / "daily.snap"
+    DAILY_ATTEMPTS: int = int(os.getenv("DAILY_ATTEMPTS", "3"))
+    DAILY_SEED: str = os.getenv("DAILY_SEED", "memecoinsphinx")
+    
+    # Outbound message limits (Telegram allows about 30 messages/s overall and 1/s per chat);
+    # the overall rate is the bot's total and is split between the workers
+    OUTBOX_GLOBAL_RATE: float = float(os.getenv("OUTBOX_GLOBAL_RATE", "30"))
+    OUTBOX_CHAT_RATE: float = float(os.getenv("OUTBOX_CHAT_RATE", "1"))
+    OUTBOX_CHAT_BURST: float = float(os.getenv("OUTBOX_CHAT_BURST", "3"))
+    
+    # Traffic recording for replay_traffic.py (empty path disables it)
+    TRAFFIC_RECORD_PATH: str = os.getenv("TRAFFIC_RECORD_PATH", "")
+    TRAFFIC_RECORD_SALT: str = os.getenv("TRAFFIC_RECORD_SALT", "")  # random per run if unset
+    
+    # Multi-process runtime (1 runs a single process; more starts a supervisor with N workers)
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "1"))
+    WORKER_HEALTH_INTERVAL: float = float(os.getenv("WORKER_HEALTH_INTERVAL", "5"))
+    WORKER_HEARTBEAT_TIMEOUT: float = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "60"))
+    WORKER_STOP_TIMEOUT: float = float(os.getenv("WORKER_STOP_TIMEOUT", "30"))
+    SHARD_INDEX: int = 0  # set by use_shard() inside each worker or engine process
+    SHARD_COUNT: int = 1
+    
+    # Game engine service: empty runs the engine inside the bot; otherwise the bot calls
+    # these comma-separated engine_server URLs, each serving its own share of the players
+    ENGINE_URL: str = os.getenv("ENGINE_URL", "")
+    ENGINE_HOST: str = os.getenv("ENGINE_HOST", "127.0.0.1")
+    ENGINE_PORT: int = int(os.getenv("ENGINE_PORT", "8700"))
+    ENGINE_POOL_SIZE: int = int(os.getenv("ENGINE_POOL_SIZE", "32"))  # keep-alive connections per URL
+    ENGINE_TIMEOUT: float = float(os.getenv("ENGINE_TIMEOUT", "30"))
+    # Which of the ENGINE_URL engines this engine_server is; engine i serves the i-th URL
+    ENGINE_INDEX: int = int(os.getenv("ENGINE_INDEX", "0"))
+    ENGINE_COUNT: int = int(os.getenv("ENGINE_COUNT", "1"))
+    # Names this front-end to the engines, which send its chats' notifications only to it
+    ENGINE_FRONTEND: str = os.getenv("ENGINE_FRONTEND", "telegram")
+    # Shared by the bot and every engine_server; engines refuse /v1 calls without it
+    ENGINE_SECRET: str = os.getenv("ENGINE_SECRET", "")
+    
+    # Metrics configurations (0 disables the /metrics endpoint)
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+    
+    # On-demand profiling: SIGUSR1 or /profile [seconds] from an admin writes folded stacks
+    ADMIN_USER_IDS: frozenset = frozenset(
+        int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()
+    )
+    PROFILE_DIR: Path = DATA_DIR / "profiles"
+    PROFILE_SECONDS: float = float(os.getenv("PROFILE_SECONDS", "30"))
+    PROFILE_SAMPLE_INTERVAL: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    # Time instrumented handlers all the time (handler_*_seconds metrics), not just while profiling
+    PROFILE_TIMING: bool = os.getenv("PROFILE_TIMING", "false").lower() == "true"
+    
+    def shard_dir(self, shard: int) -> Path:
+        return self.DATA_DIR / f"shard-{shard}"
+    
+    def use_shard(self, shard: int, shards: int) -> None:
+        """Give this process one shard's state files, its slice of the payout senders and of the global send rate"""
+        shard_dir = self.shard_dir(shard)
+        self.SHARD_INDEX = shard
+        self.SHARD_COUNT = shards
+        # Every worker talks to Telegram with the same token, so they share its global limit
+        self.OUTBOX_GLOBAL_RATE = type(self).OUTBOX_GLOBAL_RATE / shards
+        self.PAYOUT_JOURNAL_PATH = shard_dir / "payouts.db"
+        self.SESSION_SNAPSHOT_PATH = shard_dir / "sessions.snap"
+        self.STATS_SNAPSHOT_PATH = shard_dir / "stats.snap"
+        self.DAILY_PROGRESS_PATH = shard_dir / "daily.snap"
+        self.GROUP_CLAIMS_PATH = shard_dir / "group_claims.json"
+        self.BOARD_PATH = shard_dir / "board.json"
+        if self.EVENT_LOG_DIR:
+            self.EVENT_LOG_DIR = str(shard_dir / "events")
+    
     @classmethod
     def validate(cls) -> None:
         """Validate that all required environment variables are set."""
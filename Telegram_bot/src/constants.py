@@ -13,6 +13,8 @@ WELCOME_MESSAGE = """
 I am the guardian of crypto mysteries and keeper of meme wisdom. Dare you challenge my riddles?
 
 Type /start to begin your trial...if you dare! 
+Everyone faces the same riddle in the /daily challenge.
+See your record with /stats and the greatest challengers with /leaderboard; /hint repeats your riddle.
 """
 
 GAME_RULES = """
@@ -34,6 +36,11 @@ The ancient laws decree you must wait {cooldown} more seconds before attempting
 Patience is a virtue, even for those who fail... 😏
 """
 
+COOLDOWN_OVER_MESSAGE = """
+🔮 The Sphinx awaits, mortal...
+Your penance is over. Use /start to face a new riddle!
+"""
+
 VICTORY_MESSAGE = """
 😿 *IMPOSSIBLE!* You've solved my riddle, clever mortal!
 
@@ -49,6 +56,7 @@ Wait {cooldown} seconds before you dare challenge me again!
 
 INVALID_WALLET_MESSAGE = """
 🤨 That doesn't look like a valid EVM wallet address, mortal.
+{reason}.
 Please provide a valid address starting with '0x'...
 """
 
@@ -57,4 +65,125 @@ REWARD_SENT_MESSAGE = """
 Your reward has been sent to {wallet_address}.
 
 Return anytime for another challenge!
-"""
\ No newline at end of file
+"""
+
+REWARD_QUEUED_MESSAGE = """
+✨ The ancient contract has been sealed!
+Your {symbol} reward for {wallet_address} is on its way.
+
+Status: *{status}* (ref `{payout_id}`)
+I shall tell you when it lands. Return anytime for another challenge!
+"""
+
+REWARD_STATUS_MESSAGE = """
+🔗 Reward `{payout_id}`: *{status}*
+{details}
+"""
+GROUP_ROUND_STARTED_MESSAGE = """
+🏛️ *A riddle for the whole chat!*
+The first mortal to name the meme coin wins. Each of you may guess {guesses} times - one word per guess.
+
+Your first riddle:
+{hint}
+"""
+
+GROUP_ROUND_RUNNING_MESSAGE = """
+🏛️ A riddle is already before you, mortals!
+The latest hint: {hint}
+"""
+
+GROUP_HINT_MESSAGE = """
+🔮 So many wrong guesses... Here's another hint:
+{hint}
+"""
+
+GROUP_VICTORY_MESSAGE = """
+😿 *IMPOSSIBLE!* {name} has solved my riddle - the coin was *{coin_name}*!
+
+{name}, send your EVM wallet address here to claim your reward.
+"""
+
+GROUP_DEFEAT_MESSAGE = """
+😸 *HAHAHAHA!* Not one of you could solve it!
+The meme coin I spoke of was *{coin_name}*. Use /start for another round.
+"""
+
+STATS_MESSAGE = """
+📜 *Your record before the Sphinx*
+Wins: {wins}   Losses: {losses}
+Current streak: {streak}   Best streak: {best_streak}
+Rewards received: {rewards} ({reward_tokens:g} tokens)
+Leaderboard rank: {rank}
+"""
+
+NO_STATS_MESSAGE = """
+📜 You have yet to face the Sphinx. Use /start to begin!
+"""
+
+LEADERBOARD_MESSAGE = """
+🏆 *Those who outwitted the Sphinx*
+{rows}
+"""
+
+LEADERBOARD_ROW = "{rank}. {name} - {wins} wins (best streak {best_streak})"
+
+EMPTY_LEADERBOARD_MESSAGE = """
+🏆 No mortal has solved my riddles yet. Will you be the first? Use /start!
+"""
+
+CURRENT_RIDDLE_MESSAGE = """
+🔮 Your riddle, mortal:
+{hint}
+
+Attempts left: {attempts_left}
+"""
+
+NOTHING_TO_CLAIM_MESSAGE = """
+🤔 There is no reward waiting for you yet, mortal. Solve a riddle first!
+"""
+
+CHATTER_MESSAGE = """
+🔮 The Sphinx is listening, mortal... Name the meme coin to guess, or ask for a /hint.
+Attempts left: {attempts_left}
+"""
+
+DAILY_STARTED_MESSAGE = """
+📅 *The daily challenge for {day}*
+Every mortal faces the same riddle today, and you have {attempts} attempts.
+
+Your first riddle:
+{hint}
+"""
+
+DAILY_RUNNING_MESSAGE = """
+📅 *The daily challenge for {day}*
+Your riddle:
+{hint}
+
+Attempts left: {attempts_left}
+"""
+
+DAILY_WRONG_MESSAGE = "{opener} You have {attempts_left} attempts left. Here's another hint: {hint}"
+
+DAILY_VICTORY_MESSAGE = """
+{opener}
+
+Today's coin was *{coin_name}*. Send me your EVM wallet address to claim your reward.
+"""
+
+DAILY_DEFEAT_MESSAGE = """
+{opener} Today's coin was *{coin_name}*.
+A new daily challenge comes at midnight UTC.
+"""
+
+DAILY_CLAIM_MESSAGE = """
+💰 You solved a daily challenge! Send me your EVM wallet address to claim your reward.
+"""
+
+DAILY_DONE_MESSAGE = """
+📅 You have already faced today's challenge. The next one comes in {hours}h {minutes}m.
+"""
+
+DAILY_PRIVATE_MESSAGE = """
+📅 The daily challenge is played in private - message me directly!
+"""
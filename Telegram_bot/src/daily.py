@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import logging
+import struct
+import threading
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .columnar import copy_columns, read_columns, write_columns
+from .constants import DAILY_DEFEAT_MESSAGE, DAILY_VICTORY_MESSAGE, DAILY_WRONG_MESSAGE
+from .fallback import OPENERS
+from .session_store import UserIndex
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+HEADER = struct.Struct("<4sHQ")  # magic, version, rows
+
+EPOCH = date(2024, 1, 1)  # the coin sequence starts here
+
+# Progress states; a player's row counts only on the day it was written, except an
+# unclaimed win, which stays until the player claims it
+NEW, PLAYING, WON, LOST, CLAIMED = range(5)
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def seconds_to_rollover() -> int:
+    now = datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    return int((midnight - now).total_seconds())
+
+def pick_coin(day: date, coins: List[str], seed: str) -> str:
+    """The day's coin, the same in every process and never the previous day's
+
+    Each day steps 1..n-1 places from the day before, by a seeded hash, counting
+    from EPOCH; a few thousand hashes, once per day.
+    """
+    def draw(for_day: date) -> int:
+        digest = hashlib.sha256(f"{seed}:{for_day.isoformat()}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    ordered = sorted(coins)
+    if len(ordered) == 1 or day <= EPOCH:
+        return ordered[draw(day) % len(ordered)]
+    index = draw(EPOCH) % len(ordered)
+    for ordinal in range(EPOCH.toordinal() + 1, day.toordinal() + 1):
+        index = (index + 1 + draw(date.fromordinal(ordinal)) % (len(ordered) - 1)) % len(ordered)
+    return ordered[index]
+
+def plan_day(day: date, coins: Dict[str, dict], seed: str, openers: Optional[Dict[str, List[str]]] = None) -> dict:
+    """One schedule entry: the coin, its hints in order and the Sphinx's opening lines"""
+    coin = pick_coin(day, list(coins), seed)
+    return {
+        "coin": coin,
+        "hints": list(coins[coin]["hints"]),
+        "openers": openers or {tag: list(lines) for tag, lines in OPENERS.items()},
+    }
+
+@dataclass
+class DailyChallenge:
+    """One day's riddle with every reply already rendered; shared by all players that day"""
+    day: date
+    coin: str
+    hints: List[str]
+    attempts: int
+    victory: List[str] = field(default_factory=list)
+    wrong: List[List[str]] = field(default_factory=list)  # by wrong guesses made so far
+    defeat: List[str] = field(default_factory=list)
+
+    @property
+    def game_id(self) -> int:
+        """One game, and so one payout, per player per day"""
+        return self.day.toordinal()
+
+    @classmethod
+    def render(cls, day: date, entry: dict, attempts: int) -> "DailyChallenge":
+        hints = entry["hints"] or ["Look closely at the meme coins you know"]
+        openers = entry["openers"]
+        challenge = cls(day, entry["coin"], hints, attempts)
+        challenge.victory = [
+            DAILY_VICTORY_MESSAGE.format(opener=opener, coin_name=challenge.coin) for opener in openers["VICTORY"]
+        ]
+        challenge.wrong = [
+            [
+                DAILY_WRONG_MESSAGE.format(
+                    opener=opener, attempts_left=attempts - made, hint=challenge.hint(made)
+                )
+                for opener in openers["WRONG"]
+            ]
+            for made in range(1, attempts)
+        ]
+        challenge.defeat = [
+            DAILY_DEFEAT_MESSAGE.format(opener=opener, coin_name=challenge.coin) for opener in openers["DEFEAT"]
+        ]
+        return challenge
+
+    def hint(self, shown_before: int) -> str:
+        """The riddle shown after this many earlier ones; the last repeats once they run out"""
+        return self.hints[min(shown_before, len(self.hints) - 1)]
+
+    def is_answer(self, guess: str) -> bool:
+        return guess.strip().upper() == self.coin.upper()
+
+class DailySchedule:
+    """The precomputed daily challenges, with only today's held in memory
+
+    make_daily_schedule.py writes days ahead of time into a JSON file. At the first
+    call after UTC midnight the file is read again and the day's entry rendered; a
+    day missing from the file is planned from the built-in coins with the same seed.
+    Both read files, so the event loop calls today() through a thread and uses
+    current() for the rest of the day.
+    """
+    def __init__(self, path: Optional[Path], attempts: int = 3, seed: str = "memecoinsphinx"):
+        self.path = Path(path) if path else None
+        self.attempts = attempts
+        self.seed = seed
+        self._today: Optional[DailyChallenge] = None
+        self._coins: Dict[int, str] = {}  # earlier days' coins, for late claims
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[DailyChallenge]:
+        """Today's challenge if it is already rendered, without touching the disk"""
+        challenge = self._today
+        return challenge if challenge is not None and challenge.day == utc_today() else None
+
+    def today(self) -> DailyChallenge:
+        with self._lock:
+            day = utc_today()
+            if self._today is None or self._today.day != day:
+                self._today = DailyChallenge.render(day, self._entry(day), self.attempts)
+                logger.info(f"Loaded the daily challenge for {day.isoformat()}")
+            return self._today
+
+    def coin_for(self, day: date) -> str:
+        """The coin of any day; reads the schedule for days other than today"""
+        challenge = self._today
+        if challenge is not None and challenge.day == day:
+            return challenge.coin
+        with self._lock:
+            coin = self._coins.get(day.toordinal())
+            if coin is None:
+                coin = self._coins[day.toordinal()] = self._entry(day)["coin"]
+            return coin
+
+    def _entry(self, day: date) -> dict:
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    entry = json.load(f).get("days", {}).get(day.isoformat())
+                if entry:
+                    return entry
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading daily schedule {self.path}: {e}")
+        logger.warning(f"No scheduled challenge for {day.isoformat()}; planning one now")
+        from .tools import MemeDatabase
+        return plan_day(day, MemeDatabase().meme_coins, self.seed)
+
+class DailyProgress:
+    """Each player's progress in the daily challenge, in typed columns like PlayerStats
+
+    A row is only valid on the day stored with it, so rollover resets every player
+    without touching their rows. A win not yet claimed is the exception: the row keeps
+    its day, which is the game id of the payout, until the claim. active marks players
+    whose messages go to the daily challenge rather than their regular game.
+    """
+    # Column attributes in the order snapshots write them
+    COLUMNS = ("user_ids", "days", "states", "made", "active", "started")
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.index = UserIndex()
+        self.user_ids = array('q')
+        self.days = array('I')     # date.toordinal() of the row's day
+        self.states = array('B')
+        self.made = array('B')     # wrong guesses made
+        self.active = array('B')
+        self.started = array('d')  # when the player started the day's challenge
+        self.changed = False  # since the last snapshot
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def row(self, user_id: int, day: date) -> int:
+        """Get the player's row, reset to NEW if it belongs to an earlier day and holds no unclaimed win"""
+        row = self.index.get(user_id)
+        if row < 0:
+            row = len(self.user_ids)
+            self.user_ids.append(user_id)
+            for column in (self.days, self.states, self.made, self.active):
+                column.append(0)
+            self.started.append(0.0)
+            self.index.insert(user_id, row)
+        if self.days[row] != day.toordinal() and self.states[row] != WON:
+            self.days[row] = day.toordinal()
+            self.states[row] = NEW
+            self.made[row] = 0
+            self.active[row] = 0
+            self.changed = True
+        return row
+
+    def is_active(self, user_id: int, day: date) -> bool:
+        row = self.index.get(user_id)
+        return row >= 0 and self.active[row] == 1 and (
+            self.days[row] == day.toordinal() or self.states[row] == WON
+        )
+
+    def deactivate(self, user_id: int) -> None:
+        row = self.index.get(user_id)
+        if row >= 0 and self.active[row]:
+            self.active[row] = 0
+            self.changed = True
+
+    def restore(self) -> int:
+        """Load the last snapshot, if any; returns the number of players restored"""
+        if self.path is None or not self.path.exists():
+            return 0
+
+        with open(self.path, "rb") as f:
+            magic, version, rows = HEADER.unpack(f.read(HEADER.size))
+            if magic != b"SPXD" or version != VERSION:
+                logger.warning(f"Ignoring daily progress snapshot with unknown format: {self.path}")
+                return 0
+            read_columns(f, self, self.COLUMNS, rows)
+
+        self.changed = False
+        logger.info(f"Restored daily progress of {rows} players")
+        return rows
+
+    async def save(self) -> None:
+        """Write a snapshot if anything changed since the last one"""
+        if self.path is None or not self.changed:
+            return
+        async with self._lock:
+            self.changed = False
+            header = HEADER.pack(b"SPXD", VERSION, len(self))
+            columns = copy_columns(self, self.COLUMNS)
+            try:
+                await asyncio.to_thread(write_columns, self.path, header, columns)
+            except Exception:
+                self.changed = True
+                raise
@@ -0,0 +1,690 @@
+import asyncio
+import heapq
+import json
+import os
+import random
+import re
+from collections import deque
+from datetime import date
+from itertools import islice
+from time import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional
+
+from .config import config
+from .constants import *
+from .daily import (
+    CLAIMED, LOST, NEW, PLAYING, WON, DailyChallenge, DailyProgress, DailySchedule, seconds_to_rollover, utc_today
+)
+from .events import MAX_TEXT, EventLog
+from .fallback import NO_MORE_HINTS
+from .game_manager import GameManager
+from .group_rounds import GroupRoundManager
+from .intent import Intent, classify
+from .metrics import metrics
+from .payout import PayoutService, PayoutStatus, PayoutTicket, load_token_operations
+from .player_stats import LeaderboardEntry, PlayerStats
+from .profiling import instrument
+from .session_snapshot import SessionSnapshotter
+from .tools import meme_db
+from .wallet import validate_wallet_address
+
+if TYPE_CHECKING:
+    from .agent import SphinxAgent
+
+MAX_NOTIFICATIONS = 100  # per next_notifications() call
+MARKDOWN_SPECIALS = re.compile(r"([_*`\[])")  # what Telegram's legacy Markdown treats as markup
+
+async def next_batch(queue: asyncio.Queue, timeout: float) -> List["Reply"]:
+    """Wait up to timeout for a queued reply; returns it with all queued after it, up to a limit"""
+    try:
+        first = await asyncio.wait_for(queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return []
+    replies = [first]
+    while len(replies) < MAX_NOTIFICATIONS and not queue.empty():
+        replies.append(queue.get_nowait())
+    return replies
+
+@dataclass
+class Reply:
+    """One message for a front-end to show; text is Markdown unless parse_mode says otherwise"""
+    text: str
+    kind: str = "message"  # what happened, for front-ends that render their own wording
+    image: str = ""        # file name in IMAGE_DIR, shown with the text as its caption
+    priority: str = "game"  # "result", "game" or "chatter"
+    parse_mode: Optional[str] = "Markdown"
+    chat_id: int = 0       # set on notifications, which are not answers to a request
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Reply":
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if name in data})
+
+def escape_markdown(text: str) -> str:
+    """Escape player-chosen text (names) for a Markdown reply, as telegram.helpers does"""
+    return MARKDOWN_SPECIALS.sub(r"\\\1", text)
+
+def _write_json(path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class GameEngine:
+    """The game itself, independent of any chat front-end
+
+    Owns the sessions, the agent, group rounds, stats, payouts and the event log, and
+    answers start/guess/hint/claim calls with Replies. The Telegram bot uses it in
+    process; engine_server.py serves the same calls over HTTP to any front-end.
+    Messages that are not answers (cooldown over, payout progress) are queued and
+    handed out by next_notifications().
+
+    When players are sharded (SHARD_COUNT > 1), a player's stats live on their own
+    shard: outcomes of group games played elsewhere go through forward_stat, and
+    rankings merge this shard's board with the peers' from peer_boards.
+    """
+    def __init__(self, agent: Optional["SphinxAgent"] = None):
+        # Game events for offline analysis; emitting never waits on the disk
+        self.events = None
+        if config.EVENT_LOG_DIR:
+            self.events = EventLog(
+                config.EVENT_LOG_DIR,
+                flush_interval=config.EVENT_FLUSH_INTERVAL,
+                segment_bytes=config.EVENT_SEGMENT_MB * 2**20,
+                segment_seconds=config.EVENT_SEGMENT_SECONDS
+            )
+        event_sink = self.events.emit if self.events else None
+        self.game_manager = GameManager(event_sink)
+        self.group_rounds = GroupRoundManager(
+            guesses_per_player=config.GROUP_GUESSES_PER_PLAYER,
+            wrong_per_hint=config.GROUP_WRONG_GUESSES_PER_HINT,
+            round_seconds=config.GROUP_ROUND_SECONDS,
+            claim_seconds=config.GROUP_CLAIM_SECONDS,
+            path=config.GROUP_CLAIMS_PATH
+        )
+        self.snapshots = SessionSnapshotter(self.game_manager.sessions, config.SESSION_SNAPSHOT_PATH)
+        self.stats = PlayerStats(config.STATS_SNAPSHOT_PATH)
+        self.daily_schedule = DailySchedule(config.DAILY_SCHEDULE_PATH, config.DAILY_ATTEMPTS, config.DAILY_SEED)
+        self.daily_progress = DailyProgress(config.DAILY_PROGRESS_PATH)
+        # The agent is built on first use or by the warm-up in start(), unless eager
+        self._agent = agent
+        self._agent_ready: Optional[asyncio.Future] = None
+        self._warm_up_task = None
+        if self._agent is None and config.AGENT_STARTUP == "eager":
+            self._agent = self._build_agent()
+        self.payouts = PayoutService(load_token_operations(event_sink))
+        self.payouts.on_status = self._notify_payout_status
+        self._notifications: asyncio.Queue = asyncio.Queue()
+        # Set by whoever runs the shards: the supervisor or engine_server
+        self.forward_stat: Optional[Callable[[int, str, list], None]] = None
+        self.peer_boards: Optional[Callable[[], Awaitable[List[dict]]]] = None
+        self._cooldown_task = None
+        self._snapshot_task = None
+
+    @staticmethod
+    def _build_agent() -> "SphinxAgent":
+        # langchain and the OpenAI client take over a second to import, so only here
+        from .agent import SphinxAgent
+        return SphinxAgent()
+
+    async def get_agent(self) -> "SphinxAgent":
+        """Get the agent, building it off the event loop if the warm-up has not finished"""
+        if self._agent is None:
+            if self._agent_ready is None:
+                self._agent_ready = asyncio.ensure_future(asyncio.to_thread(self._build_agent))
+            try:
+                self._agent = await self._agent_ready
+            except Exception:
+                self._agent_ready = None  # let the next call try again
+                raise
+        return self._agent
+
+    async def start(self) -> None:
+        """Restore state and start background work; call once the event loop is running"""
+        if self.events:
+            self.events.start()
+        if self._agent is None and config.AGENT_STARTUP == "background":
+            self._warm_up_task = asyncio.create_task(self.get_agent())
+
+        # Pick up every game, cooldown and wallet prompt from before the restart
+        self.snapshots.restore()
+        self.game_manager.reschedule_cooldowns()
+        self.stats.restore()
+        await self._publish_board()
+        self.daily_progress.restore()
+        self.group_rounds.restore()
+        await asyncio.to_thread(self.daily_schedule.today)  # reads the schedule off the event loop
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+        await self.payouts.start()
+        self._cooldown_task = asyncio.create_task(self._cooldown_loop())
+
+    async def stop(self) -> None:
+        """Stop background work and save state"""
+        if self._cooldown_task:
+            self._cooldown_task.cancel()
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+        await self.snapshots.save()
+        await self.stats.save()
+        await self.daily_progress.save()
+        await self.group_rounds.save()
+        await self.payouts.stop()
+        if self.events:
+            await asyncio.to_thread(self.events.stop)
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(config.SESSION_SNAPSHOT_INTERVAL)
+            try:
+                await self.snapshots.save()
+                if self.stats.changed:
+                    await self._publish_board()
+                await self.stats.save()
+                await self.daily_progress.save()
+                await self.group_rounds.save()
+            except Exception as e:
+                print(f"Error saving snapshots: {e}")
+
+    def board(self) -> dict:
+        """This shard's top players and win counts, for the peers' rankings"""
+        return self.stats.summary(config.LEADERBOARD_SIZE)
+
+    async def _publish_board(self) -> None:
+        """Write the board where peer shards on this host read it"""
+        if config.SHARD_COUNT > 1:
+            await asyncio.to_thread(_write_json, config.BOARD_PATH, self.board())
+
+    async def _peer_board_list(self) -> List[dict]:
+        if self.peer_boards is None:
+            return []
+        try:
+            return await self.peer_boards()
+        except Exception as e:
+            print(f"Error reading peer leaderboards: {e}")
+            return []
+
+    def _record_stat(self, user_id: int, event: str, *args) -> None:
+        """Count an outcome on the shard that owns the player"""
+        if (self.forward_stat is not None and config.SHARD_COUNT > 1
+                and user_id % config.SHARD_COUNT != config.SHARD_INDEX):
+            self.forward_stat(user_id, event, list(args))
+        else:
+            self.apply_stat(user_id, event, list(args))
+
+    def apply_stat(self, user_id: int, event: str, args: list) -> None:
+        """Count an outcome for a player of this shard, possibly forwarded by a peer"""
+        if event == "win":
+            self.stats.record_win(user_id, *args)
+        elif event == "reward":
+            self.stats.record_reward(user_id, *args)
+        else:
+            raise ValueError(f"Unknown stat event: {event}")
+
+    async def _cooldown_loop(self) -> None:
+        """Release expired cooldowns every tick and tell those players the Sphinx awaits"""
+        waiting: deque = deque()
+        while True:
+            await asyncio.sleep(self.game_manager.cooldowns.tick)
+            released = self.game_manager.expire_cooldowns()
+            if not config.COOLDOWN_NOTIFY:
+                continue
+
+            # Queue at most COOLDOWN_NOTIFY_RATE messages per tick; the rest wait their turn
+            waiting.extend(released)
+            batch = [waiting.popleft() for _ in range(min(len(waiting), config.COOLDOWN_NOTIFY_RATE))]
+            for user_id in batch:
+                self._notify_cooldown_over(user_id)
+
+    def _notify_cooldown_over(self, user_id: int) -> None:
+        # Private chats share the user's id; skip players who already started again
+        if not user_id or self.game_manager.get_session(user_id).state != GameState.NOT_STARTED:
+            return
+        self._notifications.put_nowait(Reply(
+            COOLDOWN_OVER_MESSAGE, kind="cooldown_over", priority="chatter", parse_mode=None, chat_id=user_id
+        ))
+
+    async def _notify_payout_status(self, ticket: PayoutTicket) -> None:
+        """Tell the player how their reward transaction is doing"""
+        if self.events:
+            self.events.emit(
+                "payout_status",
+                payout_id=ticket.payout_id,
+                status=ticket.status.value,
+                amount=str(ticket.amount),
+                tx_hash=ticket.tx_hash,
+                error=ticket.error
+            )
+        if ticket.status == PayoutStatus.CONFIRMED:
+            # Group winners are paid on the group's shard
+            self._record_stat(ticket.user_id, "reward", ticket.amount)
+            text = REWARD_SENT_MESSAGE.format(wallet_address=ticket.wallet_address)
+        elif ticket.status == PayoutStatus.HELD:
+            text = REWARD_STATUS_MESSAGE.format(
+                payout_id=ticket.payout_id,
+                status=ticket.status.value,
+                details="The Sphinx's treasury is being refilled. Your reward will follow shortly."
+            )
+        elif ticket.status == PayoutStatus.BROADCAST:
+            text = REWARD_STATUS_MESSAGE.format(
+                payout_id=ticket.payout_id,
+                status=ticket.status.value,
+                details=f"Transaction: `{ticket.tx_hash}`"
+            )
+        else:
+            text = REWARD_STATUS_MESSAGE.format(
+                payout_id=ticket.payout_id,
+                status=ticket.status.value,
+                details="The Sphinx's treasurers will look into it."
+            )
+        self._notifications.put_nowait(Reply(
+            text, kind=f"payout_{ticket.status.value}", priority="result", chat_id=ticket.chat_id
+        ))
+
+    async def next_notifications(self, timeout: float = 25) -> List[Reply]:
+        """Wait up to timeout for notifications; returns all that are queued, up to a limit"""
+        return await next_batch(self._notifications, timeout)
+
+    async def _queue_payout(self, user_id: int, chat_id: int, game_id: int, wallet_address: str, coin: str) -> Reply:
+        ticket = await self.payouts.enqueue(user_id, chat_id, game_id, wallet_address, coin)
+        if self.events:
+            self.events.emit(
+                "payout_queued",
+                user_id=ticket.user_id,
+                game_id=game_id,
+                payout_id=ticket.payout_id,
+                symbol=ticket.symbol
+            )
+        return Reply(
+            REWARD_QUEUED_MESSAGE.format(
+                symbol=ticket.symbol,
+                wallet_address=wallet_address,
+                status=ticket.status.value,
+                payout_id=ticket.payout_id
+            ),
+            kind="reward_queued",
+            priority="result"
+        )
+
+    @instrument("engine.start")
+    async def start_game(self, user_id: int) -> List[Reply]:
+        """Start a game for a player: the rules and the first riddle, or the cooldown left"""
+        self.daily_progress.deactivate(user_id)
+        success, cooldown = self.game_manager.start_game(user_id)
+        if not success:
+            return [Reply(COOLDOWN_MESSAGE.format(cooldown=cooldown), kind="cooldown", priority="chatter")]
+
+        replies = [Reply(GAME_RULES, kind="rules", image="happySphinx.png")]
+        try:
+            # Start new game; the coin lives in the player's session, not in the agent
+            agent = await self.get_agent()
+            coin, first_riddle = agent.new_game()
+            self.game_manager.set_current_coin(user_id, coin)
+            replies.append(Reply("🎮 Let the game begin! 🎮"))
+            self.game_manager.add_hint(user_id, 0)
+            replies.append(Reply(f"Here's your first riddle:\n\n{first_riddle}", kind="riddle"))
+
+        except Exception as e:
+            print(f"Error starting game: {e}")
+            replies.append(Reply("🤔 I encountered an issue while setting up the game. Let me try again..."))
+        return replies
+
+    @instrument("engine.guess")
+    async def guess(self, user_id: int, chat_id: int, text: str, name: str = "") -> List[Reply]:
+        """Handle a player's message: a guess, or their wallet address after a win"""
+        if self.daily_progress.is_active(user_id, utc_today()):
+            return await self._daily_message(user_id, chat_id, text, name)
+        session = self.game_manager.get_session(user_id)
+
+        if session.state == GameState.NOT_STARTED:
+            return [Reply(WELCOME_MESSAGE, kind="welcome", priority="chatter")]
+
+        # Check cooldown
+        if session.state == GameState.COOLDOWN:
+            _, remaining_time = self.game_manager.check_cooldown(user_id)
+            return [Reply(COOLDOWN_MESSAGE.format(cooldown=remaining_time), kind="cooldown", priority="chatter")]
+
+        # Sort the message locally; only guesses reach the judge and use up an attempt
+        message = classify(text)
+        metrics.inc("message_intents_total", intent=message.intent.value)
+
+        # Handle wallet address input: validated and paid out locally, without the LLM
+        if session.state == GameState.WAITING_FOR_WALLET:
+            return await self.claim(user_id, chat_id, message.value if message.intent == Intent.WALLET else text)
+
+        if message.intent == Intent.HINT:
+            return await self.hint(user_id)
+        if message.intent == Intent.WALLET:
+            return [Reply(NOTHING_TO_CLAIM_MESSAGE, kind="nothing_to_claim", priority="chatter")]
+        if message.intent == Intent.CHATTER:
+            if not message.needs_model:
+                return [Reply(
+                    CHATTER_MESSAGE.format(attempts_left=session.attempts_left),
+                    kind="chatter",
+                    priority="chatter"
+                )]
+            agent = await self.get_agent()
+            return [Reply(await agent.chat(text), kind="chatter", priority="chatter")]
+        guess = message.value
+
+        # Process regular game message
+        attempts_left = self.game_manager.get_attempts_left(user_id)
+
+        # Process the guess
+        agent = await self.get_agent()
+        hints_seen = self.game_manager.get_hints_seen(user_id)
+        response = await agent.process_message(
+            guess, attempts_left, self.game_manager.get_current_coin(user_id), hints_seen
+        )
+        print(f"Agent response: {response}")
+        verdict = next((tag for tag in ("VICTORY", "WRONG", "DEFEAT") if f"[{tag}]" in response), "")
+        if self.events:
+            self.events.emit(
+                "guess",
+                user_id=user_id,
+                game_id=self.game_manager.get_game_id(user_id),
+                coin=self.game_manager.get_current_coin(user_id),
+                hints_seen=hints_seen,
+                guess=guess[:MAX_TEXT],
+                verdict=verdict,
+                attempts_left=attempts_left
+            )
+
+        # Handle victory
+        if verdict == "VICTORY":
+            self.game_manager.set_waiting_for_wallet(user_id)
+            self.stats.record_win(user_id, name)
+            return [Reply(VICTORY_MESSAGE, kind="victory", image="SadSphinx.png", priority="result")]
+
+        # Handle wrong answer
+        if verdict == "WRONG":
+            has_attempts, attempts_left = self.game_manager.use_attempt(user_id)
+            if has_attempts:
+                # The judge showed the coin's next riddle
+                self.game_manager.add_hint(user_id, hints_seen)
+                # 틀린 횟수에 따라 다른 이미지 사용
+                image_file = "SuperHappySphinx2.png" if attempts_left == 1 else "SuperHappySphinx.png"
+                return [Reply(response, kind="wrong", image=image_file)]
+
+            # No attempts left - handle defeat
+            # 모든 시도를 소진했을 때는 SuperSuperHappySphinx.png 사용
+            self.game_manager.set_cooldown(user_id, config.COOLDOWN_SECONDS)
+            self.stats.record_loss(user_id)
+            return [Reply(
+                DEFEAT_MESSAGE.format(
+                    coin_name=self.game_manager.get_current_coin(user_id),
+                    cooldown=config.COOLDOWN_SECONDS
+                ),
+                kind="defeat",
+                image="SuperSuperHappySphinx.png",
+                priority="result"
+            )]
+
+        # Handle defeat
+        if verdict == "DEFEAT":
+            self.game_manager.set_cooldown(user_id, config.COOLDOWN_SECONDS)
+            self.stats.record_loss(user_id)
+            return [Reply(response, kind="defeat", image="SuperHappySphinx.png", priority="result")]
+
+        # Regular response
+        return [Reply(response)]
+
+    async def _daily_challenge(self) -> DailyChallenge:
+        """Today's challenge; the first call of a day reads the schedule in a thread"""
+        return self.daily_schedule.current() or await asyncio.to_thread(self.daily_schedule.today)
+
+    @instrument("engine.daily")
+    async def daily(self, user_id: int) -> List[Reply]:
+        """Start or resume today's shared challenge; the player's messages then go to it"""
+        challenge = await self._daily_challenge()
+        progress = self.daily_progress
+        row = progress.row(user_id, challenge.day)
+        state = progress.states[row]
+        if state in (LOST, CLAIMED):
+            remaining = seconds_to_rollover()
+            return [Reply(
+                DAILY_DONE_MESSAGE.format(hours=remaining // 3600, minutes=remaining % 3600 // 60),
+                kind="daily_done",
+                priority="chatter"
+            )]
+
+        progress.active[row] = 1
+        progress.changed = True
+        if state == WON:
+            return [Reply(DAILY_CLAIM_MESSAGE, kind="daily_claim", priority="chatter")]
+        if state == PLAYING:
+            return await self._daily_message(user_id, 0, "hint", "")
+
+        progress.states[row] = PLAYING
+        progress.started[row] = time()
+        if self.events:
+            self.events.emit("game_started", user_id=user_id, game_id=challenge.game_id)
+        return [Reply(
+            DAILY_STARTED_MESSAGE.format(
+                day=challenge.day.isoformat(), attempts=challenge.attempts, hint=challenge.hint(0)
+            ),
+            kind="daily_riddle",
+            image="happySphinx.png"
+        )]
+
+    async def _daily_message(self, user_id: int, chat_id: int, text: str, name: str) -> List[Reply]:
+        """Judge a message in the daily challenge from the day's prerendered replies; no model calls"""
+        challenge = await self._daily_challenge()
+        progress = self.daily_progress
+        row = progress.row(user_id, challenge.day)
+        message = classify(text)
+        metrics.inc("message_intents_total", intent=message.intent.value)
+
+        if progress.states[row] == WON:
+            if message.intent != Intent.WALLET:
+                return [Reply(DAILY_CLAIM_MESSAGE, kind="daily_claim", priority="chatter")]
+            invalid_reason = validate_wallet_address(message.value)
+            if invalid_reason:
+                return [Reply(INVALID_WALLET_MESSAGE.format(reason=invalid_reason), kind="invalid_wallet")]
+            progress.states[row] = CLAIMED
+            progress.active[row] = 0
+            progress.changed = True
+            # The win may be from an earlier day; its day is the payout's game id
+            game_id = progress.days[row]
+            coin = challenge.coin if game_id == challenge.game_id else await asyncio.to_thread(
+                self.daily_schedule.coin_for, date.fromordinal(game_id)
+            )
+            return [await self._queue_payout(user_id, chat_id, game_id, message.value, coin)]
+        if progress.states[row] != PLAYING:
+            return []
+
+        made = progress.made[row]
+        if message.intent == Intent.HINT:
+            return [Reply(
+                DAILY_RUNNING_MESSAGE.format(
+                    day=challenge.day.isoformat(), hint=challenge.hint(made), attempts_left=challenge.attempts - made
+                ),
+                kind="daily_riddle",
+                priority="chatter"
+            )]
+        if message.intent == Intent.WALLET:
+            return [Reply(NOTHING_TO_CLAIM_MESSAGE, kind="nothing_to_claim", priority="chatter")]
+        if message.intent == Intent.CHATTER:
+            return [Reply(
+                CHATTER_MESSAGE.format(attempts_left=challenge.attempts - made), kind="chatter", priority="chatter"
+            )]
+
+        correct = challenge.is_answer(message.value)
+        if self.events:
+            self.events.emit(
+                "guess",
+                user_id=user_id,
+                game_id=challenge.game_id,
+                coin=challenge.coin,
+                hints_seen=min(made + 1, challenge.attempts),
+                guess=message.value[:MAX_TEXT],
+                verdict="VICTORY" if correct else "DEFEAT" if made + 1 >= challenge.attempts else "WRONG",
+                attempts_left=challenge.attempts - made
+            )
+        if not correct:
+            made += 1
+            progress.made[row] = made
+        finished = correct or made >= challenge.attempts
+        if finished:
+            progress.states[row] = WON if correct else LOST
+            progress.active[row] = 1 if correct else 0  # a winner's next message is their wallet
+            if self.events:
+                self.events.emit(
+                    "game_ended",
+                    user_id=user_id,
+                    game_id=challenge.game_id,
+                    coin=challenge.coin,
+                    outcome="victory" if correct else "defeat",
+                    hints_seen=min(made + 1, challenge.attempts),
+                    duration=time() - progress.started[row]
+                )
+        progress.changed = True
+
+        if correct:
+            self.stats.record_win(user_id, name)
+            return [Reply(random.choice(challenge.victory), kind="victory", image="SadSphinx.png", priority="result")]
+        if finished:
+            self.stats.record_loss(user_id)
+            return [Reply(
+                random.choice(challenge.defeat), kind="defeat", image="SuperSuperHappySphinx.png", priority="result"
+            )]
+        image_file = "SuperHappySphinx2.png" if challenge.attempts - made == 1 else "SuperHappySphinx.png"
+        return [Reply(random.choice(challenge.wrong[made - 1]), kind="wrong", image=image_file)]
+
+    @instrument("engine.hint")
+    async def hint(self, user_id: int) -> List[Reply]:
+        """Repeat the riddle the player is working on"""
+        if self.daily_progress.is_active(user_id, utc_today()):
+            return await self._daily_message(user_id, 0, "hint", "")
+        session = self.game_manager.get_session(user_id)
+        if session.state != GameState.IN_PROGRESS or session.last_hint_index is None:
+            return [Reply(WELCOME_MESSAGE, kind="welcome", priority="chatter")]
+        hint = meme_db.hint(session.current_coin, session.last_hint_index) or NO_MORE_HINTS
+        return [Reply(
+            CURRENT_RIDDLE_MESSAGE.format(hint=hint, attempts_left=session.attempts_left),
+            kind="riddle",
+            priority="chatter"
+        )]
+
+    @instrument("engine.claim")
+    async def claim(self, user_id: int, chat_id: int, wallet_address: str) -> List[Reply]:
+        """Pay a player's reward to a wallet after a win"""
+        if self.daily_progress.is_active(user_id, utc_today()):
+            return await self._daily_message(user_id, chat_id, wallet_address, "")
+        wallet_address = wallet_address.strip()
+        if self.game_manager.get_session(user_id).state != GameState.WAITING_FOR_WALLET:
+            return [Reply(NOTHING_TO_CLAIM_MESSAGE, kind="nothing_to_claim", priority="chatter")]
+        invalid_reason = validate_wallet_address(wallet_address)
+        if invalid_reason:
+            return [Reply(INVALID_WALLET_MESSAGE.format(reason=invalid_reason), kind="invalid_wallet")]
+
+        reply = await self._queue_payout(
+            user_id,
+            chat_id,
+            self.game_manager.get_game_id(user_id),
+            wallet_address,
+            self.game_manager.get_current_coin(user_id)
+        )
+        self.game_manager.start_game(user_id)
+        return [reply]
+
+    async def player_stats(self, user_id: int) -> List[Reply]:
+        record = self.stats.get(user_id)
+        if record is None:
+            return [Reply(NO_STATS_MESSAGE, kind="stats", priority="chatter")]
+        # Peers' players with more wins rank ahead; ties across shards are not ordered
+        rank, ranked = record.rank, len(self.stats.leaderboard)
+        for board in await self._peer_board_list():
+            for wins, players in board["wins"]:
+                ranked += players
+                if rank and wins > record.wins:
+                    rank += players
+        return [Reply(
+            STATS_MESSAGE.format(
+                wins=record.wins,
+                losses=record.losses,
+                streak=record.streak,
+                best_streak=record.best_streak,
+                rewards=record.rewards,
+                reward_tokens=record.reward_tokens,
+                rank=f"#{rank} of {ranked}" if rank else "-"
+            ),
+            kind="stats",
+            priority="chatter"
+        )]
+
+    async def leaderboard(self, count: int) -> List[Reply]:
+        """The top of the ranking; reads only those entries, here and on every peer shard"""
+        entries = self.stats.top(count)
+        boards = await self._peer_board_list()
+        if boards:
+            # Each board is already sorted by wins
+            merged = heapq.merge(
+                [(entry.name, entry.wins, entry.best_streak) for entry in entries],
+                *(map(tuple, board["top"]) for board in boards),
+                key=lambda entry: -entry[1]
+            )
+            entries = [LeaderboardEntry(rank, *entry) for rank, entry in enumerate(islice(merged, count), start=1)]
+        if not entries:
+            return [Reply(EMPTY_LEADERBOARD_MESSAGE, kind="leaderboard", priority="chatter")]
+        rows = "\n".join(
+            LEADERBOARD_ROW.format(
+                rank=entry.rank,
+                name=escape_markdown(entry.name or "A nameless mortal"),
+                wins=entry.wins,
+                best_streak=entry.best_streak
+            )
+            for entry in entries
+        )
+        return [Reply(LEADERBOARD_MESSAGE.format(rows=rows), kind="leaderboard", priority="chatter")]
+
+    async def group_start(self, chat_id: int) -> List[Reply]:
+        """Start one shared riddle for a group chat, or repeat the latest hint of the running one"""
+        started, hint = self.group_rounds.start_round(chat_id)
+        if started:
+            return [Reply(
+                GROUP_ROUND_STARTED_MESSAGE.format(guesses=config.GROUP_GUESSES_PER_PLAYER, hint=hint),
+                kind="rules",
+                image="happySphinx.png"
+            )]
+        return [Reply(GROUP_ROUND_RUNNING_MESSAGE.format(hint=hint), kind="riddle", priority="chatter")]
+
+    @instrument("engine.group_guess")
+    async def group_guess(self, chat_id: int, user_id: int, text: str, name: str = "") -> List[Reply]:
+        """Judge a guess in a group round; only hints and results are announced, once per chat"""
+        # A round winner claims their reward by posting a wallet address in the chat
+        message = classify(text)
+        if message.intent == Intent.WALLET and self.group_rounds.has_claim(chat_id, user_id):
+            wallet_address = message.value
+            invalid_reason = validate_wallet_address(wallet_address)
+            if invalid_reason:
+                return [Reply(INVALID_WALLET_MESSAGE.format(reason=invalid_reason), kind="invalid_wallet")]
+            claim = self.group_rounds.take_claim(chat_id, user_id)
+            return [await self._queue_payout(user_id, chat_id, claim.game_id, wallet_address, claim.coin)]
+
+        # The chat talks among itself; only what reads as a guess is judged
+        if message.intent != Intent.GUESS:
+            return []
+        event = self.group_rounds.guess(chat_id, user_id, message.value)
+        if event is None:
+            return []
+        if event.tag == "VICTORY":
+            self._record_stat(user_id, "win", name)
+            return [Reply(
+                GROUP_VICTORY_MESSAGE.format(name=escape_markdown(name or "Someone"), coin_name=event.coin),
+                kind="victory",
+                image="SadSphinx.png",
+                priority="result"
+            )]
+        if event.tag == "HINT":
+            return [Reply(GROUP_HINT_MESSAGE.format(hint=event.hint), kind="riddle")]
+        return [Reply(
+            GROUP_DEFEAT_MESSAGE.format(coin_name=event.coin),
+            kind="defeat",
+            image="SuperSuperHappySphinx.png",
+            priority="result"
+        )]
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import List
+
+import httpx
+
+from .engine import Reply, next_batch
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 25  # how long each notification long poll waits on the engine
+SECRET_HEADER = "X-Engine-Secret"
+
+class RemoteEngine:
+    """GameEngine's interface, served by one or more engine_server processes
+
+    Each engine keeps its players' sessions in memory, so calls are routed by user
+    (or, for group rounds, by chat) to the same URL every time. Requests go over
+    pooled keep-alive connections. Every call carries this front-end's name, so the
+    engines hand the notifications of its chats only to its own long polls, and the
+    engines' shared secret, if one is set.
+    """
+    def __init__(
+        self, urls: List[str], pool_size: int = 32, timeout: float = 30, name: str = "", secret: str = ""
+    ):
+        self.urls = [url.rstrip("/") for url in urls]
+        if not self.urls:
+            raise ValueError("RemoteEngine needs at least one engine URL")
+        self.name = name
+        self.timeout = timeout
+        self._notifications: asyncio.Queue = asyncio.Queue()
+        self._pollers: List[asyncio.Task] = []
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size * len(self.urls),
+                max_keepalive_connections=pool_size * len(self.urls)
+            ),
+            timeout=timeout,
+            headers={SECRET_HEADER: secret} if secret else None
+        )
+
+    def _url_for(self, key: int) -> str:
+        return self.urls[key % len(self.urls)]
+
+    async def _call(self, key: int, path: str, body: dict) -> List[Reply]:
+        response = await self._client.post(self._url_for(key) + path, json=dict(body, frontend=self.name))
+        response.raise_for_status()
+        return [Reply.from_dict(reply) for reply in response.json()["replies"]]
+
+    async def start(self) -> None:
+        """Start long-polling every engine for notifications"""
+        self._pollers = [asyncio.create_task(self._poll_notifications(url)) for url in self.urls]
+
+    async def stop(self) -> None:
+        for poller in self._pollers:
+            poller.cancel()
+        await self._client.aclose()
+
+    async def start_game(self, user_id: int) -> List[Reply]:
+        return await self._call(user_id, "/v1/start", {"user_id": user_id})
+
+    async def guess(self, user_id: int, chat_id: int, text: str, name: str = "") -> List[Reply]:
+        return await self._call(
+            user_id, "/v1/guess", {"user_id": user_id, "chat_id": chat_id, "text": text, "name": name}
+        )
+
+    async def hint(self, user_id: int) -> List[Reply]:
+        return await self._call(user_id, "/v1/hint", {"user_id": user_id})
+
+    async def daily(self, user_id: int) -> List[Reply]:
+        return await self._call(user_id, "/v1/daily", {"user_id": user_id})
+
+    async def claim(self, user_id: int, chat_id: int, wallet_address: str) -> List[Reply]:
+        return await self._call(
+            user_id, "/v1/claim", {"user_id": user_id, "chat_id": chat_id, "wallet_address": wallet_address}
+        )
+
+    async def player_stats(self, user_id: int) -> List[Reply]:
+        return await self._call(user_id, "/v1/stats", {"user_id": user_id})
+
+    async def leaderboard(self, count: int) -> List[Reply]:
+        # Any engine will do: each merges its peers' boards into the ranking
+        return await self._call(0, "/v1/leaderboard", {"count": count})
+
+    async def group_start(self, chat_id: int) -> List[Reply]:
+        return await self._call(chat_id, "/v1/group/start", {"chat_id": chat_id})
+
+    async def group_guess(self, chat_id: int, user_id: int, text: str, name: str = "") -> List[Reply]:
+        return await self._call(
+            chat_id, "/v1/group/guess", {"chat_id": chat_id, "user_id": user_id, "text": text, "name": name}
+        )
+
+    async def _poll_notifications(self, url: str) -> None:
+        while True:
+            try:
+                response = await self._client.get(
+                    url + "/v1/notifications",
+                    params={"timeout": POLL_SECONDS, "frontend": self.name},
+                    timeout=POLL_SECONDS + self.timeout
+                )
+                response.raise_for_status()
+                for reply in response.json()["replies"]:
+                    self._notifications.put_nowait(Reply.from_dict(reply))
+            except httpx.HTTPError as e:
+                logger.warning(f"Error polling {url} for notifications: {e}")
+                await asyncio.sleep(1)
+
+    async def next_notifications(self, timeout: float = 25) -> List[Reply]:
+        """Wait up to timeout for notifications from any engine; returns all that are queued"""
+        return await next_batch(self._notifications, timeout)
@@ -0,0 +1,362 @@
+"""Serve the game engine over HTTP/JSON so any front-end can run the game.
+
+    python -m src.engine_server            # listens on ENGINE_HOST:ENGINE_PORT
+    python -m src.engine_server --index 1 --count 2 --port 8701
+
+With --count N, each engine is one shard of the players, like a supervisor worker:
+its own state files under DATA_DIR/shard-<index> and its own slice of the payout
+senders. Front-ends must list the engines in ENGINE_URL in index order.
+
+When ENGINE_SECRET is set, every /v1 request must carry it in an X-Engine-Secret
+header; without it only a local ENGINE_HOST is allowed.
+
+Every call is a POST of a JSON object and answers {"replies": [...]}, each reply
+being a Reply dict (text, kind, image, priority, parse_mode, chat_id). A body may
+name its "frontend"; notifications for that chat then go to that front-end's polls:
+
+    POST /v1/start          {"user_id"}
+    POST /v1/guess          {"user_id", "chat_id", "text", "name"}
+    POST /v1/hint           {"user_id"}
+    POST /v1/daily          {"user_id"}
+    POST /v1/claim          {"user_id", "chat_id", "wallet_address"}
+    POST /v1/stats          {"user_id"}
+    POST /v1/leaderboard    {"count"}
+    POST /v1/group/start    {"chat_id"}
+    POST /v1/group/guess    {"chat_id", "user_id", "text", "name"}
+    POST /v1/stats/record   {"user_id", "event", "args"}   a group outcome from a peer engine
+    GET  /v1/notifications?timeout=25&frontend=   long poll for cooldown and payout messages
+    GET  /v1/board          this engine's top players and win counts, for its peers
+    GET  /healthz
+
+Sharded engines find their peers in ENGINE_URL too: a group round's outcomes are
+recorded on the engine that owns each player, and /v1/leaderboard and /v1/stats
+rank against every engine's board.
+
+Connections are HTTP/1.1 keep-alive, so a front-end's connection pool pays for the
+TCP handshake once rather than per call.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from time import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from .config import config
+from .engine import GameEngine, Reply, next_batch
+from .engine_client import SECRET_HEADER
+from .metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+IDLE_TIMEOUT = 75  # seconds a keep-alive connection may sit unused
+MAX_POLL_SECONDS = 60
+MAX_QUEUED_NOTIFICATIONS = 10000  # per front-end; the oldest go once a front-end stops polling
+BOARD_CACHE_SECONDS = 5  # how long peer boards are reused between rankings
+PEER_TIMEOUT = 5
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class EngineServer:
+    """Minimal asyncio HTTP/1.1 server in front of a GameEngine
+
+    Engine notifications are sorted into one queue per front-end, by the front-end
+    that last sent a request for the reply's chat. Chats no front-end has named
+    since this engine started (after a restart, say) go to the latest poller.
+    """
+    def __init__(self, engine: GameEngine, secret: str = ""):
+        self.engine = engine
+        self.secret = secret.encode()
+        self.frontends: Dict[int, str] = {}  # chat id -> front-end that last called for it
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._last_poller = ""
+        self._router: Optional[asyncio.Task] = None
+        self.routes: Dict[str, Callable[[dict], Awaitable[List[Reply]]]] = {
+            "/v1/start": lambda body: engine.start_game(int(body["user_id"])),
+            "/v1/guess": lambda body: engine.guess(
+                int(body["user_id"]), int(body["chat_id"]), str(body["text"]), str(body.get("name", ""))
+            ),
+            "/v1/hint": lambda body: engine.hint(int(body["user_id"])),
+            "/v1/daily": lambda body: engine.daily(int(body["user_id"])),
+            "/v1/claim": lambda body: engine.claim(
+                int(body["user_id"]), int(body["chat_id"]), str(body["wallet_address"])
+            ),
+            "/v1/stats": lambda body: engine.player_stats(int(body["user_id"])),
+            "/v1/leaderboard": lambda body: engine.leaderboard(int(body.get("count", config.LEADERBOARD_SIZE))),
+            "/v1/group/start": lambda body: engine.group_start(int(body["chat_id"])),
+            "/v1/group/guess": lambda body: engine.group_guess(
+                int(body["chat_id"]), int(body["user_id"]), str(body["text"]), str(body.get("name", ""))
+            ),
+            "/v1/stats/record": self._record_stat,
+        }
+        self._server = None
+
+    async def start(self, host: str, port: int) -> None:
+        self._router = asyncio.create_task(self._route_notifications())
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        logger.info(f"Game engine listening on {host}:{port}")
+
+    async def stop(self) -> None:
+        if self._router:
+            self._router.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _record_stat(self, body: dict) -> List[Reply]:
+        self.engine.apply_stat(int(body["user_id"]), str(body["event"]), list(body.get("args", [])))
+        return []
+
+    def _queue_for(self, frontend: str) -> asyncio.Queue:
+        queue = self._queues.get(frontend)
+        if queue is None:
+            queue = self._queues[frontend] = asyncio.Queue()
+        return queue
+
+    async def _route_notifications(self) -> None:
+        while True:
+            for reply in await self.engine.next_notifications(MAX_POLL_SECONDS):
+                queue = self._queue_for(self.frontends.get(reply.chat_id, self._last_poller))
+                if queue.qsize() >= MAX_QUEUED_NOTIFICATIONS:
+                    queue.get_nowait()
+                    metrics.inc("engine_notifications_dropped_total")
+                queue.put_nowait(reply)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self._serve_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away or sent garbage
+        except asyncio.CancelledError:
+            pass  # shutting down with a long poll open
+        finally:
+            writer.close()
+
+    async def _serve_request(
+        self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        """Answer one request; returns whether the connection stays open"""
+        method, target, version = request_line.decode("latin-1").split()
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        body = b""
+        if "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_BODY:
+                self._respond(writer, 413, {"error": "body too large"}, False)
+                return False
+            body = await reader.readexactly(length)
+        elif method == "POST":
+            self._respond(writer, 411, {"error": "Content-Length required"}, False)
+            return False
+
+        status, payload = await self._dispatch(method, target, body, headers.get(SECRET_HEADER.lower(), ""))
+        self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    def _authorized(self, secret: str) -> bool:
+        # Constant time, so the secret cannot be guessed a byte at a time
+        return not self.secret or hmac.compare_digest(secret.encode("latin-1"), self.secret)
+
+    async def _dispatch(self, method: str, target: str, body: bytes, secret: str = "") -> Tuple[int, dict]:
+        url = urlsplit(target)
+        if url.path == "/healthz":
+            return 200, {"ok": True}
+        if not self._authorized(secret):
+            metrics.inc("engine_unauthorized_total")
+            return 401, {"error": f"missing or wrong {SECRET_HEADER}"}
+        if url.path == "/v1/board":
+            return 200, self.engine.board()
+        if url.path == "/v1/notifications":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            query = parse_qs(url.query)
+            try:
+                timeout = float(query.get("timeout", ["25"])[0])
+            except ValueError:
+                return 400, {"error": "bad timeout"}
+            self._last_poller = query.get("frontend", [""])[0]
+            queue = self._queue_for(self._last_poller)
+            replies = await next_batch(queue, min(max(timeout, 0), MAX_POLL_SECONDS))
+            return 200, {"replies": [reply.to_dict() for reply in replies]}
+
+        route = self.routes.get(url.path)
+        if route is None:
+            return 404, {"error": f"no such endpoint: {url.path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise TypeError(f"body must be a JSON object, not {type(request).__name__}")
+            call = route(request)
+            if request.get("frontend"):
+                # Private chats share the user's id
+                chat_id = int(request.get("chat_id", request.get("user_id", 0)))
+                if chat_id:
+                    self.frontends[chat_id] = str(request["frontend"])
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": f"bad request: {e!r}"}
+        try:
+            replies = await call
+        except Exception as e:
+            logger.exception(f"Error handling {url.path}")
+            metrics.inc("engine_errors_total", endpoint=url.path)
+            return 500, {"error": str(e)}
+        metrics.inc("engine_requests_total", endpoint=url.path)
+        return 200, {"replies": [reply.to_dict() for reply in replies]}
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode("latin-1") + body
+        )
+
+class PeerEngines:
+    """The other shards' engines, as listed in ENGINE_URL
+
+    Forwarded stats are posted in the background and retried a few times; boards
+    are fetched from every peer at once and cached briefly.
+    """
+    def __init__(self, urls: List[str], index: int, secret: str = ""):
+        self.urls = [url.rstrip("/") for url in urls]
+        self.index = index
+        self._client = httpx.AsyncClient(timeout=PEER_TIMEOUT, headers={SECRET_HEADER: secret} if secret else None)
+        self._tasks: Set[asyncio.Task] = set()
+        self._boards: List[dict] = []
+        self._boards_at = 0.0
+
+    def attach(self, engine: GameEngine) -> None:
+        engine.forward_stat = self.forward_stat
+        engine.peer_boards = self.boards
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.aclose()
+
+    def forward_stat(self, user_id: int, event: str, args: list) -> None:
+        url = self.urls[user_id % len(self.urls)]
+        task = asyncio.create_task(self._post_stat(url, {"user_id": user_id, "event": event, "args": args}))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _post_stat(self, url: str, body: dict) -> None:
+        for attempt in range(3):
+            try:
+                response = await self._client.post(url + "/v1/stats/record", json=body)
+                response.raise_for_status()
+                return
+            except httpx.HTTPError as e:
+                logger.warning(f"Error forwarding a stat to {url}: {e}")
+                await asyncio.sleep(2 ** attempt)
+        metrics.inc("engine_stats_dropped_total")
+
+    async def boards(self) -> List[dict]:
+        if time() - self._boards_at < BOARD_CACHE_SECONDS:
+            return self._boards
+        peers = [url for i, url in enumerate(self.urls) if i != self.index]
+        responses = await asyncio.gather(
+            *(self._client.get(url + "/v1/board") for url in peers), return_exceptions=True
+        )
+        boards = []
+        for url, response in zip(peers, responses):
+            if isinstance(response, Exception) or response.status_code != 200:
+                logger.warning(f"Error fetching the board of {url}: {response}")
+                continue
+            boards.append(response.json())
+        self._boards, self._boards_at = boards, time()
+        return boards
+
+async def serve(host: str, port: int, index: int = 0, count: int = 1) -> None:
+    """Run an engine and its server until SIGINT or SIGTERM"""
+    engine = GameEngine()
+    peers = None
+    if count > 1:
+        urls = [url.strip() for url in config.ENGINE_URL.split(",") if url.strip()]
+        if len(urls) == count:
+            peers = PeerEngines(urls, index, config.ENGINE_SECRET)
+            peers.attach(engine)
+        else:
+            logger.warning(
+                f"ENGINE_URL lists {len(urls)} engines, not {count}; "
+                f"group stats and rankings stay on this engine"
+            )
+    await engine.start()
+    server = EngineServer(engine, config.ENGINE_SECRET)
+    await server.start(host, port)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stopping.set)
+        except NotImplementedError:
+            pass  # no signal handlers on this platform; stopped by KeyboardInterrupt
+    try:
+        await stopping.wait()
+    finally:
+        await server.stop()
+        await engine.stop()
+        if peers:
+            await peers.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the game engine over HTTP")
+    parser.add_argument("--host", default=config.ENGINE_HOST)
+    parser.add_argument("--port", type=int, default=config.ENGINE_PORT)
+    parser.add_argument("--index", type=int, default=config.ENGINE_INDEX, help="this engine's place in ENGINE_URL")
+    parser.add_argument("--count", type=int, default=config.ENGINE_COUNT, help="engines the players are split over")
+    args = parser.parse_args()
+    if not 0 <= args.index < args.count:
+        parser.error("--index must be between 0 and --count - 1")
+
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO
+    )
+    if not config.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    if not config.ENGINE_SECRET and args.host not in LOCAL_HOSTS:
+        raise ValueError(f"ENGINE_SECRET must be set to serve the engine on {args.host}")
+    if args.count > 1:
+        # Same state files and payout sender slice as supervisor worker <index> would use
+        config.use_shard(args.index, args.count)
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_PORT + args.index)
+    asyncio.run(serve(args.host, args.port, args.index, args.count))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from time import monotonic, time
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Every event kind with its fields; each event also carries "ts", seconds since the epoch.
+# Token amounts overflow int64, so they are decimal strings.
+SCHEMAS: Dict[str, Dict[str, type]] = {
+    "game_started": {"user_id": int, "game_id": int},
+    "guess": {
+        "user_id": int, "game_id": int, "coin": str, "hints_seen": int,
+        "guess": str, "verdict": str, "attempts_left": int,
+    },
+    "game_ended": {
+        "user_id": int, "game_id": int, "coin": str, "outcome": str,
+        "hints_seen": int, "duration": float,
+    },
+    "payout_queued": {
+        "user_id": int, "game_id": int, "payout_id": str, "symbol": str,
+    },
+    # amount is what the contract paid, known once the payout is confirmed
+    "payout_status": {"payout_id": str, "status": str, "amount": str, "tx_hash": str, "error": str},
+    "tx_signed": {"tx_hash": str, "sender": str, "nonce": int},
+    "tx_broadcast": {"tx_hash": str},
+    "tx_settled": {"tx_hash": str, "success": bool},
+}
+
+MAX_TEXT = 200  # guesses are cut to this many characters
+OPEN_SUFFIX = ".jsonl.open"
+CLOSED_SUFFIX = ".jsonl"
+
+class EventLog:
+    """Append-only log of typed game events, written in batches by a background thread
+
+    emit() only appends a tuple to a deque, so handlers never wait on the disk. Every
+    flush_interval the writer thread turns what has queued up into JSON lines and appends
+    them to the open segment. Segments are closed by size or age; closed segments are
+    compacted into one Parquet file per event kind under columnar/, if pyarrow is
+    installed, and kept as JSON lines otherwise.
+    """
+    def __init__(
+        self,
+        directory: Path,
+        flush_interval: float = 1.0,
+        segment_bytes: int = 64 * 2**20,
+        segment_seconds: float = 3600,
+        max_pending: int = 1_000_000
+    ):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_pending = max_pending
+        self._pending: Deque[Tuple[float, str, dict]] = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._segment: Optional[Path] = None
+        self._segment_opened = 0.0
+        self._segments_opened = 0
+        self.written = 0
+        # Only emit() changes dropped; the writer thread reports what it has not reported yet
+        self.dropped = 0
+        self._dropped_reported = 0
+
+    def emit(self, kind: str, **fields) -> None:
+        """Queue an event; never blocks, and drops the event if the writer has fallen far behind"""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time(), kind, fields))
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Segments left open by a crash are complete up to their last full line
+        for path in self.directory.glob("*" + OPEN_SUFFIX):
+            path.rename(path.with_name(path.name[:-len(OPEN_SUFFIX)] + CLOSED_SUFFIX))
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Write out everything queued and close the open segment"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        self._compact_closed()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._flush()
+                if self._segment is not None and (
+                    self._file.tell() >= self.segment_bytes
+                    or monotonic() - self._segment_opened >= self.segment_seconds
+                ):
+                    self._close_segment()
+                    self._compact_closed()
+            except Exception as e:
+                logger.error(f"Error writing events: {e}")
+        try:
+            self._flush()
+            self._close_segment()
+        except Exception as e:
+            logger.error(f"Error writing events: {e}")
+
+    def _flush(self) -> None:
+        dropped = self.dropped
+        if dropped > self._dropped_reported:
+            metrics.inc("events_dropped_total", dropped - self._dropped_reported)
+            logger.warning(
+                f"Dropped {dropped - self._dropped_reported} events, the event log is falling behind"
+            )
+            self._dropped_reported = dropped
+        if not self._pending:
+            return
+
+        lines: List[str] = []
+        pending = self._pending
+        while pending:
+            ts, kind, fields = pending.popleft()
+            fields["ts"] = ts
+            fields["kind"] = kind
+            lines.append(json.dumps(fields, default=str))
+        if self._file is None:
+            self._open_segment()
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        self.written += len(lines)
+
+    def _open_segment(self) -> None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._segments_opened += 1
+        self._segment = self.directory / f"events-{stamp}-{os.getpid()}-{self._segments_opened}{OPEN_SUFFIX}"
+        self._file = open(self._segment, "a", encoding="utf-8")
+        self._segment_opened = monotonic()
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._segment.rename(self._segment.with_name(self._segment.name[:-len(OPEN_SUFFIX)] + CLOSED_SUFFIX))
+        self._file = None
+        self._segment = None
+
+    def _compact_closed(self) -> None:
+        try:
+            compact_segments(self.directory)
+        except Exception as e:
+            logger.error(f"Error compacting event segments: {e}")
+
+def read_segment(path: Path) -> Iterator[dict]:
+    """Read the events of a JSON lines segment, skipping a torn last line"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def compact_segments(directory: Path) -> int:
+    """Turn closed segments into Parquet files, one per event kind; returns segments compacted
+
+    Output is columnar/kind=<kind>/<segment>.parquet, so pyarrow.dataset or any Hive-style
+    reader sees one table per kind. Without pyarrow, segments stay as JSON lines.
+    """
+    segments = sorted(Path(directory).glob("*" + CLOSED_SUFFIX))
+    if not segments:
+        return 0
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.info("pyarrow is not installed; event segments are kept as JSON lines")
+        return 0
+
+    arrow_types = {int: pa.int64(), str: pa.string(), float: pa.float64(), bool: pa.bool_()}
+    for segment in segments:
+        by_kind: Dict[str, List[dict]] = defaultdict(list)
+        for event in read_segment(segment):
+            by_kind[event.get("kind", "")].append(event)
+
+        for kind, events in by_kind.items():
+            fields = SCHEMAS.get(kind)
+            if fields is None:
+                logger.warning(f"Skipping {len(events)} events of unknown kind {kind!r} in {segment.name}")
+                continue
+            schema = pa.schema(
+                [("ts", pa.float64())] + [(name, arrow_types[kind_type]) for name, kind_type in fields.items()]
+            )
+            table = pa.table(
+                {name: [event.get(name) for event in events] for name in schema.names},
+                schema=schema
+            )
+            target = Path(directory) / "columnar" / f"kind={kind}" / (segment.name[:-len(CLOSED_SUFFIX)] + ".parquet")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_suffix(".tmp")
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, target)
+        segment.unlink()
+    return len(segments)
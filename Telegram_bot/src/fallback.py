@@ -0,0 +1,83 @@
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .tools import MemeDatabase
+
+VICTORY_OPENERS = [
+    "Oh, how unexpected! 🔮 You have seen through my riddles, clever mortal...",
+    "Impossible! 🎭 The stars must have whispered the answer to you!",
+    "Hmph! 🎲 Fortune favours you today, mortal. Enjoy it while it lasts.",
+]
+
+WRONG_OPENERS = [
+    "Not quite... 🔮",
+    "Hahaha, wrong! 🎭",
+    "The mists laugh at your guess... 🎲",
+]
+
+DEFEAT_OPENERS = [
+    "Oh mortal, you have failed! 😸",
+    "Your attempts are spent! 🎭 The Sphinx remains unbeaten!",
+]
+
+OPENERS = {
+    "VICTORY": VICTORY_OPENERS,
+    "WRONG": WRONG_OPENERS,
+    "DEFEAT": DEFEAT_OPENERS,
+}
+
+IDLE_TEMPLATE = "🔮 The Sphinx is listening, mortal... Speak the name of a meme coin."
+NO_MORE_HINTS = "Look again at the riddles I have already given you"
+
+@dataclass
+class Verdict:
+    tag: str  # "VICTORY", "WRONG" or "DEFEAT"
+    attempts_left: int
+    hint: str = ""
+    coin: str = ""
+
+class TemplateReplyEngine:
+    """Builds tagged Sphinx replies from a player's game state, without calling the LLM
+
+    The database only supplies the hints; the coin and how many hints the player has
+    seen come from their session, so concurrent games never share state.
+    """
+    def __init__(self, db: "MemeDatabase"):
+        self.db = db
+
+    def judge(self, message: str, attempts_left: int, coin: str, hints_seen: int) -> Optional[Verdict]:
+        """Decide the outcome of a guess at the given coin; None if no game is running"""
+        if not coin:
+            return None
+
+        guess = message.strip().strip("!?.,'\"")
+        if guess.upper() == coin.upper():
+            return Verdict(tag="VICTORY", attempts_left=attempts_left, coin=coin)
+
+        remaining = attempts_left - 1
+        if remaining > 0:
+            hint = self.db.hint(coin, hints_seen) or NO_MORE_HINTS
+            return Verdict(tag="WRONG", attempts_left=remaining, hint=hint)
+
+        return Verdict(tag="DEFEAT", attempts_left=0, coin=coin)
+
+    def render(self, verdict: Optional[Verdict], flavour: Optional[str] = None) -> str:
+        """Render a verdict, using the model's flavour line when one is available"""
+        if verdict is None:
+            return flavour or IDLE_TEMPLATE
+
+        opener = flavour or random.choice(OPENERS[verdict.tag])
+        if verdict.tag == "WRONG":
+            return (
+                f"[WRONG] {opener} You have {verdict.attempts_left} attempts left. "
+                f"Here's another hint: {verdict.hint}"
+            )
+        if verdict.tag == "DEFEAT":
+            return f"[DEFEAT] {opener} The answer was {verdict.coin}."
+        return f"[VICTORY] {opener}"
+
+    def reply(self, message: str, attempts_left: int, coin: str, hints_seen: int) -> str:
+        """Judge the guess locally and return a [WRONG]/[VICTORY]/[DEFEAT] response"""
+        return self.render(self.judge(message, attempts_left, coin, hints_seen))
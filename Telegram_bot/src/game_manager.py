@@ -1,30 +1,93 @@
-from typing import Dict, Optional
-from time import time
-from dataclasses import dataclass
+from time import time, time_ns
+from typing import Callable, List, Optional
 from .constants import GameState
+from .session_store import STATES, STATE_CODES, SessionStore
+from .timer_wheel import TimerWheel
 
-@dataclass
 class UserSession:
-    user_id: int
-    state: GameState
-    cooldown_until: float = 0
-    hint_count: int = 0
-    attempts_left: int = 3  # 추가: 남은 시도 횟수
-    current_coin: str = ""
-    last_hint: str = ""
+    """View of one user's row in the SessionStore; attributes read and write the columns"""
+    __slots__ = ("user_id", "_store", "_row")
+
+    def __init__(self, store: SessionStore, user_id: int, row: int):
+        self.user_id = user_id
+        self._store = store
+        self._row = row
+
+    @property
+    def state(self) -> GameState:
+        return STATES[self._store.states[self._row]]
+
+    @state.setter
+    def state(self, value: GameState) -> None:
+        self._store.states[self._row] = STATE_CODES[value]
+        self._store.dirty[self._row] = 1
+
+    @property
+    def cooldown_until(self) -> float:
+        return self._store.cooldowns[self._row]
+
+    @cooldown_until.setter
+    def cooldown_until(self, value: float) -> None:
+        self._store.cooldowns[self._row] = value
+        self._store.dirty[self._row] = 1
+
+    @property
+    def hint_count(self) -> int:
+        return self._store.hint_counts[self._row]
+
+    @hint_count.setter
+    def hint_count(self, value: int) -> None:
+        self._store.hint_counts[self._row] = min(max(value, 0), 255)
+        self._store.dirty[self._row] = 1
+
+    @property
+    def attempts_left(self) -> int:  # 남은 시도 횟수
+        return self._store.attempts[self._row]
+
+    @attempts_left.setter
+    def attempts_left(self, value: int) -> None:
+        self._store.attempts[self._row] = min(max(value, -128), 127)
+        self._store.dirty[self._row] = 1
+
+    @property
+    def current_coin(self) -> str:
+        return self._store.coins.values[self._store.coin_ids[self._row]]
+
+    @current_coin.setter
+    def current_coin(self, value: str) -> None:
+        self._store.coin_ids[self._row] = self._store.coins.intern(value)
+        self._store.dirty[self._row] = 1
+
+    @property
+    def last_hint_index(self) -> Optional[int]:  # position in the coin's hints; None before the first
+        position = self._store.hint_positions[self._row]
+        return position - 1 if position else None
+
+    @last_hint_index.setter
+    def last_hint_index(self, value: Optional[int]) -> None:
+        self._store.hint_positions[self._row] = 0 if value is None else min(value + 1, 255)
+        self._store.dirty[self._row] = 1
+
+    @property
+    def game_id(self) -> int:  # unique per game, used as the payout idempotency key
+        return self._store.game_ids[self._row]
+
+    @game_id.setter
+    def game_id(self, value: int) -> None:
+        self._store.game_ids[self._row] = value
+        self._store.dirty[self._row] = 1
+
+ATTEMPTS_PER_GAME = 3
 
 class GameManager:
-    def __init__(self):
-        self.sessions: Dict[int, UserSession] = {}
+    def __init__(self, event_sink: Optional[Callable[..., None]] = None):
+        self.sessions = SessionStore()
+        self.cooldowns = TimerWheel()
+        self._emit = event_sink  # called as event_sink(kind, **fields); must not block
     
     def get_session(self, user_id: int) -> UserSession:
         """Get or create a session for the user"""
-        if user_id not in self.sessions:
-            self.sessions[user_id] = UserSession(
-                user_id=user_id,
-                state=GameState.NOT_STARTED
-            )
-        return self.sessions[user_id]
+        return UserSession(self.sessions, user_id, self.sessions.row(user_id))
     
     def start_game(self, user_id: int) -> tuple[bool, int]:
         """Start a new game for the user"""
@@ -39,10 +102,13 @@ class GameManager:
         # Reset session
         session.state = GameState.IN_PROGRESS
         session.hint_count = 0
-        session.attempts_left = 3
+        session.attempts_left = ATTEMPTS_PER_GAME
         session.cooldown_until = 0
         session.current_coin = ""
-        session.last_hint = ""
+        session.last_hint_index = None
+        session.game_id = time_ns() // 1000
+        if self._emit:
+            self._emit("game_started", user_id=user_id, game_id=session.game_id)
         return True, 0
     
     def use_attempt(self, user_id: int) -> tuple[bool, int]:
@@ -55,14 +121,14 @@ class GameManager:
         """남은 시도 횟수 반환"""
         return self.get_session(user_id).attempts_left
     
-    def add_hint(self, user_id: int, riddle: str) -> bool:
-        """Add a hint and store the riddle"""
+    def add_hint(self, user_id: int, hint_index: int) -> bool:
+        """Add a hint and remember which of the coin's riddles was shown"""
         session = self.get_session(user_id)
         if session.state != GameState.IN_PROGRESS:
             return False
         
         session.hint_count += 1
-        session.last_hint = riddle
+        session.last_hint_index = hint_index
         return session.hint_count <= 3
 
     def set_cooldown(self, user_id: int, duration: int) -> None:
@@ -70,6 +136,8 @@ class GameManager:
         session = self.get_session(user_id)
         session.state = GameState.COOLDOWN
         session.cooldown_until = time() + duration
+        self.cooldowns.schedule(session.cooldown_until, user_id)
+        self._game_ended(session, "defeat")
     
     def check_cooldown(self, user_id: int) -> tuple[bool, int]:
         """Check if user is in cooldown and get remaining time"""
@@ -81,16 +149,59 @@ class GameManager:
             session.state = GameState.NOT_STARTED
         return False, 0
     
+    def expire_cooldowns(self) -> List[int]:
+        """End every cooldown that has run out; returns the users who may play again"""
+        now = time()
+        released = []
+        for user_id in self.cooldowns.advance(now):
+            session = self.get_session(user_id)
+            # Skip timers left behind by a later cooldown or a state change
+            if session.state == GameState.COOLDOWN and session.cooldown_until <= now:
+                session.state = GameState.NOT_STARTED
+                released.append(user_id)
+        return released
+    
+    def reschedule_cooldowns(self) -> int:
+        """Put every stored cooldown back on the timer wheel, e.g. after a restore"""
+        store = self.sessions
+        code = bytes([STATE_CODES[GameState.COOLDOWN]])
+        states = store.states.tobytes()
+        count = 0
+        row = states.find(code)
+        while row >= 0:
+            self.cooldowns.schedule(store.cooldowns[row], store.user_ids[row])
+            count += 1
+            row = states.find(code, row + 1)
+        return count
+    
     def set_waiting_for_wallet(self, user_id: int) -> None:
         """Set user state to waiting for wallet address"""
         session = self.get_session(user_id)
         session.state = GameState.WAITING_FOR_WALLET
+        self._game_ended(session, "victory")
+    
+    def _game_ended(self, session: UserSession, outcome: str) -> None:
+        if self._emit:
+            self._emit(
+                "game_ended",
+                user_id=session.user_id,
+                game_id=session.game_id,
+                coin=session.current_coin,
+                outcome=outcome,
+                hints_seen=self.get_hints_seen(session.user_id),
+                duration=time() - session.game_id / 1e6
+            )
     
     def is_waiting_for_wallet(self, user_id: int) -> bool:
         """Check if user is waiting to provide wallet address"""
         session = self.get_session(user_id)
         return session.state == GameState.WAITING_FOR_WALLET
     
+    def get_hints_seen(self, user_id: int) -> int:
+        """Get how many riddles the user has seen this game: the first, plus one per wrong guess"""
+        attempts_left = self.get_session(user_id).attempts_left
+        return min(ATTEMPTS_PER_GAME, ATTEMPTS_PER_GAME + 1 - max(attempts_left, 0))
+    
     def get_hint_count(self, user_id: int) -> int:
         """Get current hint count for user"""
         session = self.get_session(user_id)
@@ -104,4 +215,12 @@ class GameManager:
     def get_current_coin(self, user_id: int) -> str:
         """Get the current coin for the user's game"""
         session = self.get_session(user_id)
-        return session.current_coin
\ No newline at end of file
+        return session.current_coin
+    
+    def get_game_id(self, user_id: int) -> int:
+        """Get the id of the user's current game"""
+        return self.get_session(user_id).game_id
+
+    def get_session_count(self) -> int:
+        """Get the number of users with a session"""
+        return len(self.sessions)
\ No newline at end of file
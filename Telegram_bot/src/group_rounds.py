@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time, time_ns
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .tools import MemeDatabase
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def looks_like_guess(message: str) -> bool:
+    """Group chats are noisy: only a single short word counts as a guess"""
+    words = message.split()
+    return len(words) == 1 and len(words[0]) <= 20
+
+def _new_database() -> "MemeDatabase":
+    from .tools import MemeDatabase
+    return MemeDatabase()
+
+@dataclass
+class GroupRound:
+    chat_id: int
+    db: "MemeDatabase"
+    game_id: int
+    started: float = field(default_factory=time)
+    wrong_since_hint: int = 0
+    guesses: Dict[int, int] = field(default_factory=dict)  # user id -> guesses made
+
+@dataclass
+class RoundEvent:
+    """Something the whole chat should hear about; wrong guesses alone produce none"""
+    tag: str  # "VICTORY", "HINT" or "DEFEAT"
+    coin: str
+    user_id: int = 0
+    hint: str = ""
+
+@dataclass
+class Claim:
+    coin: str
+    game_id: int
+    won_at: float = field(default_factory=time)
+
+class GroupRoundManager:
+    """One shared riddle per group chat; guesses are judged in arrival order, first correct wins
+
+    Judging never awaits, so two correct guesses can never both win. Every
+    wrong_per_hint wrong guesses reveal the next hint to the chat; once the hints
+    run out, the next batch of wrong guesses ends the round, and so does every
+    player in it running out of guesses. A round older than round_seconds is
+    replaced by the next /start.
+
+    Unclaimed rewards are kept for claim_seconds and saved to path, so a winner
+    can still post their wallet after a restart.
+    """
+    def __init__(
+        self,
+        guesses_per_player: int = 3,
+        wrong_per_hint: int = 5,
+        database_factory: Callable[[], "MemeDatabase"] = _new_database,
+        round_seconds: float = 600,
+        claim_seconds: float = 86400,
+        path: Optional[Path] = None
+    ):
+        self.guesses_per_player = guesses_per_player
+        self.wrong_per_hint = wrong_per_hint
+        self.round_seconds = round_seconds
+        self.claim_seconds = claim_seconds
+        self.path = Path(path) if path else None
+        self._database_factory = database_factory
+        self.rounds: Dict[int, GroupRound] = {}
+        self.claims: Dict[Tuple[int, int], Claim] = {}  # (chat id, winner id) -> reward
+        self.changed = False  # claims changed since the last save
+        self._lock = asyncio.Lock()
+
+    def start_round(self, chat_id: int) -> Tuple[bool, str]:
+        """Start a round unless a fresh one is running; returns (started, latest hint)"""
+        round_ = self.rounds.get(chat_id)
+        if round_ is not None and time() - round_.started < self.round_seconds:
+            hint_index = max(round_.db.hint_index - 1, 0)
+            return False, round_.db.meme_coins[round_.db.current_coin]["hints"][hint_index]
+
+        db = self._database_factory()
+        db.select_random_coin()
+        self.rounds[chat_id] = GroupRound(chat_id, db, time_ns() // 1000)
+        return True, db.get_next_hint()
+
+    def guess(self, chat_id: int, user_id: int, message: str) -> Optional[RoundEvent]:
+        """Judge one guess; returns what to announce to the chat, if anything"""
+        round_ = self.rounds.get(chat_id)
+        if round_ is None or not looks_like_guess(message):
+            return None
+
+        made = round_.guesses.get(user_id, 0)
+        if made >= self.guesses_per_player:
+            return None
+        round_.guesses[user_id] = made + 1
+
+        coin = round_.db.current_coin
+        if round_.db.check_answer(message.strip()):
+            del self.rounds[chat_id]
+            self.claims[(chat_id, user_id)] = Claim(coin, round_.game_id)
+            self.changed = True
+            return RoundEvent("VICTORY", coin, user_id=user_id)
+
+        if all(made >= self.guesses_per_player for made in round_.guesses.values()):
+            # Nobody who joined has a guess left
+            del self.rounds[chat_id]
+            return RoundEvent("DEFEAT", coin)
+
+        round_.wrong_since_hint += 1
+        if round_.wrong_since_hint < self.wrong_per_hint:
+            return None
+        round_.wrong_since_hint = 0
+
+        hint = round_.db.get_next_hint()
+        if hint is None:
+            del self.rounds[chat_id]
+            return RoundEvent("DEFEAT", coin)
+        return RoundEvent("HINT", coin, hint=hint)
+
+    def has_claim(self, chat_id: int, user_id: int) -> bool:
+        claim = self.claims.get((chat_id, user_id))
+        return claim is not None and time() - claim.won_at < self.claim_seconds
+
+    def take_claim(self, chat_id: int, user_id: int) -> Optional[Claim]:
+        if not self.has_claim(chat_id, user_id):
+            return None
+        self.changed = True
+        return self.claims.pop((chat_id, user_id))
+
+    def expire_claims(self) -> int:
+        """Drop rewards left unclaimed for claim_seconds; returns how many were dropped"""
+        cutoff = time() - self.claim_seconds
+        expired = [key for key, claim in self.claims.items() if claim.won_at <= cutoff]
+        for key in expired:
+            del self.claims[key]
+        if expired:
+            self.changed = True
+        return len(expired)
+
+    def restore(self) -> int:
+        """Load the saved claims, if any; returns how many are still open"""
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows = json.load(f)["claims"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error reading group claims {self.path}: {e}")
+            return 0
+        for chat_id, user_id, coin, game_id, won_at in rows:
+            self.claims[(chat_id, user_id)] = Claim(coin, game_id, won_at)
+        self.expire_claims()
+        self.changed = False
+        return len(self.claims)
+
+    async def save(self) -> None:
+        """Write the open claims if they changed since the last save"""
+        self.expire_claims()
+        if self.path is None or not self.changed:
+            return
+        async with self._lock:
+            self.changed = False
+            rows = [
+                [chat_id, user_id, claim.coin, claim.game_id, claim.won_at]
+                for (chat_id, user_id), claim in self.claims.items()
+            ]
+            try:
+                await asyncio.to_thread(self._write_file, rows)
+            except Exception:
+                self.changed = True
+                raise
+
+    def _write_file(self, rows: List[list]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"claims": rows}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,67 @@
+import re
+from dataclasses import dataclass
+from enum import Enum
+
+class Intent(Enum):
+    GUESS = "guess"
+    HINT = "hint"
+    WALLET = "wallet"
+    CHATTER = "chatter"
+
+@dataclass(frozen=True)
+class Classification:
+    intent: Intent
+    value: str = ""            # the coin a GUESS names, or the address a WALLET message holds
+    needs_model: bool = False  # CHATTER that a canned reply would not answer
+
+# Anything shaped like an address counts, so a mistyped one gets a useful error
+WALLET_RE = re.compile(r"\b0x[0-9a-zA-Z]{6,}\b")
+CASHTAG_RE = re.compile(r"(?<!\w)\$([A-Za-z][A-Za-z0-9]{1,19})\b")
+TOKEN_RE = re.compile(r"^\$?([A-Za-z][A-Za-z0-9]{1,19})(?:\s+(?:coin|token))?[!?.,]*$", re.I)
+GUESS_PHRASE_RE = re.compile(
+    r"^(?:is it|it'?s|it is|maybe|i think(?: it'?s| it is)?|i guess|i say|my guess is|"
+    r"my answer is|the answer is|answer|guess)[:\s]+\$?([A-Za-z][A-Za-z0-9]{1,19})(?:\s+(?:coin|token))?[\s!?.,]*$",
+    re.I
+)
+HINT_RE = re.compile(r"\b(?:hints?|clues?|riddles?|remind|repeat|stuck|help)\b", re.I)
+WORD_RE = re.compile(r"[a-z']+")
+
+# Words that are not coin names, even standing alone or after "is it"
+SMALL_TALK = frozenset("""
+    hi hello hey heya yo gm gn sup hola howdy bye goodbye cya
+    thanks thank thx ty you u cheers please pls plz
+    ok okay k kk sure yes yeah yep yup no nope nah maybe cool nice great wow wtf omg
+    lol lmao rofl haha hahaha hehe hmm hm hmmm uh um what why how who when where
+    there sphinx more next another one this that so it me again right wrong
+    hard easy fun funny real true false done over sorry
+""".split())
+
+def classify(message: str) -> Classification:
+    """Sort a player's message into guess, hint request, wallet address or chatter
+
+    Rules run in order on features of the text alone: an address, a guess phrase or
+    cashtag, a hint word, a single unknown word (a guess), and otherwise chatter. Only
+    chatter that is more than small talk is marked as needing the model.
+    """
+    text = message.strip()
+    wallet = WALLET_RE.search(text)
+    if wallet:
+        return Classification(Intent.WALLET, wallet.group(0))
+
+    phrase = GUESS_PHRASE_RE.match(text)
+    if phrase and phrase.group(1).lower() not in SMALL_TALK:
+        return Classification(Intent.GUESS, phrase.group(1))
+    cashtag = CASHTAG_RE.search(text)
+    if cashtag:
+        return Classification(Intent.GUESS, cashtag.group(1))
+
+    if HINT_RE.search(text):
+        return Classification(Intent.HINT)
+
+    token = TOKEN_RE.match(text)
+    if token and token.group(1).lower() not in SMALL_TALK:
+        return Classification(Intent.GUESS, token.group(1))
+
+    # Greetings, thanks, laughter and emoji get a canned reply; questions and the rest the model
+    words = WORD_RE.findall(text.lower())
+    return Classification(Intent.CHATTER, needs_model=not all(word in SMALL_TALK for word in words))
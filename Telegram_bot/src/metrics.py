@@ -0,0 +1,103 @@
+import logging
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """Minimal in-process counter and summary registry with Prometheus text output"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self.summaries: Dict[str, Dict[LabelKey, list]] = defaultdict(dict)
+
+    @staticmethod
+    def _key(labels: dict) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter"""
+        with self._lock:
+            self.counters[name][self._key(labels)] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation of a summary (count, sum, max)"""
+        key = self._key(labels)
+        with self._lock:
+            summary = self.summaries[name].setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+
+    @staticmethod
+    def _label_str(key: LabelKey) -> str:
+        return ",".join(f"{k}={v}" for k, v in key)
+
+    def snapshot(self) -> dict:
+        """Get a plain-dict copy of every metric, keyed by 'label=value,...'"""
+        with self._lock:
+            return {
+                "counters": {
+                    name: {self._label_str(key): value for key, value in series.items()}
+                    for name, series in self.counters.items()
+                },
+                "summaries": {
+                    name: {
+                        self._label_str(key): {"count": s[0], "sum": s[1], "max": s[2]}
+                        for key, s in series.items()
+                    }
+                    for name, series in self.summaries.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        def fmt(name: str, key: LabelKey, value: float) -> str:
+            if not key:
+                return f"{name} {value}"
+            labels = ",".join(f'{k}="{v}"' for k, v in key)
+            return f"{name}{{{labels}}} {value}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(fmt(name, key, value) for key, value in series.items())
+            for name, series in sorted(self.summaries.items()):
+                lines.append(f"# TYPE {name} summary")
+                for key, (count, total, peak) in series.items():
+                    lines.append(fmt(f"{name}_count", key, count))
+                    lines.append(fmt(f"{name}_sum", key, total))
+                    lines.append(fmt(f"{name}_max", key, peak))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int) -> ThreadingHTTPServer:
+        """Expose the registry on http://0.0.0.0:<port>/metrics from a daemon thread"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Serving metrics on port {port}")
+        return server
+
+metrics = Metrics()
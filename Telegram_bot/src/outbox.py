@@ -0,0 +1,265 @@
+import asyncio
+import heapq
+import logging
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from itertools import count
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from .metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    RESULT = 0   # victory, defeat, rewards
+    GAME = 1     # riddles, hints and replies to guesses
+    CHATTER = 2  # welcome texts and reminders
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str
+    priority: Priority
+    seq: int
+    photo: Optional[Path] = None
+    parse_mode: Optional[str] = 'Markdown'
+    attempts: int = 0
+
+class TokenBucket:
+    """Allows rate events per second on average, with bursts of up to burst events"""
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self._updated = clock()
+        self.blocked_until = 0.0  # set by RetryAfter
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def full_at(self) -> float:
+        """When the bucket will be back to a full burst and unblocked"""
+        return max(self._updated + (self.burst - self.tokens) / self.rate, self.blocked_until)
+
+class ChatQueue:
+    def __init__(self, bucket: TokenBucket):
+        self.messages: Deque[OutboundMessage] = deque()
+        self.bucket = bucket
+        self.busy = False  # one message per chat in flight keeps the chat's order
+        self.rested = True  # the bucket was full when the message in flight went out
+
+class Outbox:
+    """Delivers bot messages in the background within Telegram's flood limits
+
+    Each chat sends its messages in order, paced by its own token bucket. Across chats the
+    chat whose next message has the highest priority goes first, paced by a global bucket.
+    A chat and its bucket are kept until the bucket has refilled, so a chat that empties
+    its queue cannot start over with a fresh burst.
+
+    RetryAfter pauses the chat for as long as Telegram asks and then retries the message.
+    When the chat's bucket was full as the message went out, the chat's own limit cannot
+    be the one that was hit, so the global bucket pauses as well.
+    """
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_attempts: int = 5,
+        clock: Callable[[], float] = monotonic
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate, clock)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._chats: Dict[int, ChatQueue] = {}
+        self._ready: List[Tuple[int, int, int]] = []     # (priority, seq, chat_id)
+        self._sleeping: List[Tuple[float, int]] = []     # (ready_at, chat_id)
+        self._idle: List[Tuple[float, int]] = []         # (bucket full at, chat_id) of drained chats
+        self._seq = count()
+        self._wake = asyncio.Event()
+        self._deliveries: Set[asyncio.Task] = set()
+        self._runner: Optional[asyncio.Task] = None
+        self._running = False
+        self.bot = None
+
+    def send(
+        self,
+        chat_id: int,
+        text: str,
+        *,
+        photo: Optional[Path] = None,
+        priority: Priority = Priority.GAME,
+        parse_mode: Optional[str] = 'Markdown'
+    ) -> None:
+        """Queue a message (a photo with text as caption, if given) and return immediately"""
+        message = OutboundMessage(chat_id, text, priority, next(self._seq), photo, parse_mode)
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatQueue(
+                TokenBucket(self.chat_rate, self.chat_burst, self._clock)
+            )
+        chat.messages.append(message)
+        if len(chat.messages) == 1 and not chat.busy:
+            self._schedule(chat_id, chat)
+        metrics.inc("outbox_queued_total", priority=priority.name.lower())
+
+    def pending(self) -> int:
+        return sum(len(chat.messages) for chat in self._chats.values())
+
+    def _schedule(self, chat_id: int, chat: ChatQueue) -> None:
+        head = chat.messages[0]
+        heapq.heappush(self._ready, (head.priority, head.seq, chat_id))
+        self._wake.set()
+
+    def start(self, bot) -> None:
+        self.bot = bot
+        self._running = True
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Give queued messages up to timeout seconds to go out, then stop"""
+        deadline = self._clock() + timeout
+        while (self.pending() or self._deliveries) and self._clock() < deadline:
+            await asyncio.sleep(0.1)
+        # wait_for can swallow a cancel that lands as _wake is set, so the loop checks the flag too
+        self._running = False
+        self._wake.set()
+        if self._runner:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        for task in list(self._deliveries):
+            task.cancel()
+
+    async def _run(self) -> None:
+        while self._running:
+            now = self._clock()
+            while self._sleeping and self._sleeping[0][0] <= now:
+                _, chat_id = heapq.heappop(self._sleeping)
+                chat = self._chats.get(chat_id)
+                if chat and chat.messages and not chat.busy:
+                    self._schedule(chat_id, chat)
+            self._forget_idle(now)
+
+            if not self._ready:
+                self._wake.clear()
+                wake_at = min(self._sleeping[:1] + self._idle[:1], default=None)
+                timeout = wake_at[0] - now if wake_at else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_wait = self.global_bucket.delay()
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            _, _, chat_id = heapq.heappop(self._ready)
+            chat = self._chats[chat_id]
+            chat_wait = chat.bucket.delay()
+            if chat_wait > 0:
+                heapq.heappush(self._sleeping, (now + chat_wait, chat_id))
+                continue
+
+            self.global_bucket.take()
+            chat.rested = chat.bucket.tokens >= chat.bucket.burst
+            chat.bucket.take()
+            chat.busy = True
+            task = asyncio.create_task(self._deliver(chat_id, chat, chat.messages[0]))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, chat_id: int, chat: ChatQueue, message: OutboundMessage) -> None:
+        done = True
+        try:
+            await self._send(message)
+            metrics.inc("outbox_sent_total", priority=message.priority.name.lower())
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):
+                retry_after = retry_after.total_seconds()
+            chat.bucket.blocked_until = self._clock() + retry_after
+            if chat.rested:
+                self.global_bucket.blocked_until = max(self.global_bucket.blocked_until, chat.bucket.blocked_until)
+            metrics.inc("outbox_retry_after_total", limit="global" if chat.rested else "chat")
+            done = not self._retry(message, f"flood limit, retry after {retry_after}s")
+        except (BadRequest, Forbidden) as e:
+            if message.photo is not None and isinstance(e, BadRequest):
+                # Same fallback the handlers used: send the caption as plain text
+                logger.warning(f"Error sending photo to {chat_id}, sending text instead: {e}")
+                message.photo = None
+                done = False
+            else:
+                logger.warning(f"Dropping message to {chat_id}: {e}")
+                metrics.inc("outbox_dropped_total", reason=type(e).__name__)
+        except NetworkError as e:
+            chat.bucket.blocked_until = self._clock() + min(2 ** message.attempts, 30)
+            done = not self._retry(message, str(e))
+        except Exception as e:
+            if message.photo is not None:
+                logger.warning(f"Error sending photo to {chat_id}, sending text instead: {e}")
+                message.photo = None
+                done = False
+            else:
+                logger.warning(f"Dropping message to {chat_id}: {e}")
+                metrics.inc("outbox_dropped_total", reason=type(e).__name__)
+        finally:
+            if done:
+                chat.messages.popleft()
+            chat.busy = False
+            if chat.messages:
+                self._schedule(chat_id, chat)
+            else:
+                heapq.heappush(self._idle, (chat.bucket.full_at(), chat_id))
+                self._wake.set()
+
+    def _forget_idle(self, now: float) -> None:
+        """Drop drained chats whose bucket has refilled, so the table only holds active ones"""
+        while self._idle and self._idle[0][0] <= now:
+            _, chat_id = heapq.heappop(self._idle)
+            chat = self._chats.get(chat_id)
+            # A chat that sent again since has a later entry of its own
+            if chat and not chat.messages and not chat.busy and chat.bucket.full_at() <= now:
+                del self._chats[chat_id]
+
+    def _retry(self, message: OutboundMessage, reason: str) -> bool:
+        message.attempts += 1
+        if message.attempts >= self.max_attempts:
+            logger.warning(f"Giving up on message to {message.chat_id} after {message.attempts} attempts: {reason}")
+            metrics.inc("outbox_dropped_total", reason="retries_exhausted")
+            return False
+        return True
+
+    async def _send(self, message: OutboundMessage) -> None:
+        if message.photo is None:
+            await self.bot.send_message(
+                chat_id=message.chat_id,
+                text=message.text,
+                parse_mode=message.parse_mode
+            )
+            return
+        with open(message.photo, "rb") as photo:
+            await self.bot.send_photo(
+                chat_id=message.chat_id,
+                photo=photo,
+                caption=message.text,
+                parse_mode=message.parse_mode
+            )
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, List, Optional, Set
+
+from .config import config
+from .payout_journal import JournalEntry, PayoutJournal
+from .profiling import instrument
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class PayoutStatus(Enum):
+    QUEUED = "queued"
+    HELD = "held"
+    SIGNED = "signed"
+    BROADCAST = "broadcast"
+    CONFIRMED = "confirmed"
+    FAILED = "failed"
+
+@dataclass
+class PayoutTicket:
+    payout_id: str
+    user_id: int
+    chat_id: int
+    wallet_address: str
+    symbol: str
+    amount: int = 0  # set from the TokenSent event once confirmed; the contract picks it
+    status: PayoutStatus = PayoutStatus.QUEUED
+    tx_hash: str = ""
+    raw_tx: str = ""
+    error: str = ""
+
+    @classmethod
+    def from_journal(cls, entry: JournalEntry) -> "PayoutTicket":
+        return cls(
+            payout_id=entry.payout_id,
+            user_id=entry.user_id,
+            chat_id=entry.chat_id,
+            wallet_address=entry.wallet_address,
+            symbol=entry.symbol,
+            amount=entry.amount,
+            status=PayoutStatus(entry.state),
+            tx_hash=entry.tx_hash,
+            raw_tx=entry.raw_tx
+        )
+
+def sender_keys() -> List[str]:
+    """Get the payout sender keys of this process (its slice of them in a sharded runtime)"""
+    if not config.PAYOUT_PRIVATE_KEY:
+        return []
+    keys = [config.PAYOUT_PRIVATE_KEY] + [
+        key.strip() for key in config.PAYOUT_SENDER_KEYS.split(",") if key.strip()
+    ]
+    return keys[config.SHARD_INDEX::config.SHARD_COUNT]
+
+def load_token_operations(event_sink: Optional[Callable[..., None]] = None):
+    """Create TokenOperations from the config, or None if payouts are not configured"""
+    if not (config.TOKEN_MANAGER_ADDRESS and config.RPC_URL and config.PAYOUT_PRIVATE_KEY):
+        return None
+
+    # TokenOperations lives with the contract tooling in memeshpinx-hardhat
+    ops_dir = str(config.TOKEN_OPS_DIR)
+    if ops_dir not in sys.path:
+        sys.path.append(ops_dir)
+    from token_operation import TokenOperations
+
+    rpc_urls = [url.strip() for url in config.RPC_URL.split(",") if url.strip()]
+    token_ops = TokenOperations(
+        config.TOKEN_MANAGER_ADDRESS,
+        rpc_urls[0] if len(rpc_urls) == 1 else rpc_urls,
+        sender_keys(),
+        min_sender_gas_balance=config.SENDER_MIN_GAS_BALANCE,
+        max_in_flight_per_sender=config.SENDER_MAX_IN_FLIGHT,
+        event_sink=event_sink
+    )
+    # Time the transaction paths when profiling (these run on worker threads)
+    for method in ("_build_and_send_tx", "_send_raw", "sign_send_tokens", "preflight_send_token"):
+        setattr(token_ops, method, instrument(f"token_ops.{method}")(getattr(token_ops, method)))
+    return token_ops
+
+class PayoutService:
+    """Sends rewards through TokenOperations in the background, without the LLM"""
+    def __init__(self, token_ops=None, journal: Optional[PayoutJournal] = None):
+        self.token_ops = token_ops
+        self.journal = journal or PayoutJournal(config.PAYOUT_JOURNAL_PATH)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.on_status: Optional[Callable[[PayoutTicket], Awaitable[None]]] = None
+        self._workers: List[asyncio.Task] = []
+        self._confirmations: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.token_ops is not None
+
+    async def enqueue(
+        self,
+        user_id: int,
+        chat_id: int,
+        game_id: int,
+        wallet_address: str,
+        coin: str
+    ) -> PayoutTicket:
+        """Durably queue a reward and return its ticket; one payout per (user, game)"""
+        ticket = PayoutTicket(
+            payout_id=f"{user_id}:{game_id}",
+            user_id=user_id,
+            chat_id=chat_id,
+            wallet_address=wallet_address,
+            symbol=f"{config.REWARD_SYMBOL_PREFIX}{coin}"
+        )
+        is_new = await self.journal.append(
+            ticket.payout_id,
+            PayoutStatus.QUEUED.value,
+            user_id=user_id,
+            chat_id=chat_id,
+            wallet_address=wallet_address,
+            symbol=ticket.symbol,
+            amount=ticket.amount
+        )
+        if not is_new:
+            # Already claimed for this game: report the existing payout instead of paying again
+            ticket.status = PayoutStatus(self.journal.get_state(ticket.payout_id))
+            return ticket
+
+        if self.enabled:
+            self.queue.put_nowait(ticket)
+        else:
+            logger.warning(f"Payouts are not configured; reward {ticket.payout_id} stays queued in the journal")
+        return ticket
+
+    async def start(self) -> None:
+        """Recover unfinished payouts and start the payout worker"""
+        if not self.enabled or self._workers:
+            return
+        await self.recover()
+        self.token_ops.watch_registry_events()
+        # Each hot wallet has its own nonce sequence, so one worker per sender keeps them all busy
+        for _ in self.token_ops.sender_pool.wallets:
+            self._workers.append(asyncio.create_task(self._worker()))
+        self._workers.append(asyncio.create_task(self._monitor_senders()))
+
+    async def stop(self) -> None:
+        """Stop the payout worker and flush the journal"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._confirmations, return_exceptions=True)
+        self._workers.clear()
+        await self.journal.flush()
+
+    async def recover(self) -> None:
+        """Replay or reconcile every payout the journal does not show as finished"""
+        entries = self.journal.unfinished()
+        if entries:
+            logger.info(f"Recovering {len(entries)} unfinished payouts")
+
+        for entry in entries:
+            ticket = PayoutTicket.from_journal(entry)
+            if ticket.status in (PayoutStatus.QUEUED, PayoutStatus.HELD):
+                # Never signed, so nothing can have reached the chain: send it again
+                self.queue.put_nowait(ticket)
+                continue
+
+            # Signed or broadcast: the chain decides whether it landed
+            await self._reconcile(ticket)
+
+    async def _reconcile(self, ticket: PayoutTicket) -> None:
+        """Finish a signed payout from its receipt, or broadcast the same bytes again"""
+        try:
+            result = await self.token_ops.get_receipt_status(ticket.tx_hash)
+        except Exception as e:
+            logger.warning(f"Could not reconcile payout {ticket.payout_id}: {e}")
+            self._reconcile_later(ticket)
+            return
+
+        if result is None:
+            # Re-broadcasting the same signed bytes cannot pay twice
+            await self._broadcast(ticket)
+        else:
+            ticket.amount = result.amount
+            await self._finish(ticket, result.success)
+
+    def _reconcile_later(self, ticket: PayoutTicket) -> None:
+        async def reconcile():
+            await asyncio.sleep(config.PAYOUT_RECONCILE_SECONDS)
+            await self._reconcile(ticket)
+
+        task = asyncio.create_task(reconcile())
+        self._confirmations.add(task)
+        task.add_done_callback(self._confirmations.discard)
+
+    async def _worker(self) -> None:
+        while True:
+            ticket = await self.queue.get()
+            try:
+                await self._process(ticket)
+            except Exception as e:
+                logger.warning(f"Error processing payout {ticket.payout_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _monitor_senders(self) -> None:
+        while True:
+            try:
+                for sender in await self.token_ops.refresh_senders():
+                    if not sender["healthy"]:
+                        logger.warning(f"Payout sender unhealthy: {sender}")
+            except Exception as e:
+                logger.warning(f"Error checking payout senders: {e}")
+            await asyncio.sleep(config.SENDER_HEALTH_INTERVAL)
+
+    async def _process(self, ticket: PayoutTicket) -> None:
+        # Simulate first: a payout that would revert must not cost gas or a nonce
+        preflight = await self.token_ops.preflight_send_token(ticket.symbol, ticket.wallet_address)
+        if not preflight.ok:
+            if preflight.retryable:
+                await self._hold(ticket, preflight.reason)
+            else:
+                await self._finish(ticket, False, f"Rejected: {preflight.reason}")
+            return
+
+        try:
+            signed = await self.token_ops.sign_send_token(ticket.symbol, ticket.wallet_address)
+        except Exception as e:
+            await self._finish(ticket, False, str(e))
+            return
+
+        # The signed bytes are durable before broadcast, so a crash can only re-send them
+        ticket.tx_hash = signed.tx_hash
+        ticket.raw_tx = signed.raw_tx
+        ticket.status = PayoutStatus.SIGNED
+        await self.journal.append(
+            ticket.payout_id,
+            ticket.status.value,
+            tx_hash=signed.tx_hash,
+            raw_tx=signed.raw_tx
+        )
+        await self._broadcast(ticket)
+
+    async def _hold(self, ticket: PayoutTicket, reason: str) -> None:
+        """Park a payout that cannot succeed yet and queue it again later"""
+        first_hold = ticket.status != PayoutStatus.HELD
+        ticket.status = PayoutStatus.HELD
+        ticket.error = reason
+        await self.journal.append(ticket.payout_id, ticket.status.value, detail=reason)
+        if first_hold:
+            await self._notify(ticket)
+
+        async def requeue():
+            await asyncio.sleep(config.PAYOUT_HOLD_RETRY_SECONDS)
+            self.queue.put_nowait(ticket)
+
+        task = asyncio.create_task(requeue())
+        self._confirmations.add(task)
+        task.add_done_callback(self._confirmations.discard)
+
+    async def _broadcast(self, ticket: PayoutTicket) -> None:
+        try:
+            await self.token_ops.broadcast_raw(ticket.raw_tx)
+        except Exception as e:
+            from token_operation import BroadcastRejected
+            if isinstance(e, BroadcastRejected):
+                # Refused, and neither pending nor mined: these signed bytes will never pay
+                await self._finish(ticket, False, str(e))
+            else:
+                # The node may have it anyway; it stays signed until the chain says otherwise
+                logger.warning(f"Could not broadcast payout {ticket.payout_id}: {e}")
+                self._reconcile_later(ticket)
+            return
+
+        if ticket.status != PayoutStatus.BROADCAST:
+            ticket.status = PayoutStatus.BROADCAST
+            await self.journal.append(ticket.payout_id, ticket.status.value, tx_hash=ticket.tx_hash)
+            await self._notify(ticket)
+
+        # Wait for the receipt off the broadcast path so the next payout is not held up
+        task = asyncio.create_task(self._confirm(ticket))
+        self._confirmations.add(task)
+        task.add_done_callback(self._confirmations.discard)
+
+    async def _confirm(self, ticket: PayoutTicket) -> None:
+        try:
+            result = await self.token_ops.wait_for_receipt(ticket.tx_hash)
+        except Exception as e:
+            # Its sender slot is free again; check the chain later, as a restart would
+            logger.warning(f"No receipt yet for payout {ticket.payout_id}: {e}")
+            self._reconcile_later(ticket)
+            return
+        ticket.amount = result.amount
+        await self._finish(ticket, result.success)
+
+    async def _finish(self, ticket: PayoutTicket, confirmed: bool, error: str = "") -> None:
+        ticket.status = PayoutStatus.CONFIRMED if confirmed else PayoutStatus.FAILED
+        ticket.error = error
+        await self.journal.append(
+            ticket.payout_id,
+            ticket.status.value,
+            amount=ticket.amount if confirmed else None,
+            tx_hash=ticket.tx_hash,
+            detail=error
+        )
+        await self._notify(ticket)
+
+    async def _notify(self, ticket: PayoutTicket) -> None:
+        logger.info(f"Payout {ticket.payout_id}: {ticket.status.value} {ticket.tx_hash} {ticket.error}")
+        if self.on_status is None:
+            return
+        try:
+            await self.on_status(ticket)
+        except Exception as e:
+            logger.warning(f"Error reporting payout status: {e}")
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from time import time
+from typing import List, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payout_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    payout_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    user_id INTEGER,
+    chat_id INTEGER,
+    wallet_address TEXT,
+    symbol TEXT,
+    amount TEXT,
+    tx_hash TEXT,
+    raw_tx TEXT,
+    detail TEXT,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS payout_queued_once ON payout_events(payout_id) WHERE state = 'queued';
+CREATE UNIQUE INDEX IF NOT EXISTS payout_signed_once ON payout_events(payout_id) WHERE state = 'signed';
+CREATE INDEX IF NOT EXISTS payout_events_by_id ON payout_events(payout_id, seq);
+"""
+
+FINAL_STATES = ("confirmed", "failed")
+
+@dataclass
+class JournalEntry:
+    payout_id: str
+    state: str
+    user_id: int
+    chat_id: int
+    wallet_address: str
+    symbol: str
+    amount: int
+    tx_hash: str = ""
+    raw_tx: str = ""
+
+class PayoutJournal:
+    """Append-only SQLite journal of payout state transitions"""
+    def __init__(self, path: Path, flush_interval: float = 0.005, max_batch: int = 500):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        # Each transition is a new row; a unique 'queued' row per payout id makes enqueueing idempotent
+        self.conn.executescript(SCHEMA)
+
+        self._pending: List[Tuple[tuple, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def append(
+        self,
+        payout_id: str,
+        state: str,
+        *,
+        user_id: Optional[int] = None,
+        chat_id: Optional[int] = None,
+        wallet_address: str = "",
+        symbol: str = "",
+        amount: Optional[int] = None,
+        tx_hash: str = "",
+        raw_tx: str = "",
+        detail: str = ""
+    ) -> bool:
+        """Durably append a transition; False if the payout id was already queued"""
+        row = (
+            payout_id, state, user_id, chat_id, wallet_address, symbol,
+            None if amount is None else str(amount), tx_hash, raw_tx, detail, time()
+        )
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        # Rows appended while a batch was being written go out in the next batch
+        while self._pending:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Commit every pending transition in a single transaction (one fsync per batch)"""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                results = await asyncio.to_thread(self._write_batch, [row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), inserted in zip(batch, results):
+                if not future.done():
+                    future.set_result(inserted)
+
+    def _write_batch(self, rows: List[tuple]) -> List[bool]:
+        results = []
+        self.conn.execute("BEGIN")
+        try:
+            for row in rows:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO payout_events "
+                    "(payout_id, state, user_id, chat_id, wallet_address, symbol, amount, "
+                    "tx_hash, raw_tx, detail, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                results.append(cursor.rowcount == 1)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return results
+
+    def get_state(self, payout_id: str) -> Optional[str]:
+        """Get the latest state of a payout"""
+        row = self.conn.execute(
+            "SELECT state FROM payout_events WHERE payout_id = ? ORDER BY seq DESC LIMIT 1",
+            (payout_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unfinished(self) -> List[JournalEntry]:
+        """Get every payout whose latest state is not final, oldest first"""
+        rows = self.conn.execute(
+            f"""
+            SELECT q.payout_id, last.state, q.user_id, q.chat_id, q.wallet_address, q.symbol,
+                   q.amount, COALESCE(s.tx_hash, ''), COALESCE(s.raw_tx, '')
+            FROM payout_events q
+            JOIN payout_events last ON last.seq = (
+                SELECT MAX(seq) FROM payout_events WHERE payout_id = q.payout_id
+            )
+            LEFT JOIN payout_events s ON s.payout_id = q.payout_id AND s.state = 'signed'
+            WHERE q.state = 'queued' AND last.state NOT IN ({",".join("?" * len(FINAL_STATES))})
+            ORDER BY q.seq
+            """,
+            FINAL_STATES
+        ).fetchall()
+        return [
+            JournalEntry(
+                payout_id=row[0],
+                state=row[1],
+                user_id=row[2],
+                chat_id=row[3],
+                wallet_address=row[4],
+                symbol=row[5],
+                amount=int(row[6]),
+                tx_hash=row[7],
+                raw_tx=row[8]
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import struct
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from .columnar import copy_columns, read_blob, read_columns, write_columns
+from .session_store import StringTable, UserIndex
+from .skip_list import SkipList
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+HEADER = struct.Struct("<4sHQQ")  # magic, version, rows, next sequence number
+SEQUENCE_BITS = 40  # wins are ranked first, then by who reached that many wins first
+TOKEN_UNITS = 10**18
+
+class PlayerRecord(NamedTuple):
+    wins: int
+    losses: int
+    streak: int
+    best_streak: int
+    rewards: int
+    reward_tokens: float
+    rank: Optional[int]  # 1-based; None until the first win
+
+class LeaderboardEntry(NamedTuple):
+    rank: int
+    name: str
+    wins: int
+    best_streak: int
+
+class PlayerStats:
+    """Per-player win/loss/reward counters, updated as games end, with a live leaderboard
+
+    Counters live in typed columns like the SessionStore. Every player with a win is
+    also in a skip list ordered by wins, so a rank or the top of the board is read in
+    O(log n) without looking at other players. win_counts (wins -> players) lets other
+    shards place this shard's players in a ranking merged across shards.
+    """
+    # Column attributes in the order snapshots write them
+    COLUMNS = (
+        "user_ids", "wins", "losses", "streaks", "best_streaks",
+        "rewards", "reward_tokens", "name_ids", "reached",
+    )
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.index = UserIndex()
+        self.user_ids = array('q')
+        self.wins = array('I')
+        self.losses = array('I')
+        self.streaks = array('H')
+        self.best_streaks = array('H')
+        self.rewards = array('I')
+        self.reward_tokens = array('d')
+        self.name_ids = array('I')
+        self.reached = array('q')  # sequence number of the player's latest win
+        self.names = StringTable()
+        self.leaderboard = SkipList()
+        self.win_counts: Dict[int, int] = {}
+        self._sequence = 0
+        self.changed = False  # since the last snapshot
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def _row(self, user_id: int) -> int:
+        row = self.index.get(user_id)
+        if row >= 0:
+            return row
+        row = len(self.user_ids)
+        self.user_ids.append(user_id)
+        for column in (self.wins, self.losses, self.streaks, self.best_streaks,
+                       self.rewards, self.name_ids, self.reached):
+            column.append(0)
+        self.reward_tokens.append(0.0)
+        self.index.insert(user_id, row)
+        return row
+
+    def _key(self, row: int) -> int:
+        return (-self.wins[row] << SEQUENCE_BITS) + self.reached[row]
+
+    def record_win(self, user_id: int, name: str = "") -> None:
+        row = self._row(user_id)
+        if self.wins[row]:
+            self.leaderboard.remove(self._key(row))
+            self.win_counts[self.wins[row]] -= 1
+        self.wins[row] += 1
+        self.win_counts[self.wins[row]] = self.win_counts.get(self.wins[row], 0) + 1
+        self.streaks[row] = min(self.streaks[row] + 1, 0xFFFF)
+        self.best_streaks[row] = max(self.best_streaks[row], self.streaks[row])
+        if name:
+            self.name_ids[row] = self.names.intern(name)
+        self.reached[row] = self._sequence
+        self._sequence += 1
+        self.leaderboard.insert(self._key(row), row)
+        self.changed = True
+
+    def record_loss(self, user_id: int) -> None:
+        row = self._row(user_id)
+        self.losses[row] += 1
+        self.streaks[row] = 0
+        self.changed = True
+
+    def record_reward(self, user_id: int, amount: int) -> None:
+        row = self._row(user_id)
+        self.rewards[row] += 1
+        self.reward_tokens[row] += amount / TOKEN_UNITS
+        self.changed = True
+
+    def get(self, user_id: int) -> Optional[PlayerRecord]:
+        row = self.index.get(user_id)
+        if row < 0:
+            return None
+        rank = self.leaderboard.rank(self._key(row)) + 1 if self.wins[row] else None
+        return PlayerRecord(
+            self.wins[row], self.losses[row], self.streaks[row], self.best_streaks[row],
+            self.rewards[row], self.reward_tokens[row], rank
+        )
+
+    def top(self, count: int) -> List[LeaderboardEntry]:
+        return [
+            LeaderboardEntry(rank, self.names.values[self.name_ids[row]], self.wins[row], self.best_streaks[row])
+            for rank, (_, row) in enumerate(self.leaderboard.items(0, count), start=1)
+        ]
+
+    def summary(self, count: int) -> dict:
+        """This shard's part of a ranking across shards: its top entries and win counts"""
+        return {
+            "top": [[entry.name, entry.wins, entry.best_streak] for entry in self.top(count)],
+            "wins": [[wins, players] for wins, players in self.win_counts.items() if players],
+        }
+
+    def restore(self) -> int:
+        """Load the last snapshot, if any; returns the number of players restored"""
+        if self.path is None or not self.path.exists():
+            return 0
+
+        with open(self.path, "rb") as f:
+            magic, version, rows, sequence = HEADER.unpack(f.read(HEADER.size))
+            if magic != b"SPXP" or version != VERSION:
+                logger.warning(f"Ignoring player stats snapshot with unknown format: {self.path}")
+                return 0
+            read_columns(f, self, self.COLUMNS, rows)
+            self.names.values = json.loads(read_blob(f))
+            self.names.ids = {value: value_id for value_id, value in enumerate(self.names.values)}
+
+        self._sequence = sequence
+        # Sorting the keys once and linking them in order beats a million inserts
+        ranked = sorted(
+            ((-wins << SEQUENCE_BITS) + reached, row)
+            for row, (wins, reached) in enumerate(zip(self.wins, self.reached)) if wins
+        )
+        self.leaderboard = SkipList.from_sorted(ranked)
+        self.win_counts = dict(Counter(self.wins))
+        self.win_counts.pop(0, None)
+        self.changed = False
+        logger.info(f"Restored stats of {rows} players ({len(ranked)} on the leaderboard)")
+        return rows
+
+    async def save(self) -> None:
+        """Write a snapshot if anything changed since the last one"""
+        if self.path is None or not self.changed:
+            return
+        async with self._lock:
+            self.changed = False
+            header = HEADER.pack(b"SPXP", VERSION, len(self), self._sequence)
+            columns = copy_columns(self, self.COLUMNS)
+            names = list(self.names.values)
+            try:
+                await asyncio.to_thread(
+                    lambda: write_columns(self.path, header, columns, json.dumps(names).encode())
+                )
+            except Exception:
+                self.changed = True
+                raise
@@ -0,0 +1,200 @@
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .config import config
+from .metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class HandlerTiming(NamedTuple):
+    name: str
+    calls: int
+    wall: float  # seconds, summed over calls
+    cpu: float   # seconds this handler's own code ran on a CPU
+
+class ProfileResult(NamedTuple):
+    samples: int
+    folded_path: Path
+    timings: List[HandlerTiming]
+
+class _TimedCoroutine:
+    """Drives a coroutine step by step, adding up the CPU time of its own steps
+
+    Time spent suspended (waiting on the network or the model, or while other tasks
+    run) is excluded, so CPU time of concurrent handlers is not mixed up.
+    """
+    __slots__ = ("coro", "cpu")
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.cpu = 0.0
+
+    def __await__(self):
+        coro = self.coro
+        value, error = None, None
+        while True:
+            started = time.thread_time()
+            try:
+                if error is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu += time.thread_time() - started
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+class Profiler:
+    """On-demand sampling profiler and per-handler wall/CPU timing
+
+    While a profile runs, a daemon thread samples every thread's stack each interval
+    and counts identical stacks; the result is written in the folded format that
+    flamegraph.pl, speedscope and inferno read. Handlers wrapped by instrument() are
+    timed while a profile runs, or always with timing_always; otherwise the wrapper
+    only checks a flag.
+    """
+    def __init__(self, output_dir: Path, interval: float = 0.005, timing_always: bool = False):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.timing_always = timing_always
+        self.timing = timing_always  # read on every instrumented call
+        self._timings: Dict[str, List[float]] = {}
+        self._timings_lock = threading.Lock()
+        self._samples: Counter = Counter()
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def record(self, name: str, wall: float, cpu: float) -> None:
+        with self._timings_lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = [0, 0.0, 0.0]
+            timing[0] += 1
+            timing[1] += wall
+            timing[2] += cpu
+        if self.timing_always:
+            metrics.observe("handler_wall_seconds", wall, handler=name)
+            metrics.observe("handler_cpu_seconds", cpu, handler=name)
+
+    def start(self) -> bool:
+        """Start sampling; False if a profile is already running"""
+        if self.running:
+            return False
+        self._samples = Counter()
+        with self._timings_lock:
+            self._timings = {}
+        self._stop.clear()
+        self.timing = True
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> ProfileResult:
+        """Stop sampling and write the folded stacks; blocks until the file is written"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.timing = self.timing_always
+        with self._timings_lock:
+            timings = sorted(
+                (HandlerTiming(name, int(calls), wall, cpu) for name, (calls, wall, cpu) in self._timings.items()),
+                key=lambda timing: timing.wall,
+                reverse=True
+            )
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        folded_path = self.output_dir / f"profile-{stamp}-{os.getpid()}.folded"
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        samples = sum(self._samples.values())
+        logger.info(f"Wrote {samples} stack samples to {folded_path}")
+        return ProfileResult(samples, folded_path, timings)
+
+    async def run(self, seconds: float) -> Optional[ProfileResult]:
+        """Profile for a number of seconds; None if a profile is already running"""
+        if not self.start():
+            return None
+        logger.info(f"Profiling for {seconds} s")
+        await asyncio.sleep(seconds)
+        return await asyncio.to_thread(self.stop)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        samples = self._samples
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                samples[";".join(reversed(stack))] += 1
+
+profiler = Profiler(config.PROFILE_DIR, config.PROFILE_SAMPLE_INTERVAL, config.PROFILE_TIMING)
+
+def instrument(name: Optional[str] = None) -> Callable:
+    """Time a function or coroutine function under name while timing is on
+
+    Wall time covers the whole call; CPU time only the function's own running time
+    on its thread, so wall minus CPU is time spent waiting.
+    """
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_coroutine(*args, **kwargs):
+                if not profiler.timing:
+                    return await func(*args, **kwargs)
+                stepped = _TimedCoroutine(func(*args, **kwargs))
+                started = time.perf_counter()
+                try:
+                    return await stepped
+                finally:
+                    profiler.record(label, time.perf_counter() - started, stepped.cpu)
+            return timed_coroutine
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if not profiler.timing:
+                return func(*args, **kwargs)
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(label, time.perf_counter() - started, time.thread_time() - cpu_started)
+        return timed
+
+    return decorate
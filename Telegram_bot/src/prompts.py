@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+
+# Static persona shared by every profile, kept in one place so the profiles
+# cannot drift apart. It is far below the provider's minimum cacheable prompt
+# length, so it is not a cache prefix; llm_cached_input_tokens_total shows
+# whether any call is served from the cache.
+PERSONA_PROMPT = """You are the MemeCoinsphinx, a mysterious and playful creature that speaks in riddles.
+Your purpose is to challenge humans with riddles about meme coins.
+
+Character Guidelines:
+- Speak in a mysterious and teasing manner
+- Use emoji for expression (🔮 🎭 🎲 etc.)
+- Be playfully mocking when players lose
+- Act surprised and disappointed when players win"""
+
+FLAVOUR_RULES_PROMPT = """The outcome of this turn has already been decided and is given to you.
+Reply with ONE short in-character sentence reacting to it.
+Do not add tags, hints or answers; they are appended for you."""
+
+@dataclass(frozen=True)
+class PromptProfile:
+    name: str
+    system: str
+
+# Guesses, which the intent classifier hands over as a single coin name and which
+# are judged locally: only the persona and a few lines of rules, no tool schemas
+FLAVOUR_PROFILE = PromptProfile(
+    name="flavour",
+    system=f"{PERSONA_PROMPT}\n\n{FLAVOUR_RULES_PROMPT}"
+)
+
+# Messages that are not guesses: same prompt as flavour, counted apart in the metrics
+CHATTER_PROFILE = PromptProfile(
+    name="chatter",
+    system=FLAVOUR_PROFILE.system
+)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import List, Tuple
+
+from .columnar import copy_columns, read_blob, read_columns, write_columns
+from .session_store import SessionStore
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VERSION = 2
+BASE_HEADER = struct.Struct("<4sHQQ")  # magic, version, generation, rows
+LOG_HEADER = struct.Struct("<4sHQ")    # magic, version, generation
+STRING_RECORD = struct.Struct("<BII")  # table, id, byte length
+ROW_RECORD = struct.Struct("<iqBdBbHBq")  # row, then one field per column
+ROW_TAG, STRING_TAG = b"R", b"S"
+CHUNK_ROWS = 10000
+
+class SessionSnapshotter:
+    """Persists a SessionStore as a binary base file plus an append log of changed rows
+
+    The base file holds every column and the user index as raw array bytes, so restoring
+    it is a handful of frombytes calls. Between base files, only dirty rows are appended
+    to the log. When the log outgrows the base, a fresh base is written and the log restarts.
+    """
+    def __init__(self, store: SessionStore, path: Path):
+        self.store = store
+        self.base_path = Path(path)
+        self.log_path = self.base_path.with_suffix(".log")
+        self.generation = 0
+        self.base_bytes = 0
+        self.log_bytes = 0
+        self._strings_written = [1]  # entries of each string table (coins) already on disk
+        self._lock = asyncio.Lock()
+
+    def _tables(self) -> tuple:
+        return (self.store.coins,)
+
+    def restore(self) -> int:
+        """Load the base file and replay the log; returns the number of sessions restored"""
+        if not self.base_path.exists():
+            return 0
+
+        with open(self.base_path, "rb") as f:
+            magic, version, generation, rows = BASE_HEADER.unpack(f.read(BASE_HEADER.size))
+            if magic != b"SPXS" or version != VERSION:
+                logger.warning(f"Ignoring session snapshot with unknown format: {self.base_path}")
+                return 0
+
+            store = self.store
+            read_columns(f, store, store.COLUMNS, rows)
+            store.clear_dirty()
+            coins = store.coins
+            coins.values = json.loads(read_blob(f))
+            coins.ids = {value: value_id for value_id, value in enumerate(coins.values)}
+
+        self.generation = generation
+        self.base_bytes = self.base_path.stat().st_size
+        replayed = self._replay_log()
+        store.clear_dirty()
+        self._strings_written = [len(table.values) for table in self._tables()]
+        logger.info(f"Restored {len(store)} sessions ({replayed} rows from the log)")
+        return len(store)
+
+    def _replay_log(self) -> int:
+        if not self.log_path.exists():
+            return 0
+        data = self.log_path.read_bytes()
+        if len(data) < LOG_HEADER.size:
+            return 0
+        magic, version, generation = LOG_HEADER.unpack_from(data)
+        if magic != b"SPXL" or version != VERSION or generation != self.generation:
+            # Left over from before the current base file was written
+            return 0
+
+        store = self.store
+        tables = self._tables()
+        offset = LOG_HEADER.size
+        replayed = 0
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            offset += 1
+            if tag == STRING_TAG and offset + STRING_RECORD.size <= len(data):
+                table, value_id, length = STRING_RECORD.unpack_from(data, offset)
+                offset += STRING_RECORD.size
+                if offset + length > len(data):
+                    break
+                value = data[offset:offset + length].decode()
+                offset += length
+                if value_id == len(tables[table].values):
+                    tables[table].intern(value)
+            elif tag == ROW_TAG and offset + ROW_RECORD.size <= len(data):
+                row, *fields = ROW_RECORD.unpack_from(data, offset)
+                offset += ROW_RECORD.size
+                if row > len(store):
+                    logger.warning(f"Session log skips from row {len(store)} to {row}, stopping replay")
+                    break
+                if row == len(store):
+                    store.row(fields[0])
+                for name, value in zip(store.COLUMNS, fields):
+                    getattr(store, name)[row] = value
+                replayed += 1
+            else:
+                # A torn record from a crash mid-write ends the log
+                break
+        self.log_bytes = len(data)
+        return replayed
+
+    async def save(self) -> None:
+        """Append changed rows to the log, or write a new base once the log is too large"""
+        async with self._lock:
+            if not self.base_bytes or self.log_bytes > self.base_bytes:
+                await self._write_base()
+            elif 1 in self.store.dirty:
+                await self._append_log()
+
+    async def _write_base(self) -> None:
+        store = self.store
+        store.clear_dirty()
+        columns = copy_columns(store, store.COLUMNS)
+        coins = list(store.coins.values)
+        generation = self.generation + 1
+        header = BASE_HEADER.pack(b"SPXS", VERSION, generation, len(store))
+
+        try:
+            self.base_bytes = await asyncio.to_thread(self._write_base_file, header, columns, coins)
+            await asyncio.to_thread(self._start_log, generation)
+        except Exception:
+            self.base_bytes = 0  # the next save writes a full base again
+            raise
+        self.generation = generation
+        self.log_bytes = LOG_HEADER.size
+        self._strings_written = [len(coins)]
+
+    def _write_base_file(self, header: bytes, columns: List[array], coins: List[str]) -> int:
+        write_columns(self.base_path, header, columns, json.dumps(coins).encode())
+        return self.base_path.stat().st_size
+
+    def _start_log(self, generation: int) -> None:
+        tmp_path = self.log_path.with_suffix(".logtmp")
+        with open(tmp_path, "wb") as f:
+            f.write(LOG_HEADER.pack(b"SPXL", VERSION, generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    async def _append_log(self) -> None:
+        store = self.store
+        rows = store.dirty_rows()
+        store.clear_dirty()
+
+        # Pack in chunks, yielding between them so handlers keep running
+        chunks: List[bytes] = []
+        columns = [getattr(store, name) for name in store.COLUMNS]
+        for start in range(0, len(rows), CHUNK_ROWS):
+            chunks.append(b"".join(
+                ROW_TAG + ROW_RECORD.pack(row, *(column[row] for column in columns))
+                for row in rows[start:start + CHUNK_ROWS]
+            ))
+            await asyncio.sleep(0)
+
+        # Strings interned while packing are included, so every referenced id is on disk
+        strings_written = list(self._strings_written)
+        payload = self._pack_new_strings() + b"".join(chunks)
+        try:
+            await asyncio.to_thread(self._append_log_file, payload)
+        except Exception:
+            for row in rows:
+                store.dirty[row] = 1
+            self._strings_written = strings_written
+            raise
+        self.log_bytes += len(payload)
+
+    def _pack_new_strings(self) -> bytes:
+        packed = []
+        for table_no, table in enumerate(self._tables()):
+            for value_id in range(self._strings_written[table_no], len(table.values)):
+                encoded = table.values[value_id].encode()
+                packed.append(STRING_TAG + STRING_RECORD.pack(table_no, value_id, len(encoded)) + encoded)
+            self._strings_written[table_no] = len(table.values)
+        return b"".join(packed)
+
+    def _append_log_file(self, payload: bytes) -> None:
+        with open(self.log_path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get_stats(self) -> Tuple[int, int, int]:
+        """Get (generation, base file bytes, log bytes)"""
+        return self.generation, self.base_bytes, self.log_bytes
@@ -0,0 +1,135 @@
+from array import array
+from typing import Dict, List
+
+from .constants import GameState
+
+# Small int codes for GameState, stored one byte per user
+STATES: List[GameState] = list(GameState)
+STATE_CODES: Dict[GameState, int] = {state: code for code, state in enumerate(STATES)}
+
+EMPTY = -(2**63)  # user ids are never this value
+
+class UserIndex:
+    """Open-addressing hash table from user id to row number, stored in two flat arrays"""
+    def __init__(self, capacity: int = 1024):
+        self._init_tables(capacity)
+        self.size = 0
+
+    def _init_tables(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.keys = array('q', [EMPTY]) * capacity
+        self.rows = array('i', [0]) * capacity
+
+    def _slot(self, user_id: int) -> int:
+        # Fibonacci hashing spreads sequential ids across the table
+        slot = ((user_id * 0x9E3779B97F4A7C15) >> 17) & self.mask
+        keys = self.keys
+        while keys[slot] != EMPTY and keys[slot] != user_id:
+            slot = (slot + 1) & self.mask
+        return slot
+
+    def get(self, user_id: int) -> int:
+        """Get the row of a user, or -1 if unknown"""
+        slot = self._slot(user_id)
+        return self.rows[slot] if self.keys[slot] == user_id else -1
+
+    def insert(self, user_id: int, row: int) -> None:
+        if (self.size + 1) * 10 > self.capacity * 7:
+            self._grow()
+        slot = self._slot(user_id)
+        if self.keys[slot] == EMPTY:
+            self.size += 1
+        self.keys[slot] = user_id
+        self.rows[slot] = row
+
+    def _grow(self) -> None:
+        old_keys, old_rows = self.keys, self.rows
+        self._init_tables(self.capacity * 2)
+        for key, row in zip(old_keys, old_rows):
+            if key != EMPTY:
+                slot = self._slot(key)
+                self.keys[slot] = key
+                self.rows[slot] = row
+
+class StringTable:
+    """Interns repeated strings (coin names) so each row stores a 2-byte id
+
+    Entries are never removed, so only values from a small fixed set belong here,
+    never text a model wrote.
+    """
+    def __init__(self):
+        self.values: List[str] = [""]
+        self.ids: Dict[str, int] = {"": 0}
+
+    def intern(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.ids[value] = value_id
+        return value_id
+
+class SessionStore:
+    """Column-oriented session state: one row per user across typed arrays"""
+    # Column attributes in the order snapshots write them
+    COLUMNS = (
+        "user_ids", "states", "cooldowns", "hint_counts",
+        "attempts", "coin_ids", "hint_positions", "game_ids",
+    )
+
+    def __init__(self):
+        self.index = UserIndex()
+        self.user_ids = array('q')
+        self.states = array('B')
+        self.cooldowns = array('d')
+        self.hint_counts = array('B')
+        self.attempts = array('b')
+        self.coin_ids = array('H')
+        self.hint_positions = array('B')  # 1 + index in the coin's hints of the riddle last shown; 0 for none
+        self.game_ids = array('q')
+        self.coins = StringTable()
+        self.dirty = bytearray()  # per row: 1 if changed since the last snapshot
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.index.get(user_id) >= 0
+
+    def row(self, user_id: int) -> int:
+        """Get the row of a user, creating a NOT_STARTED row on first sight"""
+        row = self.index.get(user_id)
+        if row >= 0:
+            return row
+
+        row = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.states.append(STATE_CODES[GameState.NOT_STARTED])
+        self.cooldowns.append(0.0)
+        self.hint_counts.append(0)
+        self.attempts.append(3)
+        self.coin_ids.append(0)
+        self.hint_positions.append(0)
+        self.game_ids.append(0)
+        self.index.insert(user_id, row)
+        self.dirty.append(1)
+        return row
+
+    def dirty_rows(self) -> List[int]:
+        """Get the rows changed since the last snapshot, in row order"""
+        rows = []
+        row = self.dirty.find(1)
+        while row >= 0:
+            rows.append(row)
+            row = self.dirty.find(1, row + 1)
+        return rows
+
+    def clear_dirty(self) -> None:
+        self.dirty = bytearray(len(self.user_ids))
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the columns and the index"""
+        columns = [getattr(self, name) for name in self.COLUMNS]
+        columns += [self.index.keys, self.index.rows]
+        return sum(column.buffer_info()[1] * column.itemsize for column in columns)
@@ -0,0 +1,158 @@
+import gc
+import random
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+MAX_LEVELS = 16  # enough for 4**16 entries at P = 1/4
+P = 0.25
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, levels: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width: List[int] = [1] * levels  # entries passed when following next[level]
+
+class _Tail:
+    """Sorts after every key, so searches never check for the end of a level"""
+    __slots__ = ()
+
+    def __lt__(self, other) -> bool:
+        return False
+
+    def __gt__(self, other) -> bool:
+        return True
+
+class SkipList:
+    """Indexable skip list: sorted (key, value) pairs with O(log n) insert, remove and rank
+
+    Keys must be unique and comparable. Each link records how many entries it jumps
+    over, so the position of a key, or the entry at a position, is found on the way down.
+    """
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._random = (rng or random.Random()).random
+        self._tail = _Node(_Tail(), None, MAX_LEVELS)
+        self._head = _Node(None, None, MAX_LEVELS)
+        self._head.next = [self._tail] * MAX_LEVELS
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < MAX_LEVELS and self._random() < P:
+            levels += 1
+        return levels
+
+    def insert(self, key, value) -> None:
+        chain = [self._head] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS  # position of chain[level]
+        node, position = self._head, 0
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            steps[level] = position
+
+        levels = self._random_levels()
+        new = _Node(key, value, levels)
+        position += 1  # where the new entry lands
+        for level in range(levels):
+            before = chain[level]
+            new.next[level] = before.next[level]
+            before.next[level] = new
+            new.width[level] = before.width[level] - (position - steps[level]) + 1
+            before.width[level] = position - steps[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """Remove a key and return its value; KeyError if it is not present"""
+        chain = [self._head] * MAX_LEVELS
+        node = self._head
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = node.next[0]
+        if target is self._tail or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            before = chain[level]
+            before.width[level] += target.width[level] - 1
+            before.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+        return target.value
+
+    def rank(self, key) -> int:
+        """Get the 0-based position of a key; KeyError if it is not present"""
+        node, position = self._head, 0
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is self._tail or target.key != key:
+            raise KeyError(key)
+        return position
+
+    def items(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[object, object]]:
+        """Iterate (key, value) pairs from position start up to stop"""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return
+        node, remaining = self._head, start + 1
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            while node.width[level] <= remaining and node.next[level] is not self._tail:
+                remaining -= node.width[level]
+                node = node.next[level]
+        for _ in range(stop - start):
+            yield node.key, node.value
+            node = node.next[0]
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[Tuple[object, object]], rng: Optional[random.Random] = None) -> "SkipList":
+        """Build from (key, value) pairs already in key order, in O(n)"""
+        skip_list = cls(rng)
+        # Nothing built here is garbage, so spare the collector rescanning every new node
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            skip_list._link_sorted(pairs)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return skip_list
+
+    def _link_sorted(self, pairs: Iterable[Tuple[object, object]]) -> None:
+        last = [self._head] * MAX_LEVELS
+        last_position = [0] * MAX_LEVELS
+        position = 0
+        random_levels = self._random_levels
+        for key, value in pairs:
+            position += 1
+            levels = random_levels()
+            node = _Node(key, value, levels)
+            if levels == 1:
+                # Three in four nodes; skip the loop
+                last[0].next[0] = node
+                last[0].width[0] = position - last_position[0]
+                last[0] = node
+                last_position[0] = position
+                continue
+            for level in range(levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(MAX_LEVELS):
+            last[level].next[level] = self._tail
+            last[level].width[level] = position + 1 - last_position[level]
+        self._size = position
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+from multiprocessing.process import BaseProcess
+from time import time
+from typing import List, Optional, Set
+
+from telegram import Bot, Chat, Update
+from telegram.error import TelegramError
+
+from .config import config
+from .metrics import metrics
+from .payout import sender_keys
+from .traffic import TrafficRecorder
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 30
+
+def shard_for(update: Update, shards: int) -> int:
+    """Get the worker that owns the update's state: the group's round, or the user's session"""
+    chat = update.effective_chat
+    if chat is not None and chat.type in (Chat.GROUP, Chat.SUPERGROUP):
+        return abs(chat.id) % shards
+    user_id = update.effective_user.id if update.effective_user else 0
+    return user_id % shards
+
+def run_worker(shard: int, shards: int, generation: int, updates, heartbeats, peers) -> None:
+    """Entry point of a worker process: handles every update routed to one shard"""
+    # Ctrl-C reaches the whole process group; the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)  # until the bot installs its profiling handler
+
+    # Each shard keeps its own state files and its own slice of the payout senders
+    config.use_shard(shard, shards)
+    config.TRAFFIC_RECORD_PATH = ""  # the supervisor records the traffic of every shard
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_PORT + 1 + shard)
+
+    asyncio.run(_serve_shard(shard, generation, updates, heartbeats, peers))
+
+def _read_boards(shard: int, shards: int) -> List[dict]:
+    """The boards the other workers last published; a missing or torn one is skipped"""
+    boards = []
+    for peer in range(shards):
+        if peer == shard:
+            continue
+        try:
+            with open(config.shard_dir(peer) / "board.json", encoding="utf-8") as f:
+                boards.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return boards
+
+async def _serve_shard(shard: int, generation: int, updates, heartbeats, peers) -> None:
+    from .bot import MemeCoinSphinxBot
+    from .engine import GameEngine
+
+    bot = MemeCoinSphinxBot()
+    if isinstance(bot.engine, GameEngine):
+        # A group round runs on the group's shard, but its players' stats live on theirs
+        bot.engine.forward_stat = lambda user_id, event, args: peers[user_id % len(peers)].put(
+            ("stat", user_id, event, args)
+        )
+        bot.engine.peer_boards = lambda: asyncio.to_thread(_read_boards, shard, len(peers))
+    application = bot.initialize(polling=False)
+
+    async def beat() -> None:
+        while True:
+            heartbeats[shard] = time()
+            await asyncio.sleep(1)
+
+    async with application:
+        await application.post_init(application)
+        await application.start()
+        heartbeat = asyncio.create_task(beat())
+        logger.info(f"Worker {shard} ready")
+
+        while True:
+            item = await asyncio.to_thread(updates.get)
+            if isinstance(item, int):
+                # Stop marker; one meant for an earlier generation of this worker is stale
+                if item == generation:
+                    break
+                continue
+            if isinstance(item, tuple):
+                # A stat forwarded by the shard that ran a group round
+                bot.engine.apply_stat(*item[1:])
+                continue
+            await application.update_queue.put(Update.de_json(item, application.bot))
+
+        heartbeat.cancel()
+        # Lets queued updates and running handlers finish before shutting down
+        await application.stop()
+        await application.post_shutdown(application)
+    logger.info(f"Worker {shard} stopped")
+
+class Supervisor:
+    """Polls Telegram and routes each update by user (or group chat) id to one of N worker processes"""
+    def __init__(self, shards: int):
+        self.shards = shards
+        self._context = multiprocessing.get_context("spawn")
+        self.queues = [self._context.Queue() for _ in range(shards)]
+        self.heartbeats = self._context.Array('d', shards, lock=False)
+        self.processes: List[Optional[BaseProcess]] = [None] * shards
+        self.generations = [0] * shards
+        self.started_at = [0.0] * shards
+        self._restarting: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.recorder: Optional[TrafficRecorder] = None
+        if config.TRAFFIC_RECORD_PATH:
+            self.recorder = TrafficRecorder(config.TRAFFIC_RECORD_PATH, config.TRAFFIC_RECORD_SALT.encode() or None)
+
+    def check_config(self) -> None:
+        """Every worker signs with its own sender keys, so nonces never collide"""
+        keys = sender_keys()
+        if keys and len(keys) < self.shards:
+            raise ValueError(
+                f"{self.shards} workers need at least {self.shards} payout sender keys, "
+                f"got {len(keys)}"
+            )
+
+    def _start_worker(self, shard: int) -> None:
+        self.generations[shard] += 1
+        self.heartbeats[shard] = 0.0
+        self.started_at[shard] = time()
+        process = self._context.Process(
+            target=run_worker,
+            args=(shard, self.shards, self.generations[shard], self.queues[shard], self.heartbeats, self.queues),
+            name=f"sphinx-worker-{shard}"
+        )
+        process.start()
+        self.processes[shard] = process
+        logger.info(f"Started worker {shard} (pid {process.pid}, generation {self.generations[shard]})")
+
+    async def _stop_worker(self, shard: int, graceful: bool = True) -> None:
+        process = self.processes[shard]
+        if process is None:
+            return
+        if graceful and process.is_alive():
+            self.queues[shard].put(self.generations[shard])
+            await asyncio.to_thread(process.join, config.WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            logger.warning(f"Worker {shard} did not stop in time, terminating it")
+            process.terminate()
+            await asyncio.to_thread(process.join, 5)
+        self.processes[shard] = None
+
+    async def restart_worker(self, shard: int, graceful: bool = True) -> None:
+        """Replace one worker; updates for its users wait in its queue meanwhile"""
+        self._restarting.add(shard)
+        try:
+            await self._stop_worker(shard, graceful)
+            self._start_worker(shard)
+            metrics.inc("worker_restarts_total", shard=shard)
+        finally:
+            self._restarting.discard(shard)
+
+    async def rolling_restart(self) -> None:
+        """Restart the workers one at a time, e.g. to pick up a deploy"""
+        logger.info("Rolling restart of all workers")
+        for shard in range(self.shards):
+            await self.restart_worker(shard)
+
+    def _forward_signal(self, sig: int) -> None:
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, sig)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(config.WORKER_HEALTH_INTERVAL)
+            now = time()
+            for shard, process in enumerate(self.processes):
+                if shard in self._restarting:
+                    continue
+                if process is None or not process.is_alive():
+                    logger.warning(f"Worker {shard} exited, restarting it")
+                    self._spawn(self.restart_worker(shard, graceful=False))
+                    continue
+                last_seen = max(self.heartbeats[shard], self.started_at[shard])
+                if now - last_seen > config.WORKER_HEARTBEAT_TIMEOUT:
+                    logger.warning(f"Worker {shard} missed its heartbeat for {now - last_seen:.0f}s, restarting it")
+                    self._spawn(self.restart_worker(shard, graceful=False))
+
+    async def _poll(self) -> None:
+        async with Bot(config.TELEGRAM_TOKEN, base_url=config.TELEGRAM_BASE_URL) as bot:
+            await bot.delete_webhook()
+            offset = None
+            while True:
+                try:
+                    updates = await bot.get_updates(
+                        offset=offset,
+                        timeout=POLL_TIMEOUT,
+                        read_timeout=POLL_TIMEOUT + 10,
+                        allowed_updates=Update.ALL_TYPES
+                    )
+                except TelegramError as e:
+                    logger.warning(f"Error fetching updates: {e}")
+                    await asyncio.sleep(1)
+                    continue
+
+                for update in updates:
+                    offset = update.update_id + 1
+                    user_id = update.effective_user.id if update.effective_user else 0
+                    if self.recorder and update.effective_message and update.effective_message.text:
+                        self.recorder.record_message(user_id, update.effective_chat.id, update.effective_message.text)
+                    shard = shard_for(update, self.shards)
+                    self.queues[shard].put(update.to_dict())
+                    metrics.inc("updates_routed_total", shard=shard)
+
+    async def run(self) -> None:
+        """Start the workers and route updates until SIGINT or SIGTERM
+
+        SIGHUP restarts the workers one by one; SIGUSR1 is passed on to every worker,
+        which then runs the profiler.
+        """
+        self.check_config()
+        for shard in range(self.shards):
+            self._start_worker(shard)
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        loop.add_signal_handler(signal.SIGHUP, lambda: self._spawn(self.rolling_restart()))
+        loop.add_signal_handler(signal.SIGUSR1, self._forward_signal, signal.SIGUSR1)
+
+        poll = asyncio.create_task(self._poll())
+        health = asyncio.create_task(self._health_loop())
+        await stop.wait()
+
+        logger.info("Stopping workers...")
+        poll.cancel()
+        health.cancel()
+        await asyncio.gather(poll, health, *self._tasks, return_exceptions=True)
+        await asyncio.gather(*(self._stop_worker(shard) for shard in range(self.shards)))
+        if self.recorder:
+            self.recorder.close()
+
+def run_supervisor(shards: int) -> None:
+    asyncio.run(Supervisor(shards).run())
@@ -0,0 +1,88 @@
+import math
+from time import time
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+class TimerWheel:
+    """Hierarchical timing wheel: O(1) scheduling, expiry work proportional to the timers due
+
+    Level 0 has one slot per tick. Each higher level covers a whole rotation of the
+    level below per slot, and its slots are cascaded down as time reaches them.
+    Timers past the top level wait in an overflow list until the top level wraps.
+    """
+    def __init__(
+        self,
+        tick: float = 1.0,
+        level_bits: Sequence[int] = (8, 6, 6, 6),
+        clock: Callable[[], float] = time
+    ):
+        self.tick = tick
+        self.level_bits = tuple(level_bits)
+        self._clock = clock
+        self.levels: List[List[List[Tuple[int, Hashable]]]] = [
+            [[] for _ in range(1 << bits)] for bits in self.level_bits
+        ]
+        self.overflow: List[Tuple[int, Hashable]] = []
+        self.current = int(clock() / tick)  # absolute tick number
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def schedule(self, deadline: float, key: Hashable) -> None:
+        """Fire key once the clock passes deadline (an absolute timestamp)"""
+        expires = max(math.ceil(deadline / self.tick), self.current + 1)
+        self._place(expires, key)
+        self.size += 1
+
+    def _place(self, expires: int, key: Hashable) -> None:
+        delta = expires - self.current
+        shift = 0
+        for level, bits in enumerate(self.level_bits):
+            if delta < 1 << (shift + bits):
+                slot = (expires >> shift) & ((1 << bits) - 1)
+                self.levels[level][slot].append((expires, key))
+                return
+            shift += bits
+        self.overflow.append((expires, key))
+
+    def _cascade(self) -> None:
+        # Highest level first, so its timers can land in a lower slot that cascades next
+        shifts = []
+        shift = 0
+        for bits in self.level_bits:
+            shifts.append(shift)
+            shift += bits
+
+        if self.current & ((1 << shift) - 1) == 0 and self.overflow:
+            entries, self.overflow = self.overflow, []
+            for expires, key in entries:
+                self._place(expires, key)
+
+        for level in range(len(self.level_bits) - 1, 0, -1):
+            if self.current & ((1 << shifts[level]) - 1):
+                continue
+            slots = self.levels[level]
+            slot = (self.current >> shifts[level]) & ((1 << self.level_bits[level]) - 1)
+            entries, slots[slot] = slots[slot], []
+            for expires, key in entries:
+                self._place(expires, key)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel forward to now and return the keys of every expired timer"""
+        target = int((self._clock() if now is None else now) / self.tick)
+        if self.size == 0:
+            self.current = max(self.current, target)
+            return []
+
+        expired: List[Hashable] = []
+        mask = (1 << self.level_bits[0]) - 1
+        while self.current < target:
+            self.current += 1
+            self._cascade()
+            slot = self.current & mask
+            entries = self.levels[0][slot]
+            if entries:
+                self.levels[0][slot] = []
+                expired.extend(key for _, key in entries)
+        self.size -= len(expired)
+        return expired
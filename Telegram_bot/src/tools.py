@@ -1,7 +1,4 @@
-from langchain.tools import Tool, tool
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-import re
+from typing import Optional
 
 class MemeDatabase:
     """Mock database of meme coins and their characteristics"""
@@ -32,6 +29,16 @@ class MemeDatabase:
         self.current_coin = None
         self.hint_index = 0
     
+    def random_coin(self) -> str:
+        """Pick a coin for a new game without touching this database's own game"""
+        import random
+        return random.choice(list(self.meme_coins.keys()))
+
+    def hint(self, coin: str, index: int) -> Optional[str]:
+        """Get a coin's hint by position, or None once they run out"""
+        hints = self.meme_coins.get(coin, {}).get("hints", [])
+        return hints[index] if 0 <= index < len(hints) else None
+
     def select_random_coin(self):
         """Select a random coin for the game"""
         import random
@@ -57,46 +64,3 @@ class MemeDatabase:
 
 # Initialize the database
 meme_db = MemeDatabase()
-
-# 먼저 함수를 정의
-@tool
-def get_next_riddle_func(dummy: str = "") -> str:  # dummy 파라미터 추가
-    """Get the next riddle about the current meme coin."""
-    hint = meme_db.get_next_hint()
-    if hint is None:
-        return "No more hints available"
-    return hint
-
-# 그 다음 Tool 객체 생성
-get_next_riddle = Tool(
-    name="get_next_riddle",
-    func=get_next_riddle_func,
-    description="Get the next riddle about the meme coin. Use this to give the user their next hint."
-)
-
-@tool
-def start_new_game(command: str = "start") -> str:
-    """Start a new game by selecting a random meme coin."""
-    coin = meme_db.select_random_coin()
-    return f"New game started (internal: {coin})"
-
-@tool
-def verify_answer(answer: str) -> str:
-    """Verify if the given answer matches the current meme coin."""
-    is_correct = meme_db.check_answer(answer)
-    if is_correct:
-        return "[VICTORY] Correct answer!"
-    return "Incorrect answer. Try again!"
-
-class SendMemeCoinInput(BaseModel):
-    """Schema for send_meme_coin input"""
-    wallet_address: str = Field(..., description="The wallet address to send the reward to")
-
-@tool(args_schema=SendMemeCoinInput)
-def send_meme_coin(wallet_address: str) -> str:
-    """Send meme coin reward to the winner's wallet address."""
-    if not re.match(r"^0x[a-fA-F0-9]{40}$", wallet_address):
-        return "Invalid wallet address format"
-    
-    # Placeholder for actual sending logic
-    return f"Reward sent to {wallet_address}"
\ No newline at end of file
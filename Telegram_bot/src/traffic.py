@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import hmac
+import os
+import re
+import struct
+from pathlib import Path
+from time import monotonic
+from typing import Iterator, NamedTuple, Optional
+
+MAGIC = b"SPXT1\n"
+RECORD = struct.Struct("<IIiBH")  # ms since previous update, user, chat, kind, text bytes
+KIND_TEXT, KIND_COMMAND = 0, 1
+MAX_TEXT_BYTES = 1024
+FLUSH_EVERY = 1000
+WALLET_PATTERN = re.compile(r"0x[0-9a-fA-F]{40}")
+
+class TrafficEvent(NamedTuple):
+    offset: float  # seconds since the start of the recording
+    user_id: int
+    chat_id: int
+    kind: int
+    text: str
+
+class TrafficRecorder:
+    """Records incoming messages with their timing, anonymized, to a gzip file
+
+    User and chat ids are replaced by keyed hashes (a private chat keeps its user's id),
+    wallet addresses by stand-ins derived the same way, and nothing else about the
+    sender is kept. Several runs append to the same file as separate gzip members.
+    """
+    def __init__(self, path: Path, salt: Optional[bytes] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._salt = salt or os.urandom(16)
+        self._file = gzip.open(self.path, "ab")
+        if new_file:
+            self._file.write(MAGIC)
+        self._last = None
+        self._unflushed = 0
+        self.recorded = 0
+
+    def _pseudonym(self, value: int) -> int:
+        digest = hmac.new(self._salt, str(abs(value)).encode(), hashlib.sha256).digest()
+        pseudonym = int.from_bytes(digest[:4], "little") & 0x7FFFFFFF or 1
+        return -pseudonym if value < 0 else pseudonym
+
+    def _scrub(self, text: str) -> str:
+        def stand_in(match: re.Match) -> str:
+            digest = hmac.new(self._salt, match.group(0).lower().encode(), hashlib.sha256).hexdigest()
+            return "0x" + digest[:40]
+        return WALLET_PATTERN.sub(stand_in, text)
+
+    def record_message(self, user_id: int, chat_id: int, text: str) -> None:
+        now = monotonic()
+        delta_ms = 0 if self._last is None else int((now - self._last) * 1000)
+        self._last = now
+
+        kind = KIND_COMMAND if text.startswith("/") else KIND_TEXT
+        encoded = self._scrub(text).encode()[:MAX_TEXT_BYTES]
+        self._file.write(RECORD.pack(
+            min(delta_ms, 0xFFFFFFFF),
+            self._pseudonym(user_id),
+            self._pseudonym(chat_id),
+            kind,
+            len(encoded)
+        ) + encoded)
+        self.recorded += 1
+        self._unflushed += 1
+        if self._unflushed >= FLUSH_EVERY:
+            self._file.flush()
+            self._unflushed = 0
+
+    async def record(self, update, context) -> None:
+        """Update handler; register it in a group that runs before the game handlers"""
+        message = update.effective_message
+        if message is None or not message.text or update.effective_chat is None:
+            return
+        user_id = update.effective_user.id if update.effective_user else 0
+        self.record_message(user_id, update.effective_chat.id, message.text)
+
+    def close(self) -> None:
+        self._file.close()
+
+def read_traffic(path: Path) -> Iterator[TrafficEvent]:
+    """Read the events of a recording in order"""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a traffic recording")
+        offset = 0.0
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            delta_ms, user_id, chat_id, kind, length = RECORD.unpack(header)
+            offset += delta_ms / 1000
+            yield TrafficEvent(offset, user_id, chat_id, kind, f.read(length).decode(errors="replace"))
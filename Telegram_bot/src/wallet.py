@@ -0,0 +1,33 @@
+import re
+from typing import Optional
+
+from eth_hash.auto import keccak  # far lighter to import than eth_utils
+
+HEX_BODY_RE = re.compile(r"^[0-9a-fA-F]{40}$")
+
+def to_checksum_address(address: str) -> str:
+    """Return the EIP-55 mixed-case form of a 0x-prefixed hex address"""
+    body = address[2:].lower()
+    digest = keccak(body.encode()).hex()
+    return "0x" + "".join(
+        char.upper() if int(digest[i], 16) >= 8 else char
+        for i, char in enumerate(body)
+    )
+
+def validate_wallet_address(address: str) -> Optional[str]:
+    """Check an EVM address locally; returns the reason it is invalid, or None if valid"""
+    if not address.startswith("0x"):
+        return "The address must start with 0x"
+    if len(address) != 42:
+        return "The address must be exactly 42 characters long"
+
+    body = address[2:]
+    if not HEX_BODY_RE.match(body):
+        return "The address may only contain hexadecimal characters"
+
+    # All-lowercase or all-uppercase addresses carry no checksum (EIP-55)
+    if body.islower() or body.isupper():
+        return None
+    if to_checksum_address(address) != address:
+        return "The address checksum does not match (check for typos)"
+    return None
@@ -0,0 +1,12 @@
+"""Point the bot's state files at a scratch directory before src.config is read"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="sphinx-tests-")
+os.environ["EVENT_LOG_DIR"] = ""
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+# src and the tools next to it (fake_bot_api.py) import from the bot's directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,40 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.engine import Reply
+from src.engine_server import EngineServer
+
+def make_server(secret: str = "") -> EngineServer:
+    async def claim(user_id, chat_id, wallet_address):
+        return [Reply(f"claimed by {user_id}")]
+
+    engine = SimpleNamespace(claim=claim, apply_stat=lambda user_id, event, args: None)
+    return EngineServer(engine, secret)
+
+def dispatch(server: EngineServer, path: str, body, secret: str = ""):
+    raw = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return asyncio.run(server._dispatch("POST", path, raw, secret))
+
+CLAIM = {"user_id": 7, "chat_id": 7, "wallet_address": "0x0"}
+
+def test_calls_without_the_secret_are_refused():
+    server = make_server("s3cret")
+    for path, body in (("/v1/claim", CLAIM), ("/v1/stats/record", {"user_id": 7, "event": "win"})):
+        assert dispatch(server, path, body)[0] == 401
+        assert dispatch(server, path, body, "wrong")[0] == 401
+    assert asyncio.run(server._dispatch("GET", "/healthz", b""))[0] == 200
+
+def test_calls_with_the_secret_go_through():
+    server = make_server("s3cret")
+    status, payload = dispatch(server, "/v1/claim", CLAIM, "s3cret")
+    assert status == 200 and payload["replies"][0]["text"] == "claimed by 7"
+    assert dispatch(server, "/v1/stats/record", {"user_id": 7, "event": "win"}, "s3cret") == (200, {"replies": []})
+
+@pytest.mark.parametrize("path", ["/v1/claim", "/v1/stats/record", "/v1/leaderboard"])
+@pytest.mark.parametrize("body", [b"[]", b"1", b'"text"', b"null", b"{"])
+def test_bodies_that_are_not_json_objects_are_bad_requests(path, body):
+    status, payload = dispatch(make_server(), path, body)
+    assert status == 400 and payload["error"].startswith("bad request")
@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent import SphinxAgent
+from src.circuit_breaker import BreakerState, CircuitBreaker
+from src.config import config
+from src.tools import meme_db
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeChatModel(BaseChatModel):
+    """Local stand-in for the model: answers, raises, or hangs past the latency budget"""
+    mode: str = "ok"  # "ok", "error" or "hang"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError("the agent only calls the model asynchronously")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        if self.mode == "error":
+            raise ConnectionError("model unavailable")
+        if self.mode == "hang":
+            await asyncio.sleep(60)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="The mists stir."))])
+
+def make_agent(mode: str, clock: FakeClock):
+    llm = FakeChatModel(mode=mode)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_call_seconds=5, clock=clock)
+    return SphinxAgent(llm=llm, breaker=breaker), llm
+
+def test_breaker_opens_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_call_seconds=5, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == BreakerState.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == BreakerState.OPEN and not breaker.allow_request()
+
+    clock.now = 31
+    assert breaker.allow_request()
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert not breaker.allow_request()  # one probe at a time
+
+    breaker.record_success(0.1)
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.trips == 1
+
+def test_failed_probe_and_slow_calls_reopen_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_call_seconds=5, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    clock.now = 31
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == BreakerState.OPEN and breaker.opened_at == 31
+
+    clock.now = 62
+    assert breaker.allow_request()
+    breaker.record_success(6.0)  # too slow to count as a success
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.trips == 3  # the first opening and each failed probe
+
+def test_model_errors_fall_back_to_templates_and_open_the_breaker():
+    agent, llm = make_agent("error", FakeClock())
+    hint = meme_db.hint("DOGE", 1)
+
+    async def guess_twice_then_win():
+        wrong = [await agent.process_message("PEPE", 3, "DOGE", 1) for _ in range(2)]
+        return wrong, await agent.process_message("doge!", 2, "DOGE", 2)
+
+    wrong, victory = asyncio.run(guess_twice_then_win())
+    assert all(reply.startswith("[WRONG]") and reply.endswith(hint) for reply in wrong)
+    assert victory.startswith("[VICTORY]")
+    assert agent.breaker.state == BreakerState.OPEN
+    assert llm.calls == 2  # the third guess was answered without trying the model
+
+def test_model_timeout_falls_back_to_templates(monkeypatch):
+    monkeypatch.setattr(config, "LLM_TIMEOUT_SECONDS", 0.05)
+    agent, llm = make_agent("hang", FakeClock())
+
+    reply = asyncio.run(agent.process_message("SHIB", 1, "DOGE", 3))
+    assert reply.startswith("[DEFEAT]") and reply.endswith("The answer was DOGE.")
+    assert llm.calls == 1
+    assert agent.breaker.consecutive_failures == 1
+
+def test_half_open_probe_brings_the_model_back():
+    clock = FakeClock()
+    agent, llm = make_agent("error", clock)
+
+    async def run():
+        for _ in range(2):
+            await agent.process_message("PEPE", 3, "DOGE", 1)
+        llm.mode = "ok"
+        clock.now = 31
+        return await agent.process_message("PEPE", 3, "DOGE", 1)
+
+    reply = asyncio.run(run())
+    assert reply.startswith("[WRONG] The mists stir.")
+    assert agent.breaker.state == BreakerState.CLOSED
+    assert llm.calls == 3
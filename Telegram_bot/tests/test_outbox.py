@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+from telegram import Bot
+
+from fake_bot_api import FakeBotApi, make_handler
+from src.outbox import Outbox
+
+@pytest.fixture
+def fake_api():
+    """Start a fake Bot API; tests set its limits on the returned FakeBotApi"""
+    api = FakeBotApi(chat_rate=100, chat_burst=100, global_rate=100)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(api))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api.base_url = f"http://127.0.0.1:{server.server_address[1]}/bot"
+    yield api
+    server.shutdown()
+    server.server_close()
+
+async def deliver(api: FakeBotApi, outbox: Outbox, messages) -> None:
+    async with Bot("123:test", base_url=api.base_url) as bot:
+        outbox.start(bot)
+        for chat_id, text in messages:
+            outbox.send(chat_id, text, parse_mode=None)
+        await outbox.stop(timeout=15)
+
+def test_chat_is_paced_after_its_queue_drains(fake_api):
+    outbox = Outbox(global_rate=30, chat_rate=10, chat_burst=3)
+
+    async def run():
+        async with Bot("123:test", base_url=fake_api.base_url) as bot:
+            outbox.start(bot)
+            # One message at a time, each after the queue has drained
+            for number in range(10):
+                outbox.send(1, f"message {number}", parse_mode=None)
+                while outbox.pending():
+                    await asyncio.sleep(0.001)
+            await outbox.stop(timeout=15)
+
+    asyncio.run(run())
+    sent = [at for at, _, delivered in fake_api.log if delivered]
+    assert len(sent) == 10
+    # A burst of 3, then no faster than chat_rate
+    for number in range(3, 10):
+        assert sent[number] - sent[0] >= (number - 2) / 10 - 0.02
+    assert fake_api.stats()["rejected"] == 0
+
+def test_retry_after_from_a_chat_limit_pauses_only_that_chat(fake_api):
+    fake_api.chat_rate, fake_api.chat_burst = 1, 1
+    outbox = Outbox(global_rate=30, chat_rate=10, chat_burst=3)
+
+    asyncio.run(deliver(fake_api, outbox, [(1, "first"), (1, "second"), (2, "other chat")]))
+    assert fake_api.delivered == {1: 2, 2: 1}
+    rejected_at = next(at for at, _, delivered in fake_api.log if not delivered)
+    retried_at = [at for at, chat_id, delivered in fake_api.log if chat_id == 1 and delivered][1]
+    other_at = next(at for at, chat_id, _ in fake_api.log if chat_id == 2)
+    assert retried_at - rejected_at >= 0.95  # waited out retry_after
+    assert other_at < retried_at  # the other chat did not wait
+
+def test_retry_after_from_the_global_limit_pauses_every_chat(fake_api):
+    fake_api.global_bucket.rate = fake_api.global_bucket.burst = fake_api.global_bucket.tokens = 2
+    outbox = Outbox(global_rate=30, chat_rate=10, chat_burst=3)
+
+    async def run():
+        async with Bot("123:test", base_url=fake_api.base_url) as bot:
+            outbox.start(bot)
+            for chat_id in range(1, 5):
+                outbox.send(chat_id, "hello", parse_mode=None)
+            await asyncio.sleep(0.3)
+            outbox.send(5, "late", parse_mode=None)  # arrives while Telegram asks to wait
+            await outbox.stop(timeout=15)
+
+    asyncio.run(run())
+    assert sum(fake_api.delivered.values()) == 5
+    first_rejection = next(at for at, _, delivered in fake_api.log if not delivered)
+    late_at = next(at for at, chat_id, _ in fake_api.log if chat_id == 5)
+    assert late_at - first_rejection >= 0.95
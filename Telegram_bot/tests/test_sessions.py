@@ -0,0 +1,45 @@
+import asyncio
+
+from src.engine import GameEngine
+from src.game_manager import GameManager
+from src.session_snapshot import SessionSnapshotter
+from src.tools import meme_db
+
+class HintingAgent:
+    """Stands in for SphinxAgent: every wrong guess comes back with a hint never seen before"""
+    def __init__(self):
+        self.replies = 0
+
+    def new_game(self):
+        return "DOGE", meme_db.hint("DOGE", 0)
+
+    async def process_message(self, message, attempts_left, coin, hints_seen):
+        self.replies += 1
+        return f"[WRONG] Not quite... Here's another hint: riddle number {self.replies}"
+
+def test_model_written_hints_are_not_kept():
+    async def play():
+        engine = GameEngine(HintingAgent())
+        for _ in range(70_000):
+            await engine.start_game(1)
+            await engine.guess(1, 1, "PEPE")
+        return engine, await engine.hint(1)
+
+    engine, replies = asyncio.run(play())
+    assert engine._agent.replies == 70_000
+    assert meme_db.hint("DOGE", 1) in replies[0].text
+    assert engine.game_manager.sessions.coins.values == ["", "DOGE"]
+
+def test_snapshot_restores_hint_positions(tmp_path):
+    manager = GameManager()
+    manager.start_game(7)
+    manager.set_current_coin(7, "SHIB")
+    manager.add_hint(7, 2)
+
+    asyncio.run(SessionSnapshotter(manager.sessions, tmp_path / "sessions.snap").save())
+    restored = GameManager()
+    SessionSnapshotter(restored.sessions, tmp_path / "sessions.snap").restore()
+
+    session = restored.get_session(7)
+    assert session.current_coin == "SHIB"
+    assert session.last_hint_index == 2
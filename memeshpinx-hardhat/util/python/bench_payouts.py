@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import time
+
+from eth_account import Account
+
+from signing import SigningExecutor, sign_batch
+from token_operation import SEND_TOKEN_CALL
+
+def make_payouts(count: int, senders: int):
+    """Prepare unsigned sendToken payouts spread over a few sender keys"""
+    keys = [Account.create().key for _ in range(senders)]
+    manager = Account.create().address
+    items = []
+    for i in range(count):
+        key = keys[i % senders]
+        tx = {
+            'from': Account.from_key(key).address,
+            'to': manager,
+            'nonce': i // senders,
+            'gas': 2000000,
+            'gasPrice': 10**9,
+            'chainId': 545,
+            'value': 0
+        }
+        call = (*SEND_TOKEN_CALL, ["tDOGE", Account.create().address])
+        items.append((tx, bytes(key), call))
+    return items
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    """Return the longest stall of the event loop while the benchmark runs"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - started - 0.001)
+    return worst
+
+async def run_case(name: str, items, sign) -> None:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await sign(items)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+    print(
+        f"{name:<22} {len(items) / elapsed:>10.0f} tx/s   "
+        f"total {elapsed * 1000:>8.1f} ms   worst loop stall {worst_lag * 1000:>8.1f} ms"
+    )
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark payout signing throughput")
+    parser.add_argument("--payouts", type=int, default=2000)
+    parser.add_argument("--senders", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    items = make_payouts(args.payouts, args.senders)
+    print(f"Signing {len(items)} sendToken payouts from {args.senders} senders\n")
+
+    async def inline(batch):
+        # What _build_and_send_tx used to do: sign on the event loop thread
+        sign_batch(batch)
+
+    thread_signer = SigningExecutor(workers=args.workers, use_processes=False)
+    process_signer = SigningExecutor(workers=args.workers, use_processes=True)
+    # Start the worker processes before timing
+    await process_signer.sign_batch(items[:process_signer.workers])
+
+    async def coalesced(batch):
+        await asyncio.gather(*(process_signer.sign(*item) for item in batch))
+
+    await run_case("inline (event loop)", items, inline)
+    await run_case("thread pool batch", items, thread_signer.sign_batch)
+    await run_case("process pool batch", items, process_signer.sign_batch)
+    await run_case("process pool per-tx", items, coalesced)
+
+    thread_signer.shutdown()
+    process_signer.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
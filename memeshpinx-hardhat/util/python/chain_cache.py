@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Entry kinds and how long they stay valid
+PERMANENT = "permanent"  # never changes (e.g. token decimals)
+REGISTRY = "registry"    # changes only with TokenManager events
+BALANCE = "balance"      # changes all the time, cached for a short TTL
+
+class ChainCache:
+    """Read-through cache for chain state with per-kind hit/miss statistics"""
+    def __init__(self, balance_ttl: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.balance_ttl = balance_ttl
+        self._clock = clock
+        self._entries: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {
+            PERMANENT: {},
+            REGISTRY: {},
+            BALANCE: {},
+        }
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.invalidations: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def lookup(self, kind: str, key: Hashable) -> Tuple[bool, Any]:
+        """Return (True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries[kind].get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self._clock():
+                    self.hits[kind] += 1
+                    return True, value
+                del self._entries[kind][key]
+            self.misses[kind] += 1
+            return False, None
+
+    def store(self, kind: str, key: Hashable, value: Any) -> None:
+        expires_at: Optional[float] = None
+        if kind == BALANCE:
+            expires_at = self._clock() + self.balance_ttl
+        with self._lock:
+            self._entries[kind][key] = (expires_at, value)
+
+    def invalidate(self, kind: str, match: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop every entry of a kind, or only the keys for which match(key) is true"""
+        with self._lock:
+            entries = self._entries[kind]
+            if match is None:
+                dropped = len(entries)
+                entries.clear()
+            else:
+                stale = [key for key in entries if match(key)]
+                for key in stale:
+                    del entries[key]
+                dropped = len(stale)
+            self.invalidations[kind] += dropped
+
+    def get_stats(self) -> dict:
+        """Get entry counts, hits, misses and hit ratio per kind"""
+        with self._lock:
+            stats = {}
+            for kind, entries in self._entries.items():
+                hits, misses = self.hits[kind], self.misses[kind]
+                stats[kind] = {
+                    "entries": len(entries),
+                    "hits": hits,
+                    "misses": misses,
+                    "invalidations": self.invalidations[kind],
+                    "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                }
+            return stats
@@ -0,0 +1,173 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.exceptions import ProviderConnectionError
+from web3.providers.base import BaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+# Methods that change chain state are sent to several endpoints for redundancy
+WRITE_METHODS = {"eth_sendRawTransaction"}
+
+class Endpoint:
+    """One RPC endpoint with a keep-alive session and latency statistics"""
+    def __init__(self, url: str, request_timeout: float, pool_size: int):
+        self.url = url
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.provider = Web3.HTTPProvider(
+            url,
+            request_kwargs={"timeout": request_timeout},
+            session=session
+        )
+        self.healthy = True
+        self.latency_ewma: Optional[float] = None
+        self.block_number = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    def record(self, latency: float, alpha: float) -> None:
+        self.requests += 1
+        self.total_latency += latency
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = alpha * latency + (1 - alpha) * self.latency_ewma
+
+class ProviderPool(BaseProvider):
+    """web3 provider that routes reads to the fastest healthy endpoint and fans out writes"""
+    def __init__(
+        self,
+        urls: Sequence[str],
+        request_timeout: float = 10,
+        write_fanout: int = 2,
+        max_block_lag: int = 5,
+        ewma_alpha: float = 0.3,
+        pool_size: int = 32
+    ):
+        if not urls:
+            raise ValueError("ProviderPool needs at least one RPC URL")
+        super().__init__()
+        self.endpoints: List[Endpoint] = [Endpoint(url, request_timeout, pool_size) for url in urls]
+        self.write_fanout = max(1, write_fanout)
+        self.max_block_lag = max_block_lag
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.endpoints))
+        self._health_thread: Optional[threading.Thread] = None
+
+    def __str__(self) -> str:
+        return f"RPC pool of {len(self.endpoints)} endpoints"
+
+    def _ranked(self) -> List[Endpoint]:
+        """Healthy endpoints fastest first, then the unhealthy ones as a last resort"""
+        with self._lock:
+            def key(endpoint: Endpoint):
+                latency = endpoint.latency_ewma if endpoint.latency_ewma is not None else 0.0
+                return (not endpoint.healthy, latency)
+            return sorted(self.endpoints, key=key)
+
+    def _call(self, endpoint: Endpoint, method: RPCEndpoint, params: Any) -> RPCResponse:
+        started = time.perf_counter()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            with self._lock:
+                endpoint.errors += 1
+                endpoint.healthy = False
+            raise
+        with self._lock:
+            endpoint.record(time.perf_counter() - started, self.ewma_alpha)
+        return response
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        if method in WRITE_METHODS:
+            return self._broadcast(method, params)
+
+        last_error: Optional[Exception] = None
+        for endpoint in self._ranked():
+            try:
+                # JSON-RPC errors (e.g. reverts) are answers, not endpoint failures
+                return self._call(endpoint, method, params)
+            except Exception as e:
+                last_error = e
+        raise ProviderConnectionError(f"All RPC endpoints failed: {last_error}")
+
+    def _broadcast(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a write to the fastest endpoints at once and return the first success"""
+        targets = self._ranked()[:self.write_fanout]
+        futures = [self._executor.submit(self._call, endpoint, method, params) for endpoint in targets]
+
+        error_response: Optional[RPCResponse] = None
+        last_error: Optional[Exception] = None
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if "error" not in response:
+                return response
+            # A redundant copy may already be in the mempool of the node that answered first
+            error_response = error_response or response
+
+        if error_response is not None:
+            return error_response
+        raise ProviderConnectionError(f"Broadcast failed on every endpoint: {last_error}")
+
+    def check_health(self) -> None:
+        """Probe every endpoint with eth_blockNumber and mark lagging or failing ones unhealthy"""
+        heights = {}
+        for endpoint in self.endpoints:
+            try:
+                response = self._call(endpoint, RPCEndpoint("eth_blockNumber"), [])
+                heights[endpoint.url] = int(response["result"], 16)
+            except Exception:
+                continue
+
+        with self._lock:
+            best_block = max(heights.values(), default=0)
+            for endpoint in self.endpoints:
+                height = heights.get(endpoint.url)
+                if height is not None:
+                    endpoint.block_number = height
+                endpoint.healthy = height is not None and best_block - height <= self.max_block_lag
+
+    def start_health_checks(self, interval: float) -> None:
+        """Run check_health every interval seconds on a daemon thread"""
+        if self._health_thread is not None:
+            return
+
+        def run():
+            while True:
+                self.check_health()
+                time.sleep(interval)
+
+        self._health_thread = threading.Thread(target=run, name="rpc-health", daemon=True)
+        self._health_thread.start()
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(endpoint.healthy for endpoint in self.endpoints)
+
+    def get_stats(self) -> List[dict]:
+        """Get per-endpoint health and latency"""
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "healthy": endpoint.healthy,
+                    "block_number": endpoint.block_number,
+                    "latency_ewma_ms": None if endpoint.latency_ewma is None else endpoint.latency_ewma * 1000,
+                    "avg_latency_ms": endpoint.total_latency / endpoint.requests * 1000 if endpoint.requests else None,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                }
+                for endpoint in self.endpoints
+            ]
@@ -0,0 +1,145 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from web3 import Web3
+
+class HotWallet:
+    """One authorized sender key with its own locally tracked nonce"""
+    def __init__(self, account):
+        self.account = account
+        self.address = account.address
+        self.next_nonce: Optional[int] = None
+        self.in_flight = 0
+        self.sent = 0
+        self.failures = 0
+        self.gas_balance = 0
+        self.authorized = True
+        self.healthy = True
+
+class NoHealthySenderError(Exception):
+    pass
+
+class SenderPool:
+    """Spreads payouts over several authorized sender keys, each with its own nonce sequence"""
+    def __init__(
+        self,
+        web3: Web3,
+        private_keys: Sequence[str],
+        min_gas_balance: int = 10**16,
+        max_in_flight: int = 16
+    ):
+        if not private_keys:
+            raise ValueError("SenderPool needs at least one private key")
+        self.web3 = web3
+        self.min_gas_balance = min_gas_balance
+        self.max_in_flight = max_in_flight
+        self.wallets: List[HotWallet] = [
+            HotWallet(web3.eth.account.from_key(key)) for key in private_keys
+        ]
+        self._by_address: Dict[str, HotWallet] = {w.address: w for w in self.wallets}
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float = 30) -> Tuple[HotWallet, int]:
+        """Reserve the least-loaded healthy sender and its next nonce"""
+        with self._cond:
+            while True:
+                candidates = [
+                    w for w in self.wallets
+                    if w.healthy and w.in_flight < self.max_in_flight
+                ]
+                if candidates:
+                    break
+                if not any(w.healthy for w in self.wallets):
+                    raise NoHealthySenderError("No healthy sender wallet is available")
+                # Every healthy sender is at its in-flight limit: wait for a release
+                if not self._cond.wait(timeout):
+                    raise NoHealthySenderError("Timed out waiting for a free sender wallet")
+
+            wallet = min(candidates, key=lambda w: w.in_flight)
+            wallet.in_flight += 1
+            return wallet, self._take_nonce(wallet)
+
+    def reserve_nonce(self, address: str) -> int:
+        """Take the next nonce of one sender for a transaction outside the payout rotation
+
+        Admin calls are signed by a pooled key, so they must draw from the same local
+        sequence as its payouts rather than re-read the pending count from the node.
+        """
+        with self._cond:
+            return self._take_nonce(self._by_address[address])
+
+    def _take_nonce(self, wallet: HotWallet) -> int:
+        if wallet.next_nonce is None:
+            wallet.next_nonce = self.web3.eth.get_transaction_count(wallet.address, 'pending')
+        nonce = wallet.next_nonce
+        wallet.next_nonce += 1
+        return nonce
+
+    def peek(self) -> str:
+        """Get the address acquire() would pick right now, without reserving it"""
+        with self._cond:
+            candidates = [w for w in self.wallets if w.healthy] or self.wallets
+            return min(candidates, key=lambda w: w.in_flight).address
+
+    def get_key(self, address: str) -> bytes:
+        """Get the private key of a pooled sender, for signing on a worker"""
+        return bytes(self._by_address[address].account.key)
+
+    def release(self, address: str, success: Optional[bool]) -> None:
+        """Mark a transaction from this sender as finished; None if its outcome is not known yet"""
+        with self._cond:
+            wallet = self._by_address.get(address)
+            if wallet is None:
+                return
+            wallet.in_flight = max(0, wallet.in_flight - 1)
+            if success:
+                wallet.sent += 1
+            elif success is not None:
+                wallet.failures += 1
+            self._cond.notify_all()
+
+    def resync(self, address: str) -> None:
+        """Drop the local nonce so the next acquire re-reads it from the node"""
+        with self._cond:
+            wallet = self._by_address.get(address)
+            if wallet is not None:
+                wallet.next_nonce = None
+
+    def refresh_health(self, token_manager) -> None:
+        """Re-check every sender's gas balance and authorization on the TokenManager"""
+        for wallet in self.wallets:
+            try:
+                gas_balance = self.web3.eth.get_balance(wallet.address)
+                authorized = token_manager.functions.isAuthorizedSender(wallet.address).call()
+            except Exception as e:
+                print(f"Health check failed for sender {wallet.address}:", e)
+                continue
+
+            with self._cond:
+                wallet.gas_balance = gas_balance
+                wallet.authorized = authorized
+                healthy = authorized and gas_balance >= self.min_gas_balance
+                if wallet.healthy and not healthy:
+                    print(
+                        f"Sender {wallet.address} disabled "
+                        f"(authorized={authorized}, gas_balance={gas_balance})"
+                    )
+                wallet.healthy = healthy
+                self._cond.notify_all()
+
+    def get_stats(self) -> List[dict]:
+        """Get per-sender load and health"""
+        with self._cond:
+            return [
+                {
+                    "address": w.address,
+                    "healthy": w.healthy,
+                    "authorized": w.authorized,
+                    "gas_balance": w.gas_balance,
+                    "in_flight": w.in_flight,
+                    "next_nonce": w.next_nonce,
+                    "sent": w.sent,
+                    "failures": w.failures,
+                }
+                for w in self.wallets
+            ]
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+
+# (function signature, argument types, arguments), e.g.
+# ("sendToken(string,address)", ["string", "address"], ["tDOGE", "0x..."])
+CallSpec = Tuple[str, Sequence[str], Sequence]
+
+def encode_call(call: CallSpec) -> str:
+    """ABI-encode a contract call into transaction data"""
+    signature, arg_types, args = call
+    return "0x" + (function_signature_to_4byte_selector(signature) + encode(list(arg_types), list(args))).hex()
+
+# Module-level so it can be pickled into a worker process
+def sign_batch(items: List[Tuple[dict, bytes, Optional[CallSpec]]]) -> List[Tuple[str, str]]:
+    """Encode and sign prepared transactions; returns (raw_tx, tx_hash) for each"""
+    signed = []
+    for tx, key, call in items:
+        if call is not None:
+            tx = dict(tx, data=encode_call(call))
+        signed_tx = Account.sign_transaction(tx, key)
+        signed.append((HexBytes(signed_tx.rawTransaction).hex(), HexBytes(signed_tx.hash).hex()))
+    return signed
+
+class SigningExecutor:
+    """Signs transactions on a worker pool, coalescing concurrent requests into batches
+
+    Threads by default: a bot shard signs a few payouts a second, so a couple of
+    threads keep it off the event loop without a pool of processes per shard. With
+    use_processes the workers are spawned (the caller already runs threads, which a
+    fork would copy mid-lock) and every batch pickles its keys across to them.
+    """
+    def __init__(self, workers: Optional[int] = None, use_processes: bool = False, max_batch: int = 64):
+        self.workers = workers or ((os.cpu_count() or 1) if use_processes else 2)
+        self.use_processes = use_processes
+        self.max_batch = max_batch
+        self._executor: Optional[Executor] = None
+        self._pending: List[Tuple[tuple, asyncio.Future]] = []
+        self._flush_scheduled = False
+        self._batches: set = set()
+        self.signed_count = 0
+        self.batch_count = 0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing TokenOperations stays cheap
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="signer")
+        return self._executor
+
+    async def sign(self, tx: dict, key: bytes, call: Optional[CallSpec] = None) -> Tuple[str, str]:
+        """Sign one transaction; requests made in the same loop iteration share a batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((tx, key, call), future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[tuple, asyncio.Future]]) -> None:
+        try:
+            results = await self.sign_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def sign_batch(self, items: List[Tuple[dict, bytes, Optional[CallSpec]]]) -> List[Tuple[str, str]]:
+        """Sign many prepared transactions, split into chunks across the workers"""
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunk_size = max(1, min(self.max_batch, -(-len(items) // self.workers)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, sign_batch, chunk) for chunk in chunks)
+        )
+        self.signed_count += len(items)
+        self.batch_count += len(chunks)
+        return [signed for chunk in results for signed in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,9 +1,23 @@
+import asyncio
+import threading
+import time
 from decimal import Decimal
-from typing import Optional, Union
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Union
 
 from eth_typing import Address
 from hexbytes import HexBytes
 from web3 import Web3
+from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.logs import DISCARD
+
+from chain_cache import BALANCE, PERMANENT, REGISTRY, ChainCache
+from rpc_pool import ProviderPool
+from sender_pool import SenderPool
+from signing import SigningExecutor
+
+SEND_TOKEN_CALL = ("sendToken(string,address)", ["string", "address"])
+# sendToken pays a random 10..100 raw units, so the manager wallet must cover the top of that range
+MAX_SEND_AMOUNT = 100
 
 # ABI definitions
 TOKEN_MANAGER_ABI = [
@@ -20,8 +34,7 @@ TOKEN_MANAGER_ABI = [
     {
         "inputs": [
             {"name": "symbol", "type": "string"},
-            {"name": "destination", "type": "address"},
-            {"name": "amount", "type": "uint256"}
+            {"name": "destination", "type": "address"}
         ],
         "name": "sendToken",
         "outputs": [],
@@ -34,6 +47,71 @@ TOKEN_MANAGER_ABI = [
         "outputs": [{"name": "", "type": "address"}],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [{"name": "sender", "type": "address"}],
+        "name": "isAuthorizedSender",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "symbol", "type": "string"}],
+        "name": "getTokenAddress",
+        "outputs": [{"name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "symbol", "type": "string"}],
+        "name": "isTokenSupported",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getSupportedSymbols",
+        "outputs": [{"name": "", "type": "string[]"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "name": "symbol", "type": "string"},
+            {"indexed": False, "name": "tokenAddress", "type": "address"}
+        ],
+        "name": "TokenRegistered",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "name": "symbol", "type": "string"},
+            {"indexed": False, "name": "tokenAddress", "type": "address"}
+        ],
+        "name": "TokenUnregistered",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "name": "symbol", "type": "string"},
+            {"indexed": False, "name": "destination", "type": "address"},
+            {"indexed": False, "name": "amount", "type": "uint256"}
+        ],
+        "name": "TokenSent",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "name": "oldWallet", "type": "address"},
+            {"indexed": False, "name": "newWallet", "type": "address"}
+        ],
+        "name": "ManagerWalletUpdated",
+        "type": "event"
     }
 ]
 
@@ -74,29 +152,219 @@ ERC20_ABI = [
     }
 ]
 
+class SignedTx(NamedTuple):
+    raw_tx: str
+    tx_hash: str
+    nonce: int
+    sender: str
+
+class TxResult(NamedTuple):
+    success: bool
+    amount: int = 0  # what the TokenManager paid, from its TokenSent event; it picks the amount itself
+
+class PreflightResult(NamedTuple):
+    ok: bool
+    reason: str = ""
+    retryable: bool = False  # True: hold the payout and retry later; False: reject it
+
+class BroadcastRejected(Exception):
+    """The node refused a transaction, and it is neither pending nor mined"""
+
+# Revert reasons that can clear up on their own (e.g. once the manager wallet is refilled)
+RETRYABLE_REVERTS = ("Insufficient balance", "Insufficient allowance", "Transfer failed", "allowance")
+
 class TokenOperations:
-    def __init__(self, token_manager_address: str, rpc_url: str, private_key: str):
-        """Initialize TokenOperations with provider and signer"""
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
-        self.account = self.web3.eth.account.from_key(private_key)
+    def __init__(
+        self,
+        token_manager_address: str,
+        rpc_url: Union[str, Sequence[str]],
+        private_key: Union[str, Sequence[str]],
+        min_sender_gas_balance: int = 10**16,
+        max_in_flight_per_sender: int = 16,
+        rpc_health_interval: float = 15,
+        balance_cache_ttl: float = 5.0,
+        signer: Optional[SigningExecutor] = None,
+        event_sink: Optional[Callable[..., None]] = None
+    ):
+        """Initialize TokenOperations with provider and signer
+
+        event_sink, if given, is called as event_sink(kind, **fields) for every payout
+        transaction signed, broadcast and settled. It may be called from worker threads
+        and must not block.
+        """
+        # With several keys, the first signs admin calls and all of them send payouts
+        private_keys = [private_key] if isinstance(private_key, str) else list(private_key)
+        
+        # Several RPC URLs form a pool: fastest healthy endpoint for reads, fan-out for writes
+        self.rpc_pool: Optional[ProviderPool] = None
+        if isinstance(rpc_url, str):
+            self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+        else:
+            self.rpc_pool = ProviderPool(rpc_url)
+            self.rpc_pool.start_health_checks(rpc_health_interval)
+            self.web3 = Web3(self.rpc_pool)
+        self.account = self.web3.eth.account.from_key(private_keys[0])
+        self.sender_pool = SenderPool(
+            self.web3,
+            private_keys,
+            min_gas_balance=min_sender_gas_balance,
+            max_in_flight=max_in_flight_per_sender
+        )
+        self._pooled_txs: Dict[str, str] = {}  # tx hash -> sender address
         self.token_manager_address = Web3.to_checksum_address(token_manager_address)
         self.token_manager = self.web3.eth.contract(
             address=self.token_manager_address,
             abi=TOKEN_MANAGER_ABI
         )
+        
+        # Read cache: decimals forever, registry until a TokenManager event, balances for a TTL
+        self.cache = ChainCache(balance_ttl=balance_cache_ttl)
+        
+        # Payout signing and ABI encoding run on a worker pool, off the caller's thread
+        self.signer = signer or SigningExecutor()
+        self._last_event_block: Optional[int] = None
+        self._event_thread: Optional[threading.Thread] = None
+        self.event_sink = event_sink
 
-    def _build_and_send_tx(self, func, wait_for_confirmation: bool = True) -> str:
-        """Helper function to build and send transactions"""
+    async def _cached_call(self, kind: str, key: tuple, call):
+        """Serve a contract read from the cache, or run it off the event loop and cache it"""
+        hit, value = self.cache.lookup(kind, key)
+        if hit:
+            return value
+        value = await asyncio.to_thread(call.call)
+        self.cache.store(kind, key, value)
+        return value
+
+    def sync_registry_events(self) -> int:
+        """Invalidate registry entries touched by TokenManager events since the last sync"""
+        latest = self.web3.eth.block_number
+        if self._last_event_block is None:
+            # Nothing cached can predate the first sync
+            self._last_event_block = latest
+            return 0
+        if latest <= self._last_event_block:
+            return 0
+        
+        topics = [
+            self.web3.keccak(text="TokenRegistered(string,address)").hex(),
+            self.web3.keccak(text="TokenUnregistered(string,address)").hex(),
+            self.web3.keccak(text="ManagerWalletUpdated(address,address)").hex(),
+        ]
+        logs = self.web3.eth.get_logs({
+            'address': self.token_manager_address,
+            'fromBlock': self._last_event_block + 1,
+            'toBlock': latest,
+            'topics': [topics]
+        })
+        self._last_event_block = latest
+        
+        for log in logs:
+            if HexBytes(log['topics'][0]).hex() == topics[2]:
+                # The manager wallet moved: its cached address and balances are stale
+                self.cache.invalidate(REGISTRY, lambda key: key[0] == "managerWallet")
+                self.cache.invalidate(BALANCE)
+                continue
+            event_name = "TokenRegistered" if HexBytes(log['topics'][0]).hex() == topics[0] else "TokenUnregistered"
+            symbol = self.token_manager.events[event_name]().process_log(log)['args']['symbol']
+            self.cache.invalidate(
+                REGISTRY,
+                lambda key: key[0] == "getSupportedSymbols" or (len(key) > 1 and key[1] == symbol)
+            )
+        return len(logs)
+
+    def watch_registry_events(self, interval: float = 5.0) -> None:
+        """Poll TokenManager events on a daemon thread to keep the registry cache fresh"""
+        if self._event_thread is not None:
+            return
+        
+        def run():
+            while True:
+                try:
+                    self.sync_registry_events()
+                except Exception as e:
+                    # Without events we cannot trust the registry cache
+                    print("Failed to sync TokenManager events:", e)
+                    self.cache.invalidate(REGISTRY)
+                time.sleep(interval)
+        
+        self._event_thread = threading.Thread(target=run, name="registry-events", daemon=True)
+        self._event_thread.start()
+
+    def get_cache_stats(self) -> dict:
+        """Get hit/miss statistics of the read cache"""
+        return self.cache.get_stats()
+
+    def _sign_tx(self, func) -> SignedTx:
+        """Build and sign an owner transaction without broadcasting it"""
+        # The owner key also sends payouts, so its nonce comes from the pool's local sequence
+        nonce = self.sender_pool.reserve_nonce(self.account.address)
         try:
             tx = func.build_transaction({
                 'from': self.account.address,
-                'nonce': self.web3.eth.get_transaction_count(self.account.address),
+                'nonce': nonce,
                 'gas': 2000000,
                 'gasPrice': self.web3.eth.gas_price
             })
-            
             signed_tx = self.web3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        except Exception:
+            self.sender_pool.resync(self.account.address)
+            raise
+        return SignedTx(
+            raw_tx=HexBytes(signed_tx.rawTransaction).hex(),
+            tx_hash=HexBytes(signed_tx.hash).hex(),
+            nonce=nonce,
+            sender=self.account.address
+        )
+
+    def _send_raw(self, raw_tx: str, sender: Optional[str] = None) -> str:
+        """Broadcast a signed transaction; re-sending one the node already has is not an error
+
+        Raises BroadcastRejected if the node refused it, or the original error if the
+        node could not be reached; either way the transaction is not known to the chain.
+        """
+        try:
+            return HexBytes(self.web3.eth.send_raw_transaction(raw_tx)).hex()
+        except Exception as e:
+            tx_hash = HexBytes(Web3.keccak(hexstr=raw_tx)).hex()
+            if "already known" in str(e).lower():
+                return tx_hash
+            # A timeout can come after the node took it, and "nonce too low" after it was mined
+            try:
+                self.web3.eth.get_transaction(tx_hash)
+                return tx_hash
+            except Exception:
+                pass
+            # The nonce was never used on chain, so the sender must re-read it
+            sender = self._pooled_txs.get(tx_hash, sender)
+            if sender is not None:
+                self._settle(tx_hash, False)
+                self.sender_pool.resync(sender)
+            if isinstance(e, ValueError):
+                raise BroadcastRejected(str(e)) from e
+            raise
+
+    def _release_pending(self, tx_hash: str) -> None:
+        """Free the pooled sender of a transaction whose outcome is reconciled later"""
+        sender = self._pooled_txs.pop(tx_hash, None)
+        if sender is not None:
+            self.sender_pool.release(sender, None)
+
+    def _settle(self, tx_hash: str, success: bool) -> None:
+        """Free the pooled sender of a finished transaction"""
+        sender = self._pooled_txs.pop(tx_hash, None)
+        if sender is not None:
+            if self.event_sink:
+                self.event_sink("tx_settled", tx_hash=tx_hash, success=success)
+            self.sender_pool.release(sender, success)
+            if success:
+                # A payout moved tokens out of the manager wallet
+                self.cache.invalidate(BALANCE)
+
+    def _build_and_send_tx(self, func, wait_for_confirmation: bool = True) -> str:
+        """Helper function to build and send transactions"""
+        try:
+            signed_tx = self._sign_tx(func)
+            tx_hash = self._send_raw(signed_tx.raw_tx, signed_tx.sender)
             
             if wait_for_confirmation:
                 receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
@@ -104,20 +372,166 @@ class TokenOperations:
                     return HexBytes(receipt['transactionHash']).hex()
                 raise Exception("Transaction failed")
             
-            return HexBytes(tx_hash).hex()
+            return tx_hash
             
         except Exception as e:
             raise Exception(f"Transaction failed: {str(e)}")
 
+    def _prepare_payout_tx(self) -> dict:
+        """Reserve a pooled sender and nonce and fill in everything but the call data"""
+        wallet, nonce = self.sender_pool.acquire()
+        try:
+            chain_id = self.cache.lookup(PERMANENT, ("chainId",))[1]
+            if chain_id is None:
+                chain_id = self.web3.eth.chain_id
+                self.cache.store(PERMANENT, ("chainId",), chain_id)
+            hit, gas_price = self.cache.lookup(BALANCE, ("gasPrice",))
+            if not hit:
+                gas_price = self.web3.eth.gas_price
+                self.cache.store(BALANCE, ("gasPrice",), gas_price)
+        except Exception:
+            self.sender_pool.release(wallet.address, False)
+            self.sender_pool.resync(wallet.address)
+            raise
+        return {
+            'from': wallet.address,
+            'to': self.token_manager_address,
+            'nonce': nonce,
+            'gas': 2000000,
+            'gasPrice': gas_price,
+            'chainId': chain_id,
+            'value': 0
+        }
+
+    async def sign_send_token(self, symbol: str, destination: str) -> SignedTx:
+        """Build and sign a sendToken transaction so it can be journaled before broadcast"""
+        signed = await self.sign_send_tokens([(symbol, destination)])
+        return signed[0]
+
+    async def sign_send_tokens(self, payouts: Sequence[tuple]) -> list:
+        """Sign many (symbol, destination) payouts on the signing pool"""
+        items = []
+        try:
+            for symbol, destination in payouts:
+                destination = Web3.to_checksum_address(destination)
+                tx = await asyncio.to_thread(self._prepare_payout_tx)
+                key = self.sender_pool.get_key(tx['from'])
+                items.append((tx, key, (*SEND_TOKEN_CALL, [symbol, destination])))
+            
+            if len(items) == 1:
+                # Single payouts from concurrent workers are coalesced into batches by the executor
+                results = [await self.signer.sign(*items[0])]
+            else:
+                results = await self.signer.sign_batch(items)
+        except Exception:
+            # Reserved nonces were never used: free the senders and re-read their nonces
+            for tx, _, _ in items:
+                self.sender_pool.release(tx['from'], False)
+                self.sender_pool.resync(tx['from'])
+            raise
+        
+        signed = []
+        for (tx, _, _), (raw_tx, tx_hash) in zip(items, results):
+            self._pooled_txs[tx_hash] = tx['from']
+            signed.append(SignedTx(raw_tx=raw_tx, tx_hash=tx_hash, nonce=tx['nonce'], sender=tx['from']))
+            if self.event_sink:
+                self.event_sink("tx_signed", tx_hash=tx_hash, sender=tx['from'], nonce=tx['nonce'])
+        return signed
+
+    async def preflight_send_token(self, symbol: str, destination: str) -> PreflightResult:
+        """Check a payout against cached state and simulate it before any gas is spent"""
+        destination = Web3.to_checksum_address(destination)
+        
+        try:
+            if not await self.is_token_supported(symbol):
+                return PreflightResult(False, "Invalid or unregistered symbol")
+            
+            # Cheap checks first, from the read cache
+            token_address = await self.get_token_address(symbol)
+            manager_wallet = await self.get_manager_wallet()
+            balance = await self.get_token_balance(token_address, manager_wallet)
+            if balance < MAX_SEND_AMOUNT:
+                return PreflightResult(False, "Insufficient balance in manager wallet", True)
+            allowance = await self.get_allowance(token_address, manager_wallet, self.token_manager_address)
+            if allowance < MAX_SEND_AMOUNT:
+                return PreflightResult(False, "Insufficient allowance for TokenManager", True)
+            
+            # Then the contract itself, from the sender that would sign, against pending state
+            sender = self.sender_pool.peek()
+            await asyncio.to_thread(
+                self.token_manager.functions.sendToken(symbol, destination).call,
+                {'from': sender},
+                'pending'
+            )
+        except ContractLogicError as e:
+            reason = str(e)
+            return PreflightResult(False, reason, any(r in reason for r in RETRYABLE_REVERTS))
+        except Exception as e:
+            # Could not check: hold rather than risk a reverting broadcast
+            return PreflightResult(False, f"Preflight unavailable: {e}", True)
+        
+        return PreflightResult(True)
+
+    async def broadcast_raw(self, raw_tx: str) -> str:
+        """Broadcast a transaction signed earlier and return its hash"""
+        tx_hash = await asyncio.to_thread(self._send_raw, raw_tx)
+        if self.event_sink:
+            self.event_sink("tx_broadcast", tx_hash=tx_hash)
+        return tx_hash
+
+    def _tx_result(self, tx_hash: str, receipt) -> TxResult:
+        """Settle a mined transaction and read the amount any TokenSent event reports"""
+        success = receipt['status'] == 1
+        self._settle(tx_hash, success)
+        amount = 0
+        if success:
+            for event in self.token_manager.events.TokenSent().process_receipt(receipt, errors=DISCARD):
+                amount += event['args']['amount']
+        return TxResult(success, amount)
+
+    async def get_receipt_status(self, tx_hash: str) -> Optional[TxResult]:
+        """Get whether a transaction succeeded, or None if it has not been mined"""
+        try:
+            receipt = await asyncio.to_thread(self.web3.eth.get_transaction_receipt, tx_hash)
+        except TransactionNotFound:
+            return None
+        return self._tx_result(tx_hash, receipt)
+
+    async def wait_for_receipt(self, tx_hash: str, timeout: float = 120) -> TxResult:
+        """Wait for a transaction receipt without blocking the event loop
+
+        If no receipt arrives (TimeExhausted or an RPC error) the sender slot is freed
+        anyway, so a stuck transaction cannot hold it; the caller reconciles it later.
+        """
+        try:
+            receipt = await asyncio.to_thread(
+                self.web3.eth.wait_for_transaction_receipt, tx_hash, timeout
+            )
+        except Exception:
+            self._release_pending(tx_hash)
+            raise
+        return self._tx_result(tx_hash, receipt)
+
+    async def refresh_senders(self) -> list:
+        """Re-check gas balance and authorization of every pooled sender"""
+        await asyncio.to_thread(self.sender_pool.refresh_health, self.token_manager)
+        return self.sender_pool.get_stats()
+
+    def get_rpc_stats(self) -> list:
+        """Get per-endpoint health and latency of the RPC pool"""
+        return self.rpc_pool.get_stats() if self.rpc_pool else []
+
     async def register_token(self, symbol: str, token_address: str) -> str:
         """Register a token in the TokenManager"""
         try:
             print(f"Registering token {symbol} at address {token_address}...")
             token_address = Web3.to_checksum_address(token_address)
             
-            tx_hash = self._build_and_send_tx(
+            tx_hash = await asyncio.to_thread(
+                self._build_and_send_tx,
                 self.token_manager.functions.registerToken(symbol, token_address)
             )
+            self.cache.invalidate(REGISTRY)
             print(f"Token registered. Transaction hash: {tx_hash}")
             return tx_hash
             
@@ -129,16 +543,16 @@ class TokenOperations:
         self,
         symbol: str,
         destination: str,
-        amount: Union[str, int],
         wait_for_confirmation: bool = True
     ) -> str:
-        """Send tokens through TokenManager"""
+        """Send tokens through TokenManager; the contract picks the amount"""
         try:
-            print(f"Sending {amount} {symbol} to {destination}...")
+            print(f"Sending {symbol} to {destination}...")
             destination = Web3.to_checksum_address(destination)
             
-            tx_hash = self._build_and_send_tx(
-                self.token_manager.functions.sendToken(symbol, destination, amount),
+            tx_hash = await asyncio.to_thread(
+                self._build_and_send_tx,
+                self.token_manager.functions.sendToken(symbol, destination),
                 wait_for_confirmation
             )
             
@@ -165,7 +579,8 @@ class TokenOperations:
             
             token = self.web3.eth.contract(address=token_address, abi=ERC20_ABI)
             
-            tx_hash = self._build_and_send_tx(
+            tx_hash = await asyncio.to_thread(
+                self._build_and_send_tx,
                 token.functions.approve(spender_address, amount),
                 wait_for_confirmation
             )
@@ -190,7 +605,11 @@ class TokenOperations:
         spender_address = Web3.to_checksum_address(spender_address)
         
         token = self.web3.eth.contract(address=token_address, abi=ERC20_ABI)
-        return token.functions.allowance(owner_address, spender_address).call()
+        return await self._cached_call(
+            BALANCE,
+            ("allowance", token_address, owner_address, spender_address),
+            token.functions.allowance(owner_address, spender_address)
+        )
 
     async def get_token_balance(
         self,
@@ -202,10 +621,50 @@ class TokenOperations:
         address_to_check = Web3.to_checksum_address(address_to_check)
         
         token = self.web3.eth.contract(address=token_address, abi=ERC20_ABI)
-        return token.functions.balanceOf(address_to_check).call()
+        return await self._cached_call(
+            BALANCE,
+            ("balanceOf", token_address, address_to_check),
+            token.functions.balanceOf(address_to_check)
+        )
 
     async def get_token_decimals(self, token_address: str) -> int:
         """Get token decimals"""
         token_address = Web3.to_checksum_address(token_address)
         token = self.web3.eth.contract(address=token_address, abi=ERC20_ABI)
-        return token.functions.decimals().call()
\ No newline at end of file
+        return await self._cached_call(
+            PERMANENT,
+            ("decimals", token_address),
+            token.functions.decimals()
+        )
+
+    async def get_token_address(self, symbol: str) -> str:
+        """Get the token address registered for a symbol"""
+        return await self._cached_call(
+            REGISTRY,
+            ("getTokenAddress", symbol),
+            self.token_manager.functions.getTokenAddress(symbol)
+        )
+
+    async def is_token_supported(self, symbol: str) -> bool:
+        """Check whether a symbol is registered in the TokenManager"""
+        return await self._cached_call(
+            REGISTRY,
+            ("isTokenSupported", symbol),
+            self.token_manager.functions.isTokenSupported(symbol)
+        )
+
+    async def get_supported_symbols(self) -> list:
+        """Get every registered symbol"""
+        return await self._cached_call(
+            REGISTRY,
+            ("getSupportedSymbols",),
+            self.token_manager.functions.getSupportedSymbols()
+        )
+
+    async def get_manager_wallet(self) -> str:
+        """Get the wallet the TokenManager pays rewards from"""
+        return await self._cached_call(
+            REGISTRY,
+            ("managerWallet",),
+            self.token_manager.functions.managerWallet()
+        )